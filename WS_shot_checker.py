@@ -1,19 +1,70 @@
 import os
 import re
+import threading
+import numpy as np
 import pandas as pd
 import zipfile
-import tempfile
+
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+from shot_cache import shotCache, fileFingerprint, zipMemberFingerprint, contentCrc32
+from shot_scanner import scanTree
+from shot_validation import VALIDATION_RULES, runRules, updateRules, shortOperator
+from shot_schema import readShotCsv, parseDatetime, applyCategoricals, memoryReport
+from shot_spatial import spacingStatistics  # importing registers the spatial rules
+from shot_timing import gpsDrift  # ...and the timing rules
+from shot_quality import qualityStatistics, rollingQuality, QUALITY_GROUPS, QUALITY_WINDOW  # ...and the quality rules
+from shot_dataset import shotDataset
+from shot_report import writeReport, REPORT_CHUNK_ROWS
+from shot_metrics import phaseMetrics
 
 from pprint import pprint
 
+
+SHEET_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def isShotCsv(name):
+    return "shots" in name.lower() and ("circuit" not in name.lower()) and name.endswith('.csv')
+
+
+def isZippedShotCsv(name):
+    return "shots" in name.lower() and name.endswith('.csv')
+
+
+def writeSheet(df, out_path, compression=None, file_format="csv"):
+    if file_format == "parquet":
+        out_path = os.path.splitext(out_path)[0] + ".parquet"
+        df.to_parquet(out_path, index=False, compression=compression or "snappy")
+    elif file_format == "csv":
+        out_path += SHEET_SUFFIXES[compression]
+        df.to_csv(out_path, index=False, compression=compression)
+    else:
+        raise ValueError(f"Unknown sheet format: {file_format}")
+
+    return out_path
+
+
 class projectData:
-    def __init__(self, path):
+    def __init__(self, path, use_cache=True, cache_dir=None):
         self.path = path
+        # Parsed shot files persist between sessions, see shot_cache
+        self.cache = shotCache(path, cache_dir) if use_cache else None
         self.files = list()
+        self.duplicateFiles = list()
+        self.zipMembers = dict()
+        self.fileKeys = dict()
+        self.fileSizes = dict()
         self.master = pd.DataFrame()
+        self.masterSources = pd.Categorical([])
         self.date_mismatches = list()
         self.RINchecks = list()
         self.operatorChecks = list()
+        self.validation = dict()
+        self.dataset = None
+        # Wall time, throughput and peak memory of the last run of each phase, see shot_metrics
+        self.metrics = phaseMetrics()
+        self._readPhase = "read"
 
         self.reorgedDFs = dict()
 
@@ -23,189 +74,690 @@ class projectData:
                     "GTIME"]
         self.pattern = r'(?<![0-9])(?:\d{4}|\d{2})-\d{2}-\d{2}(?![0-9])'
 
-    def findShotFiles(self, progress_callback=None):
-        seen_basenames = set()  # Track basenames to avoid duplicates
-        csvs = list()
-        zips = list()
-
-        # First pass: count total directories to estimate progress
-        total_dirs = sum(1 for _ in os.walk(self.path))
-        current_dir = 0
-
-        for root, dirs, files in os.walk(self.path):
-            current_dir += 1
-
-            # Report progress
-            if progress_callback:
-                progress_pct = int((current_dir / total_dirs) * 100)
-                progress_callback(progress_pct, f"Searching directory {current_dir}/{total_dirs}: {os.path.basename(root)}")
-
-            for file in files:
-                # Check for CSV shot files
-                if "shots" in file.lower() and ("circuit" not in file.lower()) and file.endswith('.csv'):
-                    basename = os.path.basename(file)
-                    if basename not in seen_basenames:
-                        self.files.append(os.path.join(root, file))
-                        seen_basenames.add(basename.strip(".csv"))
-                        csvs.append(basename)
-
-                # Check for zip files and walk through them
-                elif file.endswith('.zip'):
-                    zip_path = os.path.join(root, file)
-                    try:
-                        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                            for zip_info in zip_ref.namelist():
-                                # Check if the file in the zip is a shot CSV file
-                                if "shots" in zip_info.lower() and zip_info.endswith('.csv'):
-                                    basename = os.path.basename(zip_info)
-                                    if basename not in seen_basenames:
-                                        # Store the zip path and the file within it
-                                        self.files.append(f"{zip_path}::{zip_info}")
-                                        seen_basenames.add(basename)
-                    except (zipfile.BadZipFile, PermissionError) as e:
-                        print(f"Warning: Could not read zip file {zip_path}: {e}")
-
-        print(f"Found {len(seen_basenames)} files")
-
-    def compileMaster(self):
-
-        master = None
-
-        for idx, sf in enumerate(self.files):
-            # Check if the file is from a zip (contains '::')
+    def iterShotFiles(self, progress_callback=None, workers=None):
+        """
+        Yield shot file entries (path, or zip::member) as the concurrent scanner
+        finds them, recording their sizes in self.fileSizes.
+        """
+        def record_walk(seconds, n_entries):
+            self.metrics.add("find.walk", seconds, files=n_entries)
+
+        for sf in scanTree(self.path, isShotCsv, isZippedShotCsv, list_zip=self.listZip,
+                           workers=workers, progress_callback=progress_callback, record=record_walk):
+            self.fileSizes[sf] = self.contentKey(sf)[0]
+
+            yield sf
+
+    def dropDuplicates(self, files):
+        """
+        ``files`` without the entries whose content matches an earlier entry, which
+        is kept as the original; pass them sorted so the choice is stable.
+
+        Files are compared by size first; only when sizes collide are plain files
+        hashed (CRC32, chunked), and zip members use the CRC32 stored in the archive.
+        Skipped files are recorded in self.duplicateFiles.
+        """
+        by_size = dict()  # size -> [[crc or None, sf], ...] of the files kept so far
+        kept = list()
+
+        for sf in files:
+            size, crc = self.contentKey(sf)
+            seen = by_size.setdefault(size, list())
+
+            if seen:
+                if crc is None:
+                    crc = self.contentKey(sf, with_crc=True)[1]
+                for entry in seen:
+                    if entry[0] is None:
+                        entry[0] = self.contentKey(entry[1], with_crc=True)[1]
+
+                original = next((entry[1] for entry in seen if entry[0] == crc), None)
+                if original is not None:
+                    self.duplicateFiles.append({"file": sf, "duplicate_of": original})
+                    continue
+
+            seen.append([crc, sf])
+            kept.append(sf)
+
+        return kept
+
+    def findShotFiles(self, progress_callback=None, workers=None):
+        self.files = list()
+        self.duplicateFiles = list()
+        self.fileSizes = dict()
+
+        with self.metrics.phase("find") as phase:
+            # Matches arrive in scan completion order; sorting first keeps master row
+            # order, and which copy of a duplicate is kept, stable between sessions
+            found = sorted(self.iterShotFiles(progress_callback, workers))
+            self.files = self.dropDuplicates(found)
+
+            if self.cache:
+                self.cache.pruneContentCrcs(found)
+                self.cache.save()
+
+            phase.files = len(self.files)
+            phase.bytes = sum(self.fileSizes[sf] for sf in self.files)
+
+        print(f"Found {len(self.files)} files ({len(self.duplicateFiles)} duplicates skipped)")
+
+    def listZip(self, zip_path):
+        """
+        Member names of an archive, from the cache while the archive is unchanged.
+        Their sizes and CRC32s are kept in self.zipMembers for deduplication.
+        """
+        key = fileFingerprint(zip_path) if self.cache else None
+        members = self.cache.zipMembers(zip_path, key) if self.cache else None
+
+        if members is None:
+            with self.metrics.timed("find.zip_listing", files=1):
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                    members = {info.filename: [info.file_size, info.CRC] for info in zip_ref.infolist()}
+            if self.cache:
+                self.cache.putZipMembers(zip_path, key, members)
+
+        self.zipMembers[zip_path] = members
+
+        return list(members)
+
+    def contentKey(self, sf, with_crc=False):
+        """
+        (size, CRC32) of a shot file's contents. Zip members come straight from the
+        central directory; plain files are only hashed when ``with_crc`` is set, and
+        with the cache on only when their [size, mtime_ns] changed since last time.
+        """
+        if '::' in sf:
+            zip_path, file_in_zip = sf.split('::')
+            return tuple(self.zipMembers[zip_path][file_in_zip])
+
+        if not with_crc:
+            return os.path.getsize(sf), None
+
+        key = fileFingerprint(sf)
+        crc = self.cache.contentCrc(sf, key) if self.cache else None
+        if crc is None:
+            with self.metrics.timed("find.hashing", files=1, bytes=key[0]):
+                crc = contentCrc32(sf)
+            if self.cache:
+                self.cache.putContentCrc(sf, key, crc)
+
+        return key[0], crc
+
+    def sourceName(self, sf):
+        """
+        SOURCE_FILE of a shot file entry: its path relative to the project, with
+        ``::member`` for zip members, so files sharing a name stay apart.
+        """
+        path, sep, member = sf.partition('::')
+        name = os.path.relpath(path, self.path).replace(os.sep, '/')
+
+        return f"{name}::{member}" if sep else name
+
+    def tagShotFrame(self, df, sf):
+        # Extract date from filename
+        dates = re.findall(self.pattern, os.path.basename(sf.split('::')[-1]))
+        df.insert(0, "FILE_DATE", dates[0] if dates else "")
+
+        # Add source file column
+        filecol = [self.sourceName(sf)] * len(df)
+        df.insert(0, "SOURCE_FILE", filecol)
+
+        return df
+
+    def readShotFile(self, sf):
+        key = fileFingerprint(sf) if self.cache else None
+        df = self.loadCached(sf, key)
+
+        if df is None:
+            with self.metrics.timed(f"{self._readPhase}.parse", files=1, bytes=self.fileSizes.get(sf, 0)) as counts:
+                df = self.tagShotFrame(readShotCsv(sf, self.use_cols), sf)
+                counts["rows"] = len(df)
+            if self.cache:
+                self.cache.put(sf, key, df)
+
+        return [(sf, df)]
+
+    def readShotZip(self, zip_path, members):
+        """
+        Parse shot CSVs straight from the member streams of one archive, opened once.
+
+        Members whose cached CRC matches the listing kept by findShotFiles load from
+        the cache, so an archive whose members are all cached is never opened.
+        """
+        frames = dict()
+        listed = self.zipMembers.get(zip_path, dict())
+
+        for file_in_zip in members:
+            if file_in_zip in listed:
+                size, crc = listed[file_in_zip]
+                df = self.loadCached(f"{zip_path}::{file_in_zip}", [crc, size])
+                if df is not None:
+                    frames[file_in_zip] = df
+
+        missing = [file_in_zip for file_in_zip in members if file_in_zip not in frames]
+        if missing:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                for file_in_zip in missing:
+                    sf = f"{zip_path}::{file_in_zip}"
+                    key = zipMemberFingerprint(zip_ref.getinfo(file_in_zip)) if self.cache else None
+                    df = None if file_in_zip in listed else self.loadCached(sf, key)
+
+                    if df is None:
+                        try:
+                            with self.metrics.timed(f"{self._readPhase}.parse", files=1,
+                                                    bytes=self.fileSizes.get(sf, 0)) as counts, \
+                                    zip_ref.open(file_in_zip) as source:
+                                df = self.tagShotFrame(readShotCsv(source, self.use_cols), sf)
+                                counts["rows"] = len(df)
+                        except Exception as e:
+                            print(f"Warning: Could not read shot file {sf}: {e}")
+                            continue
+
+                        if self.cache:
+                            self.cache.put(sf, key, df)
+
+                    frames[file_in_zip] = df
+
+        return [(f"{zip_path}::{file_in_zip}", frames[file_in_zip]) for file_in_zip in members
+                if file_in_zip in frames]
+
+    def loadCached(self, sf, key):
+        """Cached frame of ``sf``, or None (also with the cache off)."""
+        if not self.cache:
+            return None
+
+        with self.metrics.timed(f"{self._readPhase}.cache_load") as counts:
+            df = self.cache.get(sf, key)
+            if df is not None:
+                counts.update(files=1, rows=len(df))
+
+        return df
+
+    def fileKey(self, sf):
+        """Change fingerprint of a shot file: [size, mtime_ns], or [size, CRC32] for zip members."""
+        if '::' in sf:
+            zip_path, file_in_zip = sf.split('::')
+            return list(self.zipMembers[zip_path][file_in_zip])
+
+        return fileFingerprint(sf)
+
+    def iterShotFrames(self, files, progress_callback=None, workers=None, max_pending=None, phase="read"):
+        """
+        Read ``files`` on a thread pool (reads are mostly waiting on network shares)
+        and yield (entry, frame) as each file or archive completes. Zipped shot
+        files are grouped so each archive is opened once and its members parsed in
+        memory. At most ``max_pending`` reads (default 2 per worker) are in flight,
+        so a slow consumer bounds memory. Timed in self.metrics as ``phase``.
+        """
+        # Check if the file is from a zip (contains '::')
+        archives = dict()
+        tasks = list()
+        for sf in files:
             if '::' in sf:
                 zip_path, file_in_zip = sf.split('::')
-
-                # Extract to temporary file
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    with zip_ref.open(file_in_zip) as source:
-                        # Create temporary file
-                        with tempfile.NamedTemporaryFile(mode='w+b', delete=False, suffix='.csv') as temp_file:
-                            temp_file.write(source.read())
-                            temp_path = temp_file.name
-
-                try:
-                    # Read from temporary file
-                    df = pd.read_csv(temp_path)
-                    file_name = os.path.basename(file_in_zip)
-                finally:
-                    # Delete temporary file
-                    os.unlink(temp_path)
+                if zip_path not in archives:
+                    archives[zip_path] = list()
+                    tasks.append((zip_path, archives[zip_path]))
+                archives[zip_path].append(file_in_zip)
             else:
-                # Regular file path
-                df = pd.read_csv(sf)
-                file_name = os.path.basename(sf)
-
-            # Extract date from filename
-            dates = re.findall(self.pattern, file_name)
-            df.insert(0, "FILE_DATE", dates[0] if dates else "")
-
-            # Add source file column
-            filecol = [file_name] * len(df)
-            df.insert(0, "SOURCE_FILE", filecol)
-
-            # Build master dataframe
-            if idx == 0:
-                master = df
+                tasks.append((sf, None))
+
+        if self.cache:
+            self.cache.hits = self.cache.misses = 0
+
+        total = len(files)
+        done = 0
+        # ThreadPoolExecutor's own default pool size
+        max_pending = max_pending or 2 * (workers or min(32, (os.cpu_count() or 1) + 4))
+
+        # Wall time includes the consumer's work between frames
+        self._readPhase = phase
+        with self.metrics.phase(phase) as record:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                tasks = iter(tasks)
+                pending = dict()
+
+                while True:
+                    for path, members in tasks:
+                        if members is None:
+                            pending[pool.submit(self.readShotFile, path)] = (path, 1)
+                        else:
+                            pending[pool.submit(self.readShotZip, path, members)] = (path, len(members))
+                        if len(pending) >= max_pending:
+                            break
+
+                    if not pending:
+                        break
+
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path, n_files = pending.pop(future)
+                        try:
+                            frames = future.result()
+                        except Exception as e:
+                            print(f"Warning: Could not read shot file {path}: {e}")
+                            frames = []
+
+                        for sf, df in frames:
+                            record.files += 1
+                            record.rows += len(df)
+                            record.bytes += self.fileSizes.get(sf, 0)
+                            yield sf, df
+
+                        done += n_files
+                        if progress_callback:
+                            progress_callback(int(done / total * 100),
+                                              f"Reading file {done}/{total}: {os.path.basename(path)}")
+
+            if self.cache:
+                self.cache.prune(self.files)
+                self.cache.save()
+                print(f"Loaded {self.cache.hits} shot files from cache, parsed {self.cache.misses}")
+
+    def readShotFiles(self, files, progress_callback=None, workers=None, phase="read"):
+        """{entry: frame} of the ``files`` that could be read, see iterShotFrames."""
+        return dict(self.iterShotFrames(files, progress_callback, workers, phase=phase))
+
+    def compileMaster(self, progress_callback=None, workers=None):
+        """
+        Read every shot file into self.master, concatenated once in the order of
+        self.files. With the cache on, only new or changed files are parsed.
+        """
+        with self.metrics.phase("compile") as phase:
+            keys = {sf: self.fileKey(sf) for sf in self.files}
+            frames = self.readShotFiles(self.files, progress_callback, workers, phase="compile.read")
+
+            read = [sf for sf in self.files if sf in frames]
+            # Files that could not be read have no key, so updateShotFiles retries them
+            self.fileKeys = {sf: keys[sf] for sf in read}
+            if not read:
+                print("No shot files could be read")
+                return
+
+            with self.metrics.phase("compile.concat"):
+                self.master = applyCategoricals(pd.concat([frames[sf] for sf in read], ignore_index=True))
+            with self.metrics.phase("compile.datetime"):
+                self.master.insert(0, "DATETIME", parseDatetime(self.master["DATE"], self.master["TIME"]))
+
+            # Shot file entry of every master row, to drop a file's rows when it changes
+            self.masterSources = pd.Categorical.from_codes(
+                np.repeat(np.arange(len(read)), [len(frames[sf]) for sf in read]), categories=read)
+
+            phase.files, phase.rows = len(read), len(self.master)
+            phase.bytes = sum(self.fileSizes.get(sf, 0) for sf in read)
+
+    def updateShotFiles(self, progress_callback=None, workers=None):
+        """
+        Rescan the project and bring master up to date incrementally.
+
+        Only new or changed files are parsed. Rows of changed or deleted files are
+        dropped, the new rows appended, and the validation rules re-run for just the
+        groups those rows touch (see shot_validation.updateRules).
+
+        fileKeys, master and masterSources are only replaced once the whole update
+        has succeeded, so a failed update is retried in full by the next call. A file
+        that cannot be read keeps its old rows and key (or gets no key) until it can.
+
+        Returns:
+            (added, removed) shot file entries; a changed file is in both.
+        """
+        with self.metrics.phase("update") as phase:
+            if self.master.empty:
+                self.findShotFiles(progress_callback, workers)
+                self.compileMaster(progress_callback, workers)
+                return list(self.files), list()
+
+            old_keys = self.fileKeys
+            self.findShotFiles(progress_callback, workers)
+            new_keys = {sf: self.fileKey(sf) for sf in self.files}
+
+            added = [sf for sf in self.files if old_keys.get(sf) != new_keys[sf]]
+            removed = [sf for sf in old_keys if new_keys.get(sf) != old_keys[sf]]
+
+            if not added and not removed:
+                return added, removed
+
+            frames = self.readShotFiles(added, progress_callback, workers, phase="update.read")
+            read = [sf for sf in added if sf in frames]
+
+            # A changed file that could not be read keeps its old rows and key until it can
+            failed = set(added) - set(read)
+            removed = [sf for sf in removed if sf not in failed]
+            keys = {sf: key for sf, key in new_keys.items() if sf not in failed}
+            keys.update({sf: old_keys[sf] for sf in failed if sf in old_keys})
+
+            if not read and not removed:
+                self.fileKeys = keys
+                return read, removed
+
+            stale = np.asarray(pd.Series(self.masterSources).isin(removed))
+            changed_rows = [self.master[stale]]
+            kept_sources = self.masterSources[~stale]
+
+            if read:
+                new_rows = pd.concat([frames[sf] for sf in read], ignore_index=True)
+                new_rows.insert(0, "DATETIME", parseDatetime(new_rows["DATE"], new_rows["TIME"]))
+                changed_rows.append(new_rows)
+                sources = np.concatenate([np.asarray(kept_sources, dtype=object),
+                                          np.repeat(np.array(read, dtype=object), [len(frames[sf]) for sf in read])])
             else:
-                master = pd.concat([master, df], ignore_index=True)
-
-        self.master = master.copy(deep=True)
-        self.master.insert(0, "DATETIME", pd.to_datetime(self.master["DATE"] + ' ' + self.master["TIME"]))
+                sources = np.asarray(kept_sources, dtype=object)
+
+            master = applyCategoricals(pd.concat([self.master[~stale]] + changed_rows[1:], ignore_index=True))
+            present = set(sources)
+            master_sources = pd.Categorical(sources, categories=[sf for sf in self.files if sf in present])
+
+            results = dict()
+            if self.validation:
+                with self.metrics.phase("update.validate"):
+                    changed_rows = pd.concat(changed_rows, ignore_index=True)
+                    results = updateRules(master, self.validation, changed_rows, names=list(self.validation))
+
+            self.fileKeys, self.master, self.masterSources = keys, master, master_sources
+            self.reorgedDFs = dict()
+            self.storeValidation(results)
+
+            phase.files, phase.rows = len(read), len(self.master)
+
+            print(f"Updated master: {len(read)} files added, {len(removed)} removed, {len(self.master)} rows")
+
+            return read, removed
+
+    def watch(self, interval=10.0, callback=None, stop_event=None, workers=None):
+        """
+        Poll the project every ``interval`` seconds and ingest new deliveries with
+        updateShotFiles. ``callback(added, removed)`` runs after each change; set
+        ``stop_event`` (threading.Event) to stop.
+        """
+        stop_event = stop_event if stop_event is not None else threading.Event()
+
+        while not stop_event.is_set():
+            try:
+                added, removed = self.updateShotFiles(workers=workers)
+            except Exception as e:
+                # A delivery still being copied; the next poll picks it up
+                print(f"Warning: Watch update failed: {e}")
+                added, removed = [], []
+
+            if (added or removed) and callback:
+                callback(added, removed)
+
+            stop_event.wait(interval)
+
+    def compileDataset(self, dataset_dir, progress_callback=None, workers=None):
+        """
+        Out-of-core alternative to compileMaster for projects too large for memory.
+
+        Each shot file is written to a partitioned Parquet dataset (see shot_dataset)
+        as soon as it is read, so master is never built. Files already in the
+        dataset with the same fingerprint are skipped, and deleted files removed.
+        """
+        with self.metrics.phase("compile") as phase:
+            self.dataset = shotDataset(dataset_dir)
+            self.fileKeys = {sf: self.fileKey(sf) for sf in self.files}
+
+            self.dataset.prune(self.files)
+            changed = [sf for sf in self.files if not self.dataset.has(sf, self.fileKeys[sf])]
+
+            for sf, df in self.iterShotFrames(changed, progress_callback, workers, phase="compile.read"):
+                with self.metrics.timed("compile.write", files=1, rows=len(df)):
+                    df.insert(0, "DATETIME", parseDatetime(df["DATE"], df["TIME"]))
+                    self.dataset.write(sf, self.fileKeys[sf], df)
+
+            self.dataset.save()
+
+            phase.files, phase.rows = len(changed), len(self.dataset)
+            phase.bytes = sum(self.fileSizes.get(sf, 0) for sf in changed)
+        print(f"Dataset has {len(self.dataset)} rows in {len(self.dataset.partitions())} partitions, "
+              f"{len(changed)} files written")
+
+    def runDatasetValidation(self, names=None, workers=None):
+        """
+        Run the validation rules over the on-disk dataset, a partition at a time.
+
+        Rules grouped by FILE_DATE or SOURCE_FILE run one FILE_DATE partition at a
+        time (a file never spans dates), rules grouped by OPER one operator at a
+        time, both in parallel on ``workers`` threads, so at most ``workers``
+        partitions are in memory.
+
+        Whole-master rules (no group key, e.g. near_duplicates, which compares shots
+        across every file) are the exception: they read only their columns, but for
+        the whole dataset at once, after the pool. Their peak memory grows with the
+        row count, around 200 bytes a row for near_duplicates; leave them
+        out of ``names`` where that does not fit.
+        """
+        names = list(names if names is not None else VALIDATION_RULES)
+        rules = [VALIDATION_RULES[n] for n in names]
+
+        by_date = [r.name for r in rules if {"FILE_DATE", "SOURCE_FILE"} & set(r.by)]
+        by_oper = [r.name for r in rules if r.name not in by_date and r.by == ("OPER",)]
+        whole = [r.name for r in rules if r.name not in by_date and r.name not in by_oper]
+
+        def partitionRules(parts, rule_names):
+            columns = [VALIDATION_RULES[n].columns for n in rule_names]
+            columns = None if None in columns else list(dict.fromkeys(c for cols in columns for c in cols))
+            with self.metrics.timed("validate.read", files=len(parts)) as counts:
+                df = self.dataset.readParts(parts, columns)
+                counts["rows"] = len(df)
+
+            timings = dict()
+            partial = runRules(df, rule_names, timings)
+            for name, seconds in timings.items():
+                self.metrics.add(f"validate.{name}", seconds, rows=len(df))
+
+            return partial
+
+        with self.metrics.phase("validate") as phase:
+            jobs = [(parts, by_date) for parts in self.dataset.byDate().values()] if by_date else []
+            jobs += [(parts, by_oper) for parts in self.dataset.byOperator().values()] if by_oper else []
+            results = {name: [] for name in names}
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # map keeps partition order, so issues come out in shot file order
+                for partial in pool.map(lambda job: partitionRules(*job), jobs):
+                    for name, issues in partial.items():
+                        results[name].extend(issues)
+
+            # Not bounded by partition: whole-master rules need every row of their columns
+            for name in whole:
+                results[name] = partitionRules(self.dataset.allParts(), [name])[name]
+
+            phase.rows = len(self.dataset)
+
+        self.storeValidation(results)
+
+        return results
+
+    def memoryReport(self):
+        """Memory used by the typed master against an untyped read, per column."""
+        report = memoryReport(self.master)
+        total = report.loc["TOTAL"]
+        print(f"Master uses {total['bytes'] / 2**20:.1f} MiB, {total['saving']:.1f}x less than untyped "
+              f"({total['untyped_bytes'] / 2**20:.1f} MiB)")
+
+        return report
+
+    def metricsReport(self, phase=None):
+        """Wall time, files/s, rows/s, MiB/s and peak memory of the last run of each phase (or ``phase``)."""
+        print(self.metrics.summary(phase))
+        table = self.metrics.table()
+
+        return table if phase is None or table.empty else \
+            table[(table.index == phase) | table.index.str.startswith(phase + ".")]
+
+    def spacingStatistics(self):
+        """Per-file nearest-shot spacing (count, min, median, mean, std, max, p05, p95, cv)."""
+        return spacingStatistics(self.master)
+
+    def gpsDrift(self):
+        """GPS minus logger time of every shot, in seconds."""
+        return gpsDrift(self.master)
+
+    def qualityStatistics(self, by="file", window=QUALITY_WINDOW):
+        """SNR / H380 / NSAT statistics and exceedances per "file", "operator" or "day"."""
+        return qualityStatistics(self.master, QUALITY_GROUPS.get(by, by), window)
+
+    def rollingQuality(self, by="file", window=QUALITY_WINDOW):
+        """Rolling SNR / H380 / NSAT medians of every shot within its file, operator or day."""
+        return rollingQuality(self.master, QUALITY_GROUPS.get(by, by), window)
+
+    def runValidation(self, names=None):
+        """
+        Run the registered validation rules (see shot_validation) in one grouped
+        pass per group key. Results are kept in self.validation by rule name.
+        """
+        with self.metrics.phase("validate") as phase:
+            timings = dict()
+            results = runRules(self.master, names, timings)
+            for name, seconds in timings.items():
+                self.metrics.add(f"validate.{name}", seconds, rows=len(self.master), concurrent=False)
+            phase.rows = len(self.master)
+
+        self.storeValidation(results)
+
+        return results
+
+    def storeValidation(self, results):
+        self.validation.update(results)
+
+        if "date_consistency" in results:
+            self.date_mismatches = results["date_consistency"]
+        if "operator" in results:
+            self.operatorChecks = results["operator"]
+        if "rin" in results:
+            self.RINchecks = results["rin"]
 
     def checkDateConsistency(self):
-        self.date_mismatches = list()
-
-        for dt in self.master["FILE_DATE"].unique():
-
-            sub_df = self.master[self.master["FILE_DATE"] == dt]
-
-            # Check if file_date matches any of the dates in the data
-            sub_dates = sub_df["DATE"].unique()
-
-            if len(sub_dates) > 1 and dt in sub_dates:
-                self.date_mismatches.append({
-                    'file': sub_df['SOURCE_FILE'].iloc[0],
-                    'file_date': dt,
-                    'data_dates': sub_df["DATE"].unique().tolist()
-                })
+        self.runValidation(["date_consistency"])
 
     def checkOperator(self):
-
-        oper_mismatches = []
-
-        for file in self.master["SOURCE_FILE"].unique():
-
-            filedf = self.master[self.master["SOURCE_FILE"] == file]
-
-            if len(filedf["OPER"].unique()) > 1:
-
-                opers = filedf["OPER"].unique()
-                opers = [oper[:oper.find("@")] for oper in opers]
-
-                oper_mismatches.append({
-                    "file": file,
-                    "operators": opers
-                })
+        oper_mismatches = self.runValidation(["operator"])["operator"]
 
         if oper_mismatches:
             return oper_mismatches
 
         return False
 
-
     def checkRIN(self):
-
-        rin_mismatches = []
-
-        for file in self.master["SOURCE_FILE"].unique():
-
-            filedf = self.master[self.master["SOURCE_FILE"] == file]
-
-            if len(filedf["RIN"].unique()) > 1:
-
-                rins = filedf["RIN"].unique()
-
-                rin_mismatches.append({
-                    "file": file,
-                    "RINs": rins
-                })
+        rin_mismatches = self.runValidation(["rin"])["rin"]
 
         if rin_mismatches:
             return rin_mismatches
 
         return False
 
-    def genReport(self):
-        pass
+    def iterMasterChunks(self, chunk_rows=REPORT_CHUNK_ROWS):
+        """Master in row order, ``chunk_rows`` at a time; from the on-disk dataset one date at a time."""
+        if not self.master.empty:
+            for start in range(0, len(self.master), chunk_rows):
+                yield self.master.iloc[start:start + chunk_rows]
+        elif self.dataset is not None:
+            for parts in self.dataset.byDate().values():
+                df = self.dataset.readParts(parts)
+                for start in range(0, len(df), chunk_rows):
+                    yield df.iloc[start:start + chunk_rows]
+
+    def genReport(self, path, include_master=True, include_sheets=True, chunk_rows=REPORT_CHUNK_ROWS,
+                  progress_callback=None):
+        """
+        Excel workbook with a summary, per-file table, validation issues, master and
+        the per-operator/date sheets, streamed in constant memory (see shot_report).
+        Works from master or, after compileDataset, from the on-disk dataset.
+        """
+        total = len(self.master) if not self.master.empty else len(self.dataset) if self.dataset is not None else 0
+        if not total:
+            print("No shot data to report")
+            return None
+
+        info = {"Duplicate files skipped": len(self.duplicateFiles)}
+        if not self.master.empty:
+            sheet_count = self.master.groupby(["FILE_DATE", "OPER"], observed=True).ngroups
+        else:
+            sheet_count = len(self.dataset.partitions())
+
+        with self.metrics.phase("report") as phase:
+            writeReport(path, self.iterMasterChunks(chunk_rows), self.validation,
+                        project_name=os.path.basename(os.path.normpath(self.path)), info=info,
+                        include_master=include_master, include_sheets=include_sheets, total_rows=total,
+                        sheet_count=sheet_count, progress_callback=progress_callback)
+            phase.files, phase.rows, phase.bytes = 1, total, os.path.getsize(path)
+        print(f"Report written to {path}")
+
+        return path
 
     def reorganizeSheets(self):
+        """One sheet per (FILE_DATE, OPER), split from a single groupby pass over master."""
+        self.reorgedDFs = dict()
+        sheets = self.master.drop(columns=["SOURCE_FILE", "DATETIME"])
 
-        for date in self.master["FILE_DATE"].unique():
-            sub_df = self.master[self.master["FILE_DATE"] == date]
-            sub_df = sub_df.drop(columns=["SOURCE_FILE", "DATETIME", "FILE_DATE"])
-
-            for oper in sub_df["OPER"].unique():
-
-                oper_df = sub_df[sub_df["OPER"] == oper]
-                name = f"shots_{oper[:oper.find("@")]}_{date}.csv"
+        for (date, oper), oper_df in sheets.groupby(["FILE_DATE", "OPER"], sort=False, observed=True):
+            name = f"shots_{shortOperator(oper)}_{date}.csv"
 
-                self.reorgedDFs[name] = oper_df
+            self.reorgedDFs[name] = oper_df.drop(columns=["FILE_DATE"])
 
+    def exportReorgSheets(self, path, compression=None, file_format="csv", workers=None, progress_callback=None):
+        """
+        Write the reorganized sheets concurrently on a thread pool.
 
-    def exportReorgSheets(self, path):
+        Args:
+            compression: None, "gzip" or "zstd". CSVs get a .gz / .zst suffix; for
+                Parquet it is the column codec (default snappy).
+            file_format: "csv" or "parquet".
+        """
+        with self.metrics.phase("export") as phase:
+            if not self.reorgedDFs:
+                with self.metrics.phase("export.reorganize"):
+                    self.reorganizeSheets()
 
-        if not self.reorgedDFs:
+            total = len(self.reorgedDFs)
+            os.makedirs(path, exist_ok=True)
 
-            self.reorganizeSheets()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(writeSheet, df, os.path.join(path, name), compression, file_format): name
+                           for name, df in self.reorgedDFs.items()}
 
-        for name, df in self.reorgedDFs.items():
+                for done, future in enumerate(as_completed(futures), 1):
+                    phase.bytes += os.path.getsize(future.result())
+                    if progress_callback:
+                        progress_callback(int(done / total * 100), f"Exported {done}/{total}: {futures[future]}")
 
-            out_path = os.path.join(path, name)
-            df.to_csv(out_path, index=False)
+            phase.files = total
+            phase.rows = sum(len(df) for df in self.reorgedDFs.values())
 
         print(f"Reorganized {len(self.files)} into {len(self.reorgedDFs)} files.")
 
+    def exportDatasetSheets(self, path, compression=None, file_format="csv", workers=None, progress_callback=None):
+        """
+        exportReorgSheets for the on-disk dataset: every (FILE_DATE, OPER) partition
+        is one sheet, read and written on its own thread, so at most ``workers``
+        sheets are in memory.
+        """
+        partitions = self.dataset.partitions()
+        total = len(partitions)
+        os.makedirs(path, exist_ok=True)
+
+        def export(date, oper, parts):
+            df = self.dataset.readParts(parts).drop(columns=["SOURCE_FILE", "DATETIME", "FILE_DATE"])
+            return writeSheet(df, os.path.join(path, f"shots_{shortOperator(oper)}_{date}.csv"),
+                              compression, file_format), len(df)
+
+        with self.metrics.phase("export") as phase:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(export, date, oper, parts): (date, oper)
+                           for (date, oper), parts in partitions.items()}
+
+                for done, future in enumerate(as_completed(futures), 1):
+                    out_path, n_rows = future.result()
+                    phase.rows += n_rows
+                    phase.bytes += os.path.getsize(out_path)
+                    if progress_callback:
+                        progress_callback(int(done / total * 100),
+                                          f"Exported {done}/{total}: {os.path.basename(out_path)}")
+
+            phase.files = total
+
+        print(f"Reorganized {len(self.files)} into {total} files.")
+
 
 def main():
     path = r"Z:\Shared\ActiveProjects\25844 - Woodard and Curran - Jackpile Uranium Mine - New Mexico, USA - 2025\03 - Field Data\0- Original ZIP data from field"
@@ -5,11 +5,14 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLineEdit, QLabel,
                              QTextEdit, QFileDialog, QTabWidget, QTableWidget,
                              QTableWidgetItem, QProgressBar, QMessageBox,
-                             QGroupBox, QSplitter)
+                             QGroupBox, QSplitter, QComboBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
+import numpy as np
 import pandas as pd
 from WS_shot_checker import projectData
+from shot_quality import QUALITY_GROUPS
+from shot_validation import VALIDATION_RULES
 
 
 class WorkerThread(QThread):
@@ -17,10 +20,12 @@ class WorkerThread(QThread):
     progress = pyqtSignal(int, str)  # Changed to include percentage
     finished = pyqtSignal(bool, str)
 
-    def __init__(self, project, operation):
+    def __init__(self, project, operation, path=None):
         super().__init__()
         self.project = project
         self.operation = operation
+        self.path = path
+        self.quality = dict()
         self.start_time = None
 
     def progress_callback(self, percentage, message):
@@ -56,14 +61,21 @@ class WorkerThread(QThread):
 
             elif self.operation == 'compile_master':
                 self.progress.emit(0, "Compiling master data...")
-                self.project.compileMaster()
+                self.project.compileMaster(progress_callback=self.progress_callback)
                 self.finished.emit(True, f"Compiled {len(self.project.master)} records")
 
             elif self.operation == 'check_all':
                 self.progress.emit(0, "Running all validation checks...")
-                self.project.checkDateConsistency()
+                self.project.runValidation()
+                # Statistics for every grouping of the Quality tab, so switching it stays instant
+                self.quality = {by: self.project.qualityStatistics(by).reset_index() for by in QUALITY_GROUPS}
                 self.finished.emit(True, "All checks completed")
 
+            elif self.operation == 'report':
+                self.progress.emit(0, "Generating report...")
+                self.project.genReport(self.path, progress_callback=self.progress_callback)
+                self.finished.emit(True, f"Excel report written to: {self.path}")
+
         except Exception as e:
             self.finished.emit(False, f"Error: {str(e)}")
 
@@ -73,6 +85,7 @@ class ShotCheckerGUI(QMainWindow):
         super().__init__()
         self.project = None
         self.worker = None
+        self.quality_stats = dict()
         self.initUI()
 
     def initUI(self):
@@ -125,6 +138,11 @@ class ShotCheckerGUI(QMainWindow):
         self.export_btn.setEnabled(False)
         action_layout.addWidget(self.export_btn)
 
+        self.report_btn = QPushButton("Generate Excel Report")
+        self.report_btn.clicked.connect(self.generate_report)
+        self.report_btn.setEnabled(False)
+        action_layout.addWidget(self.report_btn)
+
         main_layout.addLayout(action_layout)
 
         # Tab widget for different views
@@ -169,6 +187,31 @@ class ShotCheckerGUI(QMainWindow):
 
         self.tabs.addTab(validation_widget, "Validation Results")
 
+        # Quality tab: SNR / H380 / NSAT statistics and the quality rule results
+        quality_widget = QWidget()
+        quality_layout = QVBoxLayout(quality_widget)
+
+        group_layout = QHBoxLayout()
+        group_layout.addWidget(QLabel("Statistics per:"))
+        self.quality_group = QComboBox()
+        self.quality_group.addItems(list(QUALITY_GROUPS))
+        self.quality_group.currentTextChanged.connect(self.display_quality)
+        group_layout.addWidget(self.quality_group)
+        group_layout.addStretch()
+        quality_layout.addLayout(group_layout)
+
+        self.quality_table = QTableWidget()
+        quality_layout.addWidget(self.quality_table)
+
+        quality_label = QLabel("Quality Issues:")
+        quality_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
+        quality_layout.addWidget(quality_label)
+        self.quality_text = QTextEdit()
+        self.quality_text.setReadOnly(True)
+        quality_layout.addWidget(self.quality_text)
+
+        self.tabs.addTab(quality_widget, "Quality")
+
         # Log tab
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
@@ -225,6 +268,7 @@ class ShotCheckerGUI(QMainWindow):
         """Handle completion of file finding"""
         if success:
             self.log(message)
+            self.log_metrics("find")
             self.display_files()
             self.compile_btn.setEnabled(True)
             self.statusBar().showMessage(message)
@@ -254,9 +298,13 @@ class ShotCheckerGUI(QMainWindow):
         """Handle completion of data compilation"""
         if success:
             self.log(message)
+            self.log_metrics("compile")
+            self.quality_stats = dict()
+            self.quality_table.setRowCount(0)
             self.display_data_preview()
             self.validate_btn.setEnabled(True)
             self.export_btn.setEnabled(True)
+            self.report_btn.setEnabled(True)
             self.statusBar().showMessage(message)
         else:
             QMessageBox.critical(self, "Error", message)
@@ -304,6 +352,8 @@ class ShotCheckerGUI(QMainWindow):
         """Handle completion of validation"""
         if success:
             self.log(message)
+            self.log_metrics("validate")
+            self.quality_stats = self.worker.quality
             self.display_validation_results()
             self.statusBar().showMessage("Validation complete")
         else:
@@ -330,7 +380,7 @@ class ShotCheckerGUI(QMainWindow):
             self.log("No date mismatches found")
 
         # Operator mismatches
-        oper_mismatches = self.project.checkOperator()
+        oper_mismatches = self.project.operatorChecks
         if oper_mismatches:
             oper_text = f"Found {len(oper_mismatches)} operator mismatches:\n\n"
             for mismatch in oper_mismatches:
@@ -343,7 +393,7 @@ class ShotCheckerGUI(QMainWindow):
             self.log("No operator mismatches found")
 
         # RIN mismatches
-        rin_mismatches = self.project.checkRIN()
+        rin_mismatches = self.project.RINchecks
         if rin_mismatches:
             rin_text = f"Found {len(rin_mismatches)} RIN mismatches:\n\n"
             for mismatch in rin_mismatches:
@@ -355,9 +405,39 @@ class ShotCheckerGUI(QMainWindow):
             self.rin_text.setPlainText("No RIN mismatches found. ✓")
             self.log("No RIN mismatches found")
 
+        # Rules without a panel of their own (spatial, ...)
+        shown = {"date_consistency", "operator", "rin"}
+        quality_text = ""
+        for name, issues in self.project.validation.items():
+            if name not in shown:
+                self.log(f"{name}: {len(issues)} issues" if issues else f"{name}: no issues")
+            if VALIDATION_RULES[name].category == "quality":
+                quality_text += f"{name}: {VALIDATION_RULES[name].description}\n"
+                quality_text += "".join(f"  {issue}\n" for issue in issues) if issues else "  No issues. ✓\n"
+                quality_text += "\n"
+        self.quality_text.setPlainText(quality_text)
+        self.display_quality()
+
         # Switch to validation tab
         self.tabs.setCurrentIndex(2)
 
+    def display_quality(self, *args):
+        """Show the SNR / H380 / NSAT statistics computed by the validation worker"""
+        stats = self.quality_stats.get(self.quality_group.currentText())
+        if stats is None:
+            return
+
+        self.quality_table.setRowCount(len(stats))
+        self.quality_table.setColumnCount(len(stats.columns))
+        self.quality_table.setHorizontalHeaderLabels(stats.columns.tolist())
+
+        for i, row in enumerate(stats.itertuples(index=False)):
+            for j, value in enumerate(row):
+                text = f"{value:.3g}" if isinstance(value, (float, np.floating)) else str(value)
+                self.quality_table.setItem(i, j, QTableWidgetItem(text))
+
+        self.quality_table.resizeColumnsToContents()
+
     def export_sheets(self):
         """Export reorganized sheets"""
         if self.project.master.empty:
@@ -373,8 +453,9 @@ class ShotCheckerGUI(QMainWindow):
 
         try:
             self.progress_bar.setFormat("Exporting reorganized sheets...")
-            self.project.exportReorgSheets(export_dir)
+            self.project.exportReorgSheets(export_dir, progress_callback=self.export_progress)
             self.log(f"Reorganized sheets exported to: {export_dir}")
+            self.log_metrics("export")
             QMessageBox.information(
                 self, "Export Complete",
                 f"Reorganized sheets have been exported to:\n{export_dir}"
@@ -386,6 +467,47 @@ class ShotCheckerGUI(QMainWindow):
         finally:
             self.progress_bar.setFormat("")
 
+    def generate_report(self):
+        """Write the Excel report (summary, issues, master and per-operator sheets)"""
+        if self.project.master.empty:
+            QMessageBox.warning(self, "No Data", "Please compile master data first.")
+            return
+
+        report_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Excel Report", "shot_report.xlsx", "Excel Workbook (*.xlsx)"
+        )
+
+        if not report_path:
+            return
+
+        self.progress_bar.setFormat("Generating report...")
+        self.report_btn.setEnabled(False)
+
+        # Run in worker thread
+        self.worker = WorkerThread(self.project, 'report', report_path)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.finished.connect(self.on_report_finished)
+        self.worker.start()
+
+    def on_report_finished(self, success, message):
+        """Handle completion of the Excel report"""
+        if success:
+            self.log(message)
+            self.log_metrics("report")
+            self.statusBar().showMessage("Report complete")
+        else:
+            QMessageBox.critical(self, "Report Error", message)
+            self.log(f"ERROR writing report: {message}")
+
+        self.progress_bar.setFormat("")
+        self.progress_bar.setValue(0)
+        self.report_btn.setEnabled(True)
+
+    def export_progress(self, percentage, message):
+        """Progress from an export running on the UI thread"""
+        self.update_progress(percentage, message)
+        QApplication.processEvents()
+
     def update_progress(self, percentage, message):
         """Update progress bar with percentage and message"""
         self.progress_bar.setValue(percentage)
@@ -395,6 +517,12 @@ class ShotCheckerGUI(QMainWindow):
         """Add message to log tab"""
         self.log_text.append(message)
 
+    def log_metrics(self, phase):
+        """Add the timing, throughput and memory of a phase and its steps to the log tab"""
+        summary = self.project.metrics.summary(phase)
+        if summary:
+            self.log(f"Performance:\n{summary}")
+
 
 def main():
     app = QApplication(sys.argv)
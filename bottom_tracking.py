@@ -0,0 +1,170 @@
+import warnings
+
+import numpy as np
+
+from sidescan_mosaic import SOUND_SPEED
+
+
+def _movingAverage(values, window, axis):
+    """Trailing moving average along ``axis`` (shorter windows at the start)."""
+    if window <= 1:
+        return values
+
+    # Windows are a handful of samples, so summing shifted slices in float32 is
+    # cheaper than a float64 cumsum over the whole block
+    total = values.astype(np.float32, copy=True)
+    n = values.shape[axis]
+
+    for lag in range(1, min(window, n)):
+        dst = [slice(None)] * values.ndim
+        src = [slice(None)] * values.ndim
+        dst[axis] = slice(lag, n)
+        src[axis] = slice(0, n - lag)
+        total[tuple(dst)] += values[tuple(src)]
+
+    counts = np.minimum(np.arange(1, n + 1), window).astype(np.float32)
+    shape = [1] * values.ndim
+    shape[axis] = n
+    total /= counts.reshape(shape)
+
+    return total
+
+
+class bottomTracker:
+    """
+    First-return (bottom) picker for blocks of side-scan or sub-bottom pings.
+
+    Every step works on the whole (pings x samples) block at once:
+
+    1. amplitude is smoothed along each ping (``smooth_samples``) and across
+       pings with a trailing window (``smooth_pings``);
+    2. each ping's noise level is the mean of its first ``noise_samples`` samples
+       after ``min_sample``, and the pick threshold sits ``threshold`` of the way
+       from the noise level to the ping's peak;
+    3. the first sample above the threshold is refined to the steepest rising
+       edge in the ``refine_samples`` before it;
+    4. picks are despiked with a trailing running median over ``median_pings``.
+
+    The trailing windows carry over between calls to ``process``, so feeding a
+    line block by block gives the same picks as processing it in one go.
+    """
+
+    def __init__(self, threshold=0.3, smooth_samples=5, smooth_pings=5, min_sample=0,
+                 noise_samples=32, refine_samples=16, median_pings=5):
+        self.threshold = threshold
+        self.smooth_samples = smooth_samples
+        self.smooth_pings = smooth_pings
+        self.min_sample = min_sample
+        self.noise_samples = noise_samples
+        self.refine_samples = refine_samples
+        self.median_pings = median_pings
+
+        self._prev_rows = None
+        self._prev_picks = np.empty(0, dtype=np.float64)
+
+    def reset(self):
+        """Forget the previous block (start of a new line or channel)."""
+        self._prev_rows = None
+        self._prev_picks = np.empty(0, dtype=np.float64)
+
+    def process(self, samples):
+        """
+        Pick the bottom on a block of pings.
+
+        Args:
+            samples: (pings x samples) amplitudes; NaN is treated as zero.
+
+        Returns:
+            int32 array of per-ping bottom sample indices, -1 where nothing was picked.
+        """
+        amp = np.abs(np.asarray(samples, dtype=np.float32))
+        amp[np.isnan(amp)] = 0
+        n_pings, n_samples = amp.shape
+
+        if n_pings == 0:
+            return np.empty(0, dtype=np.int32)
+
+        amp = _movingAverage(amp, self.smooth_samples, axis=1)
+
+        # Prepend the tail of the previous block so the across-ping window is continuous
+        n_carry = 0
+        if self._prev_rows is not None and self._prev_rows.shape[1] == n_samples:
+            n_carry = len(self._prev_rows)
+            amp = np.concatenate([self._prev_rows, amp])
+
+        if self.smooth_pings > 1:
+            self._prev_rows = amp[-(self.smooth_pings - 1):]
+        smoothed = _movingAverage(amp, self.smooth_pings, axis=0)[n_carry:]
+
+        window = smoothed[:, self.min_sample:]
+        noise = window[:, :self.noise_samples].mean(axis=1)
+        peak = window.max(axis=1)
+        level = noise + self.threshold * (peak - noise)
+
+        above = window > level[:, None]
+        found = above.any(axis=1) & (peak > noise)
+        first = above.argmax(axis=1)
+
+        # Refine to the steepest rising edge just before the threshold crossing
+        offsets = np.arange(-self.refine_samples, 1)
+        cols = np.clip(first[:, None] + offsets, 0, window.shape[1] - 1)
+        grad = np.take_along_axis(window, cols, axis=1) - np.take_along_axis(window, np.maximum(cols - 1, 0), axis=1)
+        edge = grad.argmax(axis=1)
+        picks = (cols[np.arange(n_pings), edge] + self.min_sample).astype(np.float64)
+        picks[~found] = np.nan
+
+        picks = self._despike(picks)
+
+        return np.where(np.isfinite(picks), picks, -1).astype(np.int32)
+
+    def _despike(self, picks):
+        if self.median_pings <= 1:
+            return picks
+
+        history = np.concatenate([self._prev_picks, picks])
+        self._prev_picks = history[-(self.median_pings - 1):]
+
+        pad = self.median_pings - 1 - (len(history) - len(picks))
+        if pad > 0:
+            history = np.concatenate([np.full(pad, np.nan), history])
+
+        windows = np.lib.stride_tricks.sliding_window_view(history, self.median_pings)
+        with warnings.catch_warnings():
+            # All-NaN windows (runs of pings without a pick) are expected
+            warnings.simplefilter("ignore", RuntimeWarning)
+            despiked = np.nanmedian(windows, axis=1)
+
+        # Keep "no pick" pings as they are rather than filling them from neighbours
+        return np.where(np.isfinite(picks), np.round(despiked), np.nan)
+
+
+def bottomToAltitude(bottom_idx, sample_interval, starting_depth=0, sound_speed=SOUND_SPEED):
+    """Convert bottom sample indices to altitude in metres (NaN where no pick)."""
+    bottom_idx = np.asarray(bottom_idx)
+    slant = (bottom_idx + np.asarray(starting_depth, dtype=np.float64)) * np.asarray(sample_interval) * (sound_speed / 2.0)
+
+    return np.where(bottom_idx >= 0, slant, np.nan)
+
+
+def sidescanAltitude(make_tracker=bottomTracker, sound_speed=SOUND_SPEED):
+    """
+    Altitude source for ``sidescanMosaic.addJsfFile`` based on bottom picks.
+
+    Blocks interleave port and starboard pings, so each ``channel_num`` gets its
+    own tracker (from ``make_tracker``) and sees only its own pings. Falls back
+    to the header altitude for pings without a pick.
+    """
+    trackers = dict()
+
+    def altitude(headers, samples):
+        picks = np.full(len(headers), -1, dtype=np.int32)
+        for channel in np.unique(headers["channel_num"]):
+            sel = np.flatnonzero(headers["channel_num"] == channel)
+            if channel not in trackers:
+                trackers[channel] = make_tracker()
+            picks[sel] = trackers[channel].process(samples[sel])
+
+        picked = bottomToAltitude(picks, headers["sample_interval"] * 1e-9, headers["starting_depth"], sound_speed)
+        return np.where(np.isfinite(picked), picked, headers["altitude"] / 1000.0)
+
+    return altitude
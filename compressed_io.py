@@ -0,0 +1,261 @@
+import io
+import os
+import gzip
+import bisect
+import struct
+import zipfile
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZIP_MAGIC = b"PK\x03\x04"
+
+# Seekable zstd format (zstd/contrib/seekable_format): the seek table is stored in a
+# skippable frame at the end of the file and closed by a 9-byte footer.
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A5E
+ZSTD_SEEKABLE_MAGIC = 0x8F92EAB1
+ZSTD_SEEK_FOOTER = struct.Struct('<LBL')     # number of frames, descriptor, seekable magic
+ZSTD_SEEK_ENTRY = struct.Struct('<LL')       # compressed size, decompressed size
+
+ZIP_SEPARATOR = "::"
+COMPRESSED_SUFFIXES = (".gz", ".zst", ".zstd", ".zip")
+
+
+def splitArchivePath(path):
+    """Split an ``archive.zip::member`` path into (archive, member)."""
+    if ZIP_SEPARATOR in path:
+        archive, member = path.split(ZIP_SEPARATOR, 1)
+        return archive, member
+    return path, None
+
+
+def innerName(path):
+    """Name of the data in ``path``: the zip member, or the path without a compression suffix."""
+    path, member = splitArchivePath(path)
+    if member is not None:
+        return member
+
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.lower().endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def detectCompression(path):
+    """Return 'gzip', 'zstd', 'zip' or None based on the file's magic bytes."""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic == ZSTD_MAGIC:
+        return "zstd"
+    if magic == ZIP_MAGIC:
+        return "zip"
+
+    return None
+
+
+def readSeekTable(fileobj):
+    """
+    Read the seek table of a seekable zstd file.
+
+    Returns a list of (compressed_size, decompressed_size) tuples, or None if the
+    file has no seek table (i.e. it is a plain zstd stream).
+    """
+    fileobj.seek(0, os.SEEK_END)
+    file_size = fileobj.tell()
+
+    if file_size < ZSTD_SEEK_FOOTER.size:
+        return None
+
+    fileobj.seek(file_size - ZSTD_SEEK_FOOTER.size)
+    n_frames, descriptor, magic = ZSTD_SEEK_FOOTER.unpack(fileobj.read(ZSTD_SEEK_FOOTER.size))
+
+    if magic != ZSTD_SEEKABLE_MAGIC:
+        return None
+
+    entry_size = ZSTD_SEEK_ENTRY.size + (4 if descriptor & 0x80 else 0)
+    table_size = n_frames * entry_size
+
+    fileobj.seek(file_size - ZSTD_SEEK_FOOTER.size - table_size)
+    table = fileobj.read(table_size)
+
+    return [ZSTD_SEEK_ENTRY.unpack_from(table, n * entry_size) for n in range(n_frames)]
+
+
+class zstdSeekableFile(io.RawIOBase):
+    """
+    Random-access reader for seekable zstd files.
+
+    Only the frame containing the requested position is decompressed, and the most
+    recently used frame is kept so sequential reads stay cheap.
+    """
+
+    def __init__(self, path, seek_table=None):
+        if zstandard is None:
+            raise ImportError("zstandard is required to read .zst files")
+
+        self._file = open(path, 'rb')
+        self._table = seek_table if seek_table is not None else readSeekTable(self._file)
+
+        if self._table is None:
+            self._file.close()
+            raise ValueError(f"{path} has no zstd seek table")
+
+        # Cumulative compressed/decompressed offsets of each frame
+        self._c_offsets = [0]
+        self._d_offsets = [0]
+        for c_size, d_size in self._table:
+            self._c_offsets.append(self._c_offsets[-1] + c_size)
+            self._d_offsets.append(self._d_offsets[-1] + d_size)
+
+        self._dctx = zstandard.ZstdDecompressor()
+        self._pos = 0
+        self._frame_idx = None
+        self._frame_data = b""
+
+    @property
+    def size(self):
+        return self._d_offsets[-1]
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            pos = offset
+        elif whence == os.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == os.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if pos < 0:
+            raise ValueError("Negative seek position")
+
+        self._pos = pos
+        return self._pos
+
+    def _loadFrame(self, idx):
+        if idx != self._frame_idx:
+            c_size, d_size = self._table[idx]
+            self._file.seek(self._c_offsets[idx])
+            self._frame_data = self._dctx.decompress(self._file.read(c_size), max_output_size=d_size)
+            self._frame_idx = idx
+
+        return self._frame_data
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast('B')
+        written = 0
+
+        while written < len(view) and self._pos < self.size:
+            idx = bisect.bisect_right(self._d_offsets, self._pos) - 1
+            frame = self._loadFrame(idx)
+
+            start = self._pos - self._d_offsets[idx]
+            n = min(len(view) - written, len(frame) - start)
+            view[written:written + n] = frame[start:start + n]
+
+            written += n
+            self._pos += n
+
+        return written
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def writeSeekableZstd(src_path, dst_path, frame_size=4 * 1024 * 1024, level=3):
+    """
+    Compress a file into the seekable zstd format.
+
+    Each ``frame_size`` block of input becomes an independent frame, so readers only
+    ever need to decompress one frame to reach any offset.
+    """
+    if zstandard is None:
+        raise ImportError("zstandard is required to write .zst files")
+
+    cctx = zstandard.ZstdCompressor(level=level)
+    table = []
+
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        while True:
+            block = src.read(frame_size)
+            if not block:
+                break
+
+            frame = cctx.compress(block)
+            dst.write(frame)
+            table.append((len(frame), len(block)))
+
+        entries = b"".join(ZSTD_SEEK_ENTRY.pack(c, d) for c, d in table)
+        footer = ZSTD_SEEK_FOOTER.pack(len(table), 0, ZSTD_SEEKABLE_MAGIC)
+        payload = entries + footer
+
+        dst.write(struct.pack('<LL', ZSTD_SKIPPABLE_MAGIC, len(payload)))
+        dst.write(payload)
+
+    return len(table)
+
+
+def openCompressed(path, buffer_size=1024 * 1024):
+    """
+    Open a possibly compressed file as a binary read stream.
+
+    Plain files, gzip, zstd (seekable or streaming) and zip archives are supported.
+    Zip members are addressed as ``archive.zip::member``; an archive holding a
+    single file may be opened without naming the member.
+    """
+    path, member = splitArchivePath(path)
+    kind = detectCompression(path)
+
+    if kind is None:
+        return open(path, 'rb', buffering=buffer_size)
+
+    if kind == "gzip":
+        return io.BufferedReader(gzip.GzipFile(path, 'rb'), buffer_size=buffer_size)
+
+    if kind == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard is required to read .zst files")
+
+        with open(path, 'rb') as f:
+            table = readSeekTable(f)
+
+        if table is not None:
+            return io.BufferedReader(zstdSeekableFile(path, seek_table=table), buffer_size=buffer_size)
+
+        # Plain zstd streams can only be read (and seeked) forward
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_size=buffer_size,
+                                                          closefd=True)
+
+    zip_ref = zipfile.ZipFile(path, 'r')
+    if member is None:
+        members = [name for name in zip_ref.namelist() if not name.endswith('/')]
+        if len(members) != 1:
+            zip_ref.close()
+            raise ValueError(f"{path} holds {len(members)} files; use '{path}{ZIP_SEPARATOR}<member>'")
+        member = members[0]
+
+    stream = zip_ref.open(member, 'r')
+    # The member keeps its own reference to the archive file, which is released when
+    # the member stream itself is closed.
+    zip_ref.close()
+
+    return stream
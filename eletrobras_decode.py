@@ -5,6 +5,9 @@ import numpy as np
 import pyxtf
 from dataclasses import dataclass
 
+from record_splitter import recordFile
+from sonar_readers import open_sonar
+
 
 def decode_8bit(b):
     """Decode a single byte in 8-bit encoding."""
@@ -52,50 +55,84 @@ def decode_32bit(b1, b2, b3, b4):
 
     return word, decode_str
 
+WORD_WIDTHS = (1, 2, 4)
+BYTE_ORDERS = ("<", ">")
+
+
+def word_view(raw, width, signed=True, byteorder="<", offset=0):
+    """
+    Zero-copy view of a buffer as ``width``-byte integers starting at ``offset``.
+
+    Trailing bytes that don't fill a whole word are left out. With the defaults the
+    values match decode_16bit/decode_32bit (signed, little-endian).
+    """
+    kind = "i" if signed else "u"
+    dtype = np.dtype(f"{byteorder}{kind}{width}")
+    count = max((len(raw) - offset) // width, 0)
+
+    return np.frombuffer(raw, dtype=dtype, count=count, offset=offset)
+
+
+def decode_words(raw, widths=WORD_WIDTHS):
+    """
+    Every integer interpretation of a buffer, as NumPy views over the same memory.
+
+    Returns a dict keyed by (width, signed, byteorder, offset) covering each width in
+    ``widths``, signed and unsigned, both byte orders and every alignment offset
+    (0 .. width - 1). No bytes are copied.
+    """
+    views = dict()
+
+    for width in widths:
+        for signed in (True, False):
+            for byteorder in (BYTE_ORDERS if width > 1 else ("<",)):
+                for offset in range(width):
+                    views[(width, signed, byteorder, offset)] = word_view(raw, width, signed, byteorder, offset)
+
+    return views
+
+
+def ascii_mask(raw):
+    """True where a byte is 7-bit ASCII (0-127), the bytes decode_8bit maps to a character."""
+    return np.frombuffer(raw, dtype=np.uint8) < 128
+
+
+def printable_mask(raw):
+    """True where a byte is printable ASCII (space to '~', plus tab, LF and CR)."""
+    arr = np.frombuffer(raw, dtype=np.uint8)
+    return ((arr >= 32) & (arr < 127)) | (arr == 9) | (arr == 10) | (arr == 13)
+
+
+def ascii_text(raw):
+    """The buffer as text with non-ASCII bytes replaced by '?', as decode_8bit does."""
+    arr = np.frombuffer(raw, dtype=np.uint8)
+    return np.where(arr < 128, arr, ord("?")).astype(np.uint8).tobytes().decode("ascii")
+
+
 def read_file(fname):
-    with open(fname, 'rb') as f:
-        raw = f.read()
+    """
+    Memory-map a raw HFC/LFC/SRP file and split it on its first 8 bytes.
+
+    Returns the 8/16/32-bit word views over the whole file and a recordFile whose
+    items are zero-copy memoryviews of each segment (``bytes(seg).decode(...)`` for
+    text), so multi-GB captures are never read into memory.
+    """
+    records = recordFile(fname, delim_len=8)
+    raw = records.data
 
     # 1. Identify file type
-    delim = raw[:8]
+    delim = records.delim
 
     print(delim.decode(errors='ignore'))
 
-    b8_bytes = []
-    b8_words = ""
-    b16_bytes = []
-    b16_words = ""
-    b32_bytes = []
-    b32_words = ""
-
-    for n, byte_val in enumerate(raw):
-        # Process 8-bit
-        word_8, char_8 = decode_8bit(byte_val)
-        b8_bytes.append((word_8, char_8))
-        b8_words += char_8
-
-        # Process 16-bit (every 2 bytes)
-        if n % 2 == 1 and n > 0:  # Process on odd indices (we have a pair)
-            word_16, chars_16 = decode_16bit(raw[n-1], raw[n])
-            b16_bytes.append((word_16, chars_16))
-            b16_words += chars_16
-
-        # Process 32-bit (every 4 bytes)
-        if n % 4 == 3 and n >= 3:  # Process on indices 3, 7, 11, etc.
-            word_32, chars_32 = decode_32bit(raw[n-3], raw[n-2], raw[n-1], raw[n])
-            b32_bytes.append((word_32, chars_32))
-            b32_words += chars_32
-
-    segments = raw.split(delim)
-
-    decoded_segs = [seg.decode(encoding="UTF-8", errors='ignore') for seg in segments]
-
-    if len(segments) > 3:
-        payload = segments[3]
-    else:
-        payload = b''
+    # Same word values as decode_8bit/16bit/32bit, as views over ``raw``; use
+    # decode_words() for the other signedness, byte order and alignment variants and
+    # ascii_text()/printable_mask() for the character views.
+    b8_words = word_view(raw, 1, signed=False)
+    b16_words = word_view(raw, 2)
+    b32_words = word_view(raw, 4)
 
-    return b8_bytes, b16_bytes, b32_bytes, decoded_segs
+    return b8_words, b16_words, b32_words, records
 
 def read_xtf(fname):
 
@@ -105,27 +142,9 @@ def read_xtf(fname):
 
 def read_jsf(fname):
     # file:///C:/Users/scott/Downloads/Edgetech_jsf_rev1.13.pdf
+    """Lazy JSF reader (index, iteration, columnar pings/nav), see sonar_readers.open_sonar."""
 
-    with open(fname, 'rb') as f:
-        raw = f.read()
-
-    decoded = raw.decode(encoding="UTF-8",  errors='ignore')
-
-    header = {"marker": decode_16bit(raw[1], raw[0])[1],
-              "version": decoded[2],
-              "session_id": decoded[3],
-              "message_type": decode_16bit(raw[5], raw[4])[1],
-              "subsystem_number": decoded[7],
-              "channel_number": decoded[8],
-              "sequence_number": decoded[9],
-              "reserved1": decoded[10:12],
-              "size_of_message": decode_32bit(raw[15], raw[14], raw[13], raw[12])[0]
-              }
-
-    message = decoded[16:16+header["size_of_message"]]
-
-
-    return raw
+    return open_sonar(fname)
 
 
 if __name__ == "__main__":
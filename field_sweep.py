@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+import sys
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from record_splitter import recordFile
+
+
+FIELD_TYPES = {"int16": "i2", "int32": "i4", "float32": "f4", "float64": "f8"}
+BYTE_ORDERS = {"little": "<", "big": ">"}
+
+BATCH_BYTES = 32 * 1024 * 1024
+PARALLEL_BYTES = 64 * 1024 * 1024
+
+# Floats outside this magnitude range are treated as garbage bytes, not data
+FLOAT_MAX = 1e12
+FLOAT_MIN = 1e-30
+
+# Share of the score from monotonicity; kept small so counters rank first without
+# capping smooth non-monotonic fields (depth, attitude) below spurious straddles
+MONOTONIC_WEIGHT = 0.1
+
+
+def field_views(records, dtype):
+    """
+    Every offset of a (records x length) uint8 matrix read as ``dtype`` at once.
+
+    Returns a (records x offsets) strided view over the same memory where column
+    ``o`` is the value at byte offset ``o`` of each record. Nothing is copied.
+    """
+    records = np.ascontiguousarray(records)
+    n_records, length = records.shape
+    n_offsets = length - dtype.itemsize + 1
+
+    if n_offsets <= 0 or n_records == 0:
+        return np.empty((n_records, 0), dtype=dtype)
+
+    return np.ndarray(shape=(n_records, n_offsets), dtype=dtype, buffer=records,
+                      strides=(length, 1))
+
+
+def _record_batches(source, batch_bytes=BATCH_BYTES):
+    """Yield uint8 record matrices from an in-memory matrix or a (path, starts, length) tuple."""
+    if isinstance(source, np.ndarray):
+        batch = max(batch_bytes // max(source.shape[1], 1), 1)
+        for n in range(0, len(source), batch):
+            yield source[n:n + batch]
+        return
+
+    path, starts, length = source
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    cols = np.arange(length)
+    batch = max(batch_bytes // length, 1)
+
+    for n in range(0, len(starts), batch):
+        yield np.asarray(data)[starts[n:n + batch, None] + cols]
+
+
+def score_type(source, type_name, order_name, batch_bytes=BATCH_BYTES):
+    """
+    Score every offset of the records as one (type, byte order) candidate.
+
+    Statistics are accumulated batch by batch (carrying the last record across
+    batches), so memory stays bounded on large files.
+    """
+    dtype = np.dtype(BYTE_ORDERS[order_name] + FIELD_TYPES[type_name])
+    is_float = dtype.kind == "f"
+
+    stats = None
+    prev = None
+
+    for records in _record_batches(source, batch_bytes):
+        with np.errstate(invalid='ignore', over='ignore'):
+            values = field_views(records, dtype).astype(np.float64)
+
+        if is_float:
+            with np.errstate(invalid='ignore'):
+                mag = np.abs(values)
+                plausible = np.isfinite(values) & (mag < FLOAT_MAX) & ((mag == 0) | (mag > FLOAT_MIN))
+            values = np.where(plausible, values, np.nan)
+
+        if stats is None:
+            n_offsets = values.shape[1]
+            stats = {"n": 0, "valid": np.zeros(n_offsets), "min": np.full(n_offsets, np.inf),
+                     "max": np.full(n_offsets, -np.inf), "abs_diff": np.zeros(n_offsets),
+                     "n_diff": np.zeros(n_offsets), "up": np.zeros(n_offsets),
+                     "down": np.zeros(n_offsets), "same": np.zeros(n_offsets)}
+
+        if prev is not None:
+            values = np.vstack([prev, values])
+            stats["n"] -= 1
+            stats["valid"] -= np.isfinite(prev[0])
+        prev = values[-1:]
+
+        finite = np.isfinite(values)
+        stats["n"] += len(values)
+        stats["valid"] += finite.sum(axis=0)
+
+        with np.errstate(invalid='ignore'):
+            stats["min"] = np.fmin(stats["min"], np.nanmin(np.where(finite, values, np.inf), axis=0))
+            stats["max"] = np.fmax(stats["max"], np.nanmax(np.where(finite, values, -np.inf), axis=0))
+
+            diff = np.diff(values, axis=0)
+            diff_ok = np.isfinite(diff)
+            stats["abs_diff"] += np.where(diff_ok, np.abs(diff), 0).sum(axis=0)
+            stats["n_diff"] += diff_ok.sum(axis=0)
+            stats["up"] += (diff > 0).sum(axis=0)
+            stats["down"] += (diff < 0).sum(axis=0)
+            stats["same"] += (diff == 0).sum(axis=0)
+
+    if stats is None:
+        return pd.DataFrame()
+
+    n_offsets = len(stats["valid"])
+    valid = stats["valid"] / max(stats["n"], 1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        value_range = stats["max"] - stats["min"]
+        mean_abs_diff = stats["abs_diff"] / np.maximum(stats["n_diff"], 1)
+
+        constant = ~(value_range > 0)
+        smoothness = np.where(constant, 0.0, 1.0 - np.clip(mean_abs_diff / value_range, 0, 1))
+        monotonicity = np.abs(stats["up"] - stats["down"]) / np.maximum(stats["n_diff"], 1)
+        # High bytes of a neighbouring field look smooth but rarely change
+        activity = 1.0 - stats["same"] / np.maximum(stats["n_diff"], 1)
+
+        if is_float:
+            range_score = np.ones(n_offsets)
+        else:
+            # Values spread over the whole integer range look like noise
+            span = float(2 ** (8 * dtype.itemsize))
+            range_score = 1.0 - np.clip(value_range / span, 0, 1)
+
+    score = valid * ((1 - MONOTONIC_WEIGHT) * smoothness + MONOTONIC_WEIGHT * monotonicity) * np.sqrt(activity) \
+        * range_score * ~constant
+
+    return pd.DataFrame({"offset": np.arange(n_offsets), "dtype": type_name, "byteorder": order_name,
+                         "score": score, "smoothness": smoothness, "monotonicity": monotonicity,
+                         "activity": activity, "valid": valid, "min": stats["min"], "max": stats["max"],
+                         "mean_abs_diff": mean_abs_diff, "constant": constant})
+
+
+def sweep_fields(source, workers=None, parallel_bytes=PARALLEL_BYTES):
+    """
+    Try every (offset, dtype, byte order) over aligned records and rank them.
+
+    Args:
+        source: (records x length) uint8 matrix, or a (path, record_starts, length)
+            tuple to read the records from a file in bounded batches.
+        workers (int): Process pool size. Small inputs (under ``parallel_bytes``)
+            are scored in-process.
+
+    Returns:
+        DataFrame of candidates sorted by descending score.
+    """
+    if isinstance(source, np.ndarray):
+        n_bytes = source.size
+    else:
+        n_bytes = len(source[1]) * source[2]
+
+    tasks = [(type_name, order_name) for type_name in FIELD_TYPES for order_name in BYTE_ORDERS]
+
+    if workers == 1 or n_bytes < parallel_bytes:
+        frames = [score_type(source, t, o) for t, o in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(score_type, source, t, o) for t, o in tasks]
+            frames = [f.result() for f in futures]
+
+    table = pd.concat(frames, ignore_index=True)
+    return table.sort_values("score", ascending=False, ignore_index=True)
+
+
+def sweep_file(path, delim=None, record_length=None, workers=None):
+    """
+    Rank field candidates for a delimited capture.
+
+    Records are split with record_splitter; only records of ``record_length``
+    (default: the most common length) are aligned and scored.
+    """
+    records = recordFile(path, delim)
+    lengths = records.lengths()[1:]
+    starts = records.starts[1:]
+
+    if not len(lengths):
+        raise ValueError(f"No records in {path}: delimiter {records.delim!r} not found")
+
+    if record_length is None:
+        values, counts = np.unique(lengths, return_counts=True)
+        record_length = int(values[counts.argmax()])
+
+    starts = starts[lengths == record_length]
+    if not len(starts):
+        raise ValueError(f"No records of {record_length} bytes in {path}")
+
+    return sweep_fields((path, starts, record_length), workers=workers)
+
+
+if __name__ == "__main__":
+
+    print(sweep_file(sys.argv[1]).head(20).to_string())
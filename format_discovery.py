@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import numpy as np
+from dataclasses import dataclass, field
+
+from record_splitter import CHUNK_SIZE, find_pattern, find_pattern_chunked
+
+
+SAMPLE_SIZE = 4 * 1024 * 1024
+AUTOCORR_WINDOW = 256 * 1024
+HIST_BYTES = 64 * 1024 * 1024      # cap on the per-offset byte histogram of offset_statistics
+
+
+@dataclass
+class discoveryReport:
+    path: str
+    size: int
+    delimiters: list = field(default_factory=list)      # (pattern, count), best first
+    delimiter: bytes = b""
+    record_lengths: dict = field(default_factory=dict)  # length -> count for the best delimiter
+    record_length: int = 0
+    period: int = 0
+    autocorr_peaks: list = field(default_factory=list)  # (lag, score), best first
+    entropy: np.ndarray = None                           # bits per byte at each record offset
+    fields: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def format(self):
+        lines = [f"File: {self.path} ({self.size} bytes, analysed in {self.elapsed:.2f}s)", ""]
+
+        lines.append("Candidate delimiters:")
+        for pattern, count in self.delimiters:
+            lines.append(f"  {pattern.hex(' ')}  ({count} occurrences)  {pattern.decode('ascii', errors='replace')!r}")
+
+        if self.record_lengths:
+            lines.append("")
+            lines.append(f"Record lengths for {self.delimiter.hex(' ')}:")
+            total = sum(self.record_lengths.values())
+            for length, count in sorted(self.record_lengths.items(), key=lambda kv: -kv[1])[:10]:
+                lines.append(f"  {length:8d} bytes: {count} ({100 * count / total:.1f}%)")
+
+        lines.append("")
+        lines.append("Autocorrelation peaks (lag, score):")
+        for lag, score in self.autocorr_peaks:
+            lines.append(f"  {lag:8d}  {score:.3f}")
+
+        lines.append("")
+        lines.append(f"Record period used for alignment: {self.period} bytes")
+
+        if self.fields:
+            lines.append("")
+            lines.append("Field guesses (start-end, kind, mean entropy):")
+            for f in self.fields:
+                lines.append(f"  {f['start']:6d}-{f['end']:<6d} {f['kind']:<10s} {f['entropy']:.2f}")
+
+        return "\n".join(lines)
+
+
+def frequent_grams(sample, top=8, min_count=16):
+    """Most frequent 4-byte sequences (at any alignment) with at least two distinct bytes."""
+    if len(sample) < 8:
+        return []
+
+    grams = np.lib.stride_tricks.sliding_window_view(sample, 4)
+    words = grams[:, 0].astype(np.uint32) | (grams[:, 1].astype(np.uint32) << 8) | \
+        (grams[:, 2].astype(np.uint32) << 16) | (grams[:, 3].astype(np.uint32) << 24)
+
+    values, counts = np.unique(words, return_counts=True)
+    order = np.argsort(counts)[::-1]
+
+    result = []
+    for idx in order:
+        if counts[idx] < min_count or len(result) >= top:
+            break
+
+        gram = int(values[idx]).to_bytes(4, "little")
+        if len(set(gram)) < 2:
+            continue
+
+        result.append(gram)
+
+    return result
+
+
+def extend_pattern(sample, pattern, max_len=16, agreement=0.95):
+    """Grow ``pattern`` left and right while its occurrences agree on the neighbouring byte."""
+    hits = find_pattern(sample, pattern)
+    if len(hits) < 2:
+        return pattern
+
+    start, end = 0, len(pattern)
+
+    while end - start < max_len:
+        pos = hits + end
+        pos = pos[pos < len(sample)]
+        if not len(pos):
+            break
+        values, counts = np.unique(sample[pos], return_counts=True)
+        if counts.max() < agreement * len(hits):
+            break
+        end += 1
+
+    while end - start < max_len:
+        pos = hits + start - 1
+        pos = pos[pos >= 0]
+        if not len(pos):
+            break
+        values, counts = np.unique(sample[pos], return_counts=True)
+        if counts.max() < agreement * len(hits):
+            break
+        start -= 1
+
+    first = int(hits[hits + start >= 0][0])
+    return bytes(sample[first + start:first + end])
+
+
+def autocorrelation_peaks(data, max_lag=4096, window=AUTOCORR_WINDOW, n_samples=16, top=5, min_lag=2):
+    """
+    Byte-value autocorrelation via FFT, averaged over ``n_samples`` windows spread
+    through the file. Returns the ``top`` (lag, score) local maxima.
+    """
+    n = len(data)
+    if n < 2 * min_lag:
+        return []
+
+    max_lag = min(max_lag, n // 2)
+    window = min(max(window, 8 * max_lag), n)
+    starts = np.linspace(0, n - window, n_samples).astype(np.int64) if n > window else [0]
+
+    acc = np.zeros(max_lag + 1)
+    for start in starts:
+        x = np.asarray(data[start:start + window], dtype=np.float64)
+        x -= x.mean()
+        size = 1 << int(np.ceil(np.log2(2 * len(x))))
+        spectrum = np.fft.rfft(x, size)
+        corr = np.fft.irfft(spectrum * np.conj(spectrum), size)[:max_lag + 1]
+        if corr[0] > 0:
+            acc += corr / corr[0]
+
+    acc /= len(starts)
+
+    # Local maxima above min_lag
+    inner = acc[1:-1]
+    peaks = np.flatnonzero((inner > acc[:-2]) & (inner >= acc[2:])) + 1
+    peaks = peaks[peaks >= min_lag]
+    peaks = peaks[np.argsort(acc[peaks])[::-1][:top]]
+
+    return [(int(lag), float(acc[lag])) for lag in peaks]
+
+
+def byte_entropy(hist):
+    """Shannon entropy in bits of each row of a (positions x 256) histogram."""
+    total = hist.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.where(total > 0, hist / total, 0)
+        return -(np.where(p > 0, p * np.log2(p), 0)).sum(axis=1)
+
+
+def aligned_records(data, starts, length, batch_bytes=8 * 1024 * 1024):
+    """Yield (records x length) uint8 matrices for records beginning at ``starts``."""
+    starts = starts[starts + length <= len(data)]
+    cols = np.arange(length)
+    batch = max(batch_bytes // length, 1)
+
+    for n in range(0, len(starts), batch):
+        yield np.asarray(data)[starts[n:n + batch, None] + cols]
+
+
+def offset_statistics(data, starts, length, hist_bytes=HIST_BYTES):
+    """
+    Per-offset statistics of records of ``length`` bytes beginning at ``starts``:
+    entropy, fraction of records where the byte differs from the previous record,
+    fraction of printable ASCII and the constant value (or -1).
+
+    The (offsets x 256) histogram is built for at most ``hist_bytes`` worth of
+    offsets at a time, so long records take more passes rather than more memory.
+    """
+    starts = starts[starts + length <= len(data)]
+    n_records = len(starts)
+    width = max(min(hist_bytes // (256 * 8), length), 1)
+
+    entropy = np.zeros(length)
+    changes = np.zeros(length, dtype=np.int64)
+    printable = np.zeros(length, dtype=np.int64)
+    constant = np.full(length, -1, dtype=np.int64)
+
+    for first in range(0, length, width):
+        cols = slice(first, min(first + width, length))
+        n_cols = cols.stop - cols.start
+        hist = np.zeros((n_cols, 256), dtype=np.int64)
+        offsets = np.arange(n_cols) * 256
+        prev = None
+
+        for records in aligned_records(data, starts + first, n_cols):
+            hist += np.bincount((offsets + records).ravel(), minlength=n_cols * 256).reshape(n_cols, 256)
+            printable[cols] += ((records >= 32) & (records < 127)).sum(axis=0)
+
+            if prev is not None:
+                changes[cols] += records[0] != prev
+            changes[cols] += (records[1:] != records[:-1]).sum(axis=0)
+            prev = records[-1]
+
+        entropy[cols] = byte_entropy(hist)
+        constant[cols] = np.where((hist > 0).sum(axis=1) == 1, hist.argmax(axis=1), -1)
+
+    return entropy, changes / max(n_records - 1, 1), printable / max(n_records, 1), constant
+
+
+def guess_fields(entropy, change_rate, printable, constant, text_threshold=0.9):
+    """
+    Split record offsets into likely fields.
+
+    Each byte is classed as constant, text, or variable; a new field starts where
+    the class changes, and inside variable runs wherever the change rate jumps up
+    (the low byte of a little-endian number changes far more often than the high
+    bytes of the field before it).
+    """
+    kinds = np.where(constant >= 0, "constant",
+                     np.where(printable >= text_threshold, "text", "variable"))
+
+    fields = []
+    start = 0
+    for n in range(1, len(kinds) + 1):
+        boundary = n == len(kinds) or kinds[n] != kinds[n - 1]
+        if not boundary and kinds[n] == "variable":
+            boundary = change_rate[n] > 2 * change_rate[n - 1] + 0.05
+
+        if boundary:
+            fields.append({"start": start, "end": n - 1, "kind": str(kinds[start]),
+                           "entropy": float(entropy[start:n].mean())})
+            start = n
+
+    return fields
+
+
+def discover_format(path, n_delimiters=3, max_period=4096, chunk_size=CHUNK_SIZE, sample_size=SAMPLE_SIZE):
+    """
+    Analyse an unknown binary file in a few chunked passes.
+
+    The file is memory-mapped and never read whole. Delimiter candidates come from
+    frequent byte sequences in the first ``sample_size`` bytes (plus the first 8
+    bytes of the file, the usual HFC/LFC/SRP guess); each is then counted over the
+    whole file to build a record-length histogram. The record period comes from
+    the dominant record length or, failing that, the autocorrelation, and is used
+    to compute per-offset entropy and field boundary guesses.
+    """
+    t0 = time.perf_counter()
+    size = os.path.getsize(path)
+    report = discoveryReport(path=path, size=size)
+
+    if size == 0:
+        return report
+
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    sample = np.asarray(data[:sample_size])
+
+    candidates = [bytes(sample[:8])]
+    for gram in frequent_grams(sample):
+        pattern = extend_pattern(sample, gram)
+        if pattern not in candidates:
+            candidates.append(pattern)
+
+    # Rank by occurrences in the sample, then count the best ones over the whole file
+    candidates.sort(key=lambda p: len(find_pattern(sample, p)), reverse=True)
+
+    best = None
+    for pattern in candidates[:n_delimiters]:
+        hits = find_pattern_chunked(data, pattern, chunk_size)
+        report.delimiters.append((pattern, len(hits)))
+        if len(hits) > 1 and (best is None or len(hits) > len(best[1])):
+            best = (pattern, hits)
+
+    report.autocorr_peaks = autocorrelation_peaks(data, max_lag=max_period)
+
+    if best is not None:
+        report.delimiter, starts = best
+        lengths, counts = np.unique(np.diff(starts), return_counts=True)
+        report.record_lengths = {int(length): int(count) for length, count in zip(lengths, counts)}
+        report.record_length = int(lengths[counts.argmax()])
+        report.period = report.record_length
+
+        # Only records of the dominant length are aligned for the per-offset pass
+        starts = starts[:-1][np.diff(starts) == report.record_length]
+    elif report.autocorr_peaks:
+        report.period = report.autocorr_peaks[0][0]
+        starts = np.arange(0, size - report.period + 1, report.period)
+    else:
+        starts = np.empty(0, dtype=np.int64)
+
+    if report.period and len(starts):
+        entropy, change_rate, printable, constant = offset_statistics(data, starts, report.period)
+        report.entropy = entropy
+        report.fields = guess_fields(entropy, change_rate, printable, constant)
+
+    report.elapsed = time.perf_counter() - t0
+
+    return report
+
+
+if __name__ == "__main__":
+
+    for fname in sys.argv[1:]:
+        print(discover_format(fname).format())
+        print()
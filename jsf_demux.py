@@ -0,0 +1,152 @@
+import os
+import sys
+import argparse
+
+from collections import deque
+
+from compressed_io import openCompressed, splitArchivePath
+from jsf_reader import JSF_HEADER, JSF_START_MARKER, SIDESCAN_HEADER_DTYPE, SUBSYSTEM_NUMBER
+
+
+# Sonar data message type -> bytes of ping header between the message header and the samples
+SAMPLE_DATA_OFFSETS = {80: 240, 82: SIDESCAN_HEADER_DTYPE.itemsize}
+
+
+def _streamName(subsystem, channel, mode):
+    ext = "jsf" if mode == "jsf" else "raw"
+    return f"sub{subsystem:03d}_ch{channel:02d}.{ext}"
+
+
+def demuxJsf(file_path, out_dir, mode="jsf", copy_types=(), replay=64, chunk_size=8 * 1024 * 1024,
+             buffer_size=1024 * 1024):
+    """
+    Split a JSF file into one output file per (subsystem, channel) in a single pass.
+
+    Only the 16-byte message headers are parsed; payloads are copied as raw bytes
+    straight from the read buffer to buffered writers and never decoded.
+
+    Args:
+        file_path (str): JSF file, optionally compressed (see compressed_io).
+        out_dir (str): Directory for the split files.
+        mode (str): "jsf" keeps header + payload so outputs are valid JSF files,
+            "raw" writes only the sample data of the sonar data messages (80, 82),
+            dropping their ping headers and every other message type.
+        copy_types (iterable): Message types (e.g. 2002 NMEA, 2020 pitch/roll) copied
+            into every output stream so each split JSF keeps its navigation.
+            Only valid with mode="jsf".
+        replay (int): Number of the most recent shared messages replayed into a
+            stream when it opens, so memory stays bounded however long the file.
+        chunk_size (int): Size of the input read buffer.
+        buffer_size (int): Write buffer of each output file.
+
+    Returns:
+        dict: (subsystem, channel) -> {"path", "messages", "bytes"}
+    """
+    if mode not in ("jsf", "raw"):
+        raise ValueError(f"Unknown demux mode: {mode}")
+    if copy_types and mode == "raw":
+        raise ValueError("copy_types needs mode='jsf': raw streams hold sample data only")
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    base = os.path.basename(splitArchivePath(file_path)[1] or file_path)
+    stem = base.split('.')[0]
+    copy_types = set(copy_types)
+
+    writers = dict()
+    stats = dict()
+    # The latest shared messages seen before a stream's first message are replayed into it
+    shared = deque(maxlen=replay)
+
+    def route(key, msg, offset=0):
+        if key not in writers:
+            path = os.path.join(out_dir, f"{stem}_{_streamName(key[0], key[1], mode)}")
+            writers[key] = open(path, 'wb', buffering=buffer_size)
+            stats[key] = {"path": path, "messages": 0, "bytes": 0}
+            for shared_msg in shared:
+                write(key, shared_msg)
+
+        write(key, msg, offset)
+
+    def write(key, msg, offset=0):
+        payload = msg if mode == "jsf" else msg[16 + offset:]
+        writers[key].write(payload)
+        stats[key]["messages"] += 1
+        stats[key]["bytes"] += len(payload)
+
+    def consume(buffer):
+        """Route every complete message in ``buffer``; return the bytes consumed."""
+        view = memoryview(buffer)
+        pos = 0
+
+        while len(buffer) - pos >= 16:
+            marker, _, _, msg_type, _, subsystem, channel, _, _, msg_len = JSF_HEADER.unpack_from(buffer, pos)
+
+            if marker != JSF_START_MARKER:
+                raise ValueError(f"Invalid start marker at byte {pos} of current buffer: {marker:#x}")
+
+            end = pos + 16 + msg_len
+            if end > len(buffer):
+                break
+
+            if msg_type in copy_types:
+                msg = bytes(view[pos:end])
+                shared.append(msg)
+                for key in writers:
+                    write(key, msg)
+            elif mode == "jsf":
+                route((subsystem, channel), view[pos:end])
+            elif msg_type in SAMPLE_DATA_OFFSETS:
+                # Raw streams are sample data only; other messages sharing a subsystem are skipped
+                route((subsystem, channel), view[pos:end], SAMPLE_DATA_OFFSETS[msg_type])
+
+            pos = end
+
+        return pos
+
+    try:
+        with openCompressed(file_path, buffer_size=chunk_size) as f:
+            buffer = bytearray()
+
+            while True:
+                chunk = f.read(chunk_size)
+                if chunk:
+                    buffer += chunk
+                elif not buffer:
+                    break
+
+                pos = consume(buffer)
+                del buffer[:pos]
+
+                if not chunk:
+                    if buffer:
+                        print(f"Warning: {len(buffer)} trailing bytes in {file_path} ignored")
+                    break
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a JSF file into per-subsystem/channel files.")
+    parser.add_argument("jsf_file")
+    parser.add_argument("out_dir")
+    parser.add_argument("--mode", choices=("jsf", "raw"), default="jsf")
+    parser.add_argument("--copy-type", type=int, action="append", default=[],
+                        help="Message type to copy into every output (repeatable, jsf mode only)")
+    parser.add_argument("--replay", type=int, default=64,
+                        help="Recent copied messages replayed into a stream when it starts")
+    args = parser.parse_args()
+
+    stats = demuxJsf(args.jsf_file, args.out_dir, mode=args.mode, copy_types=args.copy_type, replay=args.replay)
+
+    for (subsystem, channel), info in sorted(stats.items()):
+        name = SUBSYSTEM_NUMBER.get(subsystem, f"Unknown: {subsystem}")
+        print(f"{name} ch{channel}: {info['messages']} messages, {info['bytes']} bytes -> {info['path']}")
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -1,7 +1,10 @@
 import sys
 import struct
+import numpy as np
 from dataclasses import dataclass
 
+from compressed_io import openCompressed
+
 
 SUBSYSTEM_NUMBER = {0: "Sub-bottom",
                      20: "Lower frequency side-scan",
@@ -9,6 +12,40 @@ SUBSYSTEM_NUMBER = {0: "Sub-bottom",
                      100: "Raw serial data",
                      101: "Parsed serial data"}
 
+JSF_START_MARKER = 0x1601
+JSF_HEADER = struct.Struct('<HBBHBBBBHL')
+
+# One row per message: where it starts in the (decompressed) stream and the
+# header fields needed to route or select it without decoding the payload.
+JSF_INDEX_DTYPE = np.dtype([("offset", "<u8"),
+                            ("msgType", "<u2"),
+                            ("subsystem", "u1"),
+                            ("channel", "u1"),
+                            ("msgLen", "<u4")])
+
+# Message type 82 header (80 bytes, offsets relative to the start of the payload),
+# used to pull whole blocks of pings into columnar arrays without decoding each one.
+SIDESCAN_HEADER_DTYPE = np.dtype({
+    "names": ["subsystem", "channel_num", "ping_num", "packet_num", "trigger_source",
+              "samples_in_packet", "sample_interval", "starting_depth", "weighting_factor",
+              "ADC_gain_factor", "max_ADC_value", "range_setting", "pulse_ID", "mark_num",
+              "data_format", "num_pulses", "cpu_ms_today", "cpu_year", "cpu_day", "cpu_hour",
+              "cpu_min", "cpu_sec", "compass_heading", "pitch_scale", "roll_scale", "heave",
+              "yaw", "pressure", "temperature", "water_temp", "altitude"],
+    "formats": ["<u2", "<u2", "<u4", "<u2", "<u2",
+                "<u4", "<u4", "<u4", "<i2",
+                "<i2", "<i2", "<i2", "<i2", "<i2",
+                "<i2", "u1", "<u4", "<i2", "<u2", "<u2",
+                "<u2", "<u2", "<u2", "<i2", "<i2", "<i2",
+                "<i2", "<i4", "<i2", "<i2", "<i4"],
+    "offsets": [0, 2, 4, 8, 10,
+                12, 16, 20, 24,
+                26, 28, 30, 32, 34,
+                36, 38, 40, 44, 46, 48,
+                50, 52, 54, 56, 58, 60,
+                62, 64, 68, 70, 72],
+    "itemsize": 80})
+
 @dataclass
 class jsfMessage:
     msgType: int
@@ -705,9 +742,19 @@ class jsfFile:
                      }
 
     def __init__(self, file_path, verbose=False):
+        """
+        Args:
+            file_path (str): Path to a .jsf file. gzip, zstd and zip containers are
+                read directly; use ``archive.zip::member.jsf`` for multi-file archives.
+        """
         self.file_path = file_path
+        self.message = []
+        self._stream = None
 
-        with open(self.file_path, 'rb') as f:
+        offsets = []
+
+        with openCompressed(self.file_path) as f:
+            offset = 0
             while True:
                 # Read the 16-byte header
                 header_bytes = f.read(16)
@@ -725,10 +772,154 @@ class jsfFile:
                 decoded_msg = self.DECODE_SWITCH.get(self.header.msgType,unknownMsg)(header_bytes + data)
                 if decoded_msg:
                     self.message.append(decoded_msg)
+                    offsets.append(offset)
+
+                offset += 16 + self.header.msgLen
+
+        self.offsets = np.array(offsets, dtype=np.uint64)
 
     def getMsgByType(self, msg_type):
         return [msg for msg in self.message if msg.msgType == msg_type]
 
+    def readMessageAt(self, offset):
+        """
+        Read and decode a single message starting at ``offset`` in the decompressed
+        stream. Seekable zstd files only decompress the frame holding the message.
+        """
+        if self._stream is None:
+            self._stream = openCompressed(self.file_path)
+
+        header_bytes, data = readJsfMessage(self._stream, offset)
+        msg_type = JSF_HEADER.unpack(header_bytes)[3]
+
+        return self.DECODE_SWITCH.get(msg_type, unknownMsg)(header_bytes + data)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+def readJsfMessage(stream, offset):
+    """Return the raw (header, payload) bytes of the message at ``offset``."""
+    stream.seek(offset)
+    header_bytes = stream.read(16)
+    if len(header_bytes) < 16:
+        raise EOFError(f"No JSF message at offset {offset}")
+
+    msg_len = JSF_HEADER.unpack(header_bytes)[9]
+    return header_bytes, stream.read(msg_len)
+
+
+def indexJsfStream(stream):
+    """
+    Build a message index by walking the 16-byte headers only.
+
+    Payloads are skipped with a relative seek, so no message is decoded. Returns a
+    structured array of ``JSF_INDEX_DTYPE``.
+    """
+    rows = []
+    offset = 0
+
+    while True:
+        header_bytes = stream.read(16)
+        if len(header_bytes) < 16:
+            break
+
+        marker, _, _, msg_type, _, subsystem, channel, _, _, msg_len = JSF_HEADER.unpack(header_bytes)
+        if marker != JSF_START_MARKER:
+            print(f"Invalid start marker at offset {offset}: {marker:#x}")
+            break
+
+        rows.append((offset, msg_type, subsystem, channel, msg_len))
+        stream.seek(msg_len, 1)
+        offset += 16 + msg_len
+
+    return np.array(rows, dtype=JSF_INDEX_DTYPE)
+
+
+def indexJsfFile(file_path):
+    """Index a (possibly compressed) JSF file, see ``indexJsfStream``."""
+    with openCompressed(file_path) as f:
+        return indexJsfStream(f)
+
+
+def readSidescanBlock(stream, rows):
+    """
+    Read a block of type 82 messages into columnar arrays.
+
+    Args:
+        stream: Binary stream of the JSF file (see compressed_io.openCompressed).
+        rows: Rows of a ``JSF_INDEX_DTYPE`` index, all of message type 82.
+
+    Returns:
+        (headers, samples): a ``SIDESCAN_HEADER_DTYPE`` array with one entry per ping
+        and a (pings x samples) float32 array of amplitudes scaled by 2^-weighting_factor.
+        Pings shorter than the longest in the block are padded with NaN.
+    """
+    payloads = [readJsfMessage(stream, int(offset))[1] for offset in rows["offset"]]
+
+    headers = np.frombuffer(b"".join(p[:80] for p in payloads), dtype=SIDESCAN_HEADER_DTYPE)
+    n_samples = headers["samples_in_packet"].astype(np.int64)
+    max_samples = int(n_samples.max()) if len(n_samples) else 0
+
+    samples = np.full((len(payloads), max_samples), np.nan, dtype=np.float32)
+
+    for fmt in np.unique(headers["data_format"]):
+        sel = np.flatnonzero(headers["data_format"] == fmt)
+        # Format 0 is one uint16 envelope sample, format 1 is an int16 real/imag pair
+        width = 2 if fmt == 1 else 1
+
+        if (n_samples[sel] == n_samples[sel[0]]).all():
+            n = int(n_samples[sel[0]])
+            raw = b"".join(payloads[i][80:80 + 2 * width * n] for i in sel)
+            words = np.frombuffer(raw, dtype="<u2" if width == 1 else "<i2").reshape(len(sel), n * width)
+            samples[sel, :n] = _sampleAmplitude(words, width)
+        else:
+            for i in sel:
+                n = int(n_samples[i])
+                words = np.frombuffer(payloads[i], dtype="<u2" if width == 1 else "<i2",
+                                      count=n * width, offset=80)
+                samples[i, :n] = _sampleAmplitude(words[None, :], width)[0]
+
+    samples *= np.exp2(-headers["weighting_factor"].astype(np.float32))[:, None]
+
+    return headers, samples
+
+
+def _sampleAmplitude(words, width):
+    if width == 1:
+        return words.astype(np.float32)
+
+    return np.hypot(words[:, 0::2].astype(np.float32), words[:, 1::2].astype(np.float32))
+
+
+def iterSidescanBlocks(file_path, subsystem, channel=None, block_size=1024, index=None):
+    """
+    Yield (headers, samples) blocks of type 82 pings for one subsystem (and channel).
+
+    See ``readSidescanBlock`` for the block layout.
+    """
+    if index is None:
+        index = indexJsfFile(file_path)
+
+    sel = (index["msgType"] == 82) & (index["subsystem"] == subsystem)
+    if channel is not None:
+        sel &= index["channel"] == channel
+    rows = index[sel]
+
+    with openCompressed(file_path) as f:
+        for start in range(0, len(rows), block_size):
+            yield readSidescanBlock(f, rows[start:start + block_size])
+
+
+def sidescanPingTimes(headers):
+    """Ping times from the CPU clock fields of type 82 headers, in seconds since 1 Jan 1970."""
+    years = (headers["cpu_year"].astype(np.int64) - 1970).astype("datetime64[Y]")
+    days = years.astype("datetime64[D]") + (headers["cpu_day"].astype(np.int64) - 1)
+
+    return days.astype(np.int64) * 86400.0 + headers["cpu_ms_today"] / 1000.0
+
 # def read_jsf_file(file_path):
 #     """
 #     Reads and decodes a JSF file.
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+import os
+import sys
+import numpy as np
+
+
+CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def iter_chunks(data, chunk_size=CHUNK_SIZE, overlap=0):
+    """
+    Yield (offset, chunk) uint8 arrays over ``data`` with ``overlap`` bytes repeated
+    at the start of each chunk, so patterns spanning a boundary are not lost.
+    """
+    n = len(data)
+    start = 0
+    while start < n:
+        lo = max(start - overlap, 0)
+        yield lo, data[lo:start + chunk_size]
+        start += chunk_size
+
+
+def find_pattern(arr, pattern):
+    """Offsets of every occurrence (overlapping included) of ``pattern`` in a uint8 array."""
+    k = len(pattern)
+    if k == 0 or len(arr) < k:
+        return np.empty(0, dtype=np.int64)
+
+    pattern = np.frombuffer(pattern, dtype=np.uint8)
+    hits = np.flatnonzero(arr[:len(arr) - k + 1] == pattern[0])
+
+    for j in range(1, k):
+        hits = hits[arr[hits + j] == pattern[j]]
+
+    return hits
+
+
+def find_pattern_chunked(data, pattern, chunk_size=CHUNK_SIZE):
+    """``find_pattern`` over a memory-mapped file, one chunk at a time."""
+    k = len(pattern)
+    found = []
+    last = -1
+
+    for offset, chunk in iter_chunks(data, chunk_size, overlap=k - 1):
+        hits = find_pattern(chunk, pattern) + offset
+        hits = hits[hits > last]
+        if len(hits):
+            last = hits[-1]
+        found.append(hits)
+
+    return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def drop_overlaps(hits, k):
+    """Keep the non-overlapping matches bytes.split() would use (first match wins)."""
+    if len(hits) < 2 or (np.diff(hits) >= k).all():
+        return hits
+
+    # Only self-overlapping delimiters (e.g. runs of 0x00) get here
+    kept = [hits[0]]
+    for hit in hits[1:].tolist():
+        if hit >= kept[-1] + k:
+            kept.append(hit)
+
+    return np.array(kept, dtype=np.int64)
+
+
+def _open_map(path):
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+
+class recordFile:
+    """
+    Delimiter-separated records of a memory-mapped file.
+
+    Records follow ``bytes.split`` semantics (record 0 is whatever precedes the first
+    delimiter) but are returned as zero-copy memoryviews, and only the delimiter
+    offsets are held in memory, so files of any size use constant memory beyond
+    the offset array.
+    """
+
+    def __init__(self, path, delim=None, delim_len=8, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            path (str): File to split.
+            delim (bytes): Record delimiter. Defaults to the first ``delim_len``
+                bytes of the file, as read_file does.
+            chunk_size (int): Bytes searched per chunk.
+        """
+        self.path = path
+        self.data = _open_map(path)
+        self._view = memoryview(self.data)
+        self.delim = bytes(self.data[:delim_len]) if delim is None else delim
+
+        hits = find_pattern_chunked(self.data, self.delim, chunk_size) if self.delim else np.empty(0, np.int64)
+        self.offsets = drop_overlaps(hits, len(self.delim))
+
+        # Record n spans [starts[n], ends[n])
+        self.starts = np.concatenate([[0], self.offsets + len(self.delim)]).astype(np.int64)
+        self.ends = np.concatenate([self.offsets, [len(self.data)]]).astype(np.int64)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, n):
+        return self._view[self.starts[n]:self.ends[n]]
+
+    def __iter__(self):
+        for start, end in zip(self.starts.tolist(), self.ends.tolist()):
+            yield self._view[start:end]
+
+    def lengths(self):
+        return self.ends - self.starts
+
+    def close(self):
+        """Unmap the file; records still referenced keep the mapping alive until they are dropped."""
+        if self._view is not None:
+            self._view.release()
+        self.data = self._view = None
+
+
+def delimiter_offsets(path, delim, chunk_size=CHUNK_SIZE):
+    """Offsets of every (non-overlapping) delimiter in a file, for random access."""
+    data = _open_map(path)
+    return drop_overlaps(find_pattern_chunked(data, delim, chunk_size), len(delim))
+
+
+def iter_records(path, delim=None, chunk_size=CHUNK_SIZE):
+    """Yield the records of a file as zero-copy memoryviews, see ``recordFile``."""
+    yield from recordFile(path, delim, chunk_size=chunk_size)
+
+
+if __name__ == "__main__":
+
+    records = recordFile(sys.argv[1])
+    lengths = records.lengths()
+    print(f"{len(records)} records split on {records.delim!r}, "
+          f"lengths {lengths.min()}-{lengths.max()} bytes")
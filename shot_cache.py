@@ -0,0 +1,172 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  Parquet engine for pandas
+except ImportError:  # frames are pickled instead
+    pyarrow = None
+
+
+CACHE_VERSION = 5
+DEFAULT_CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".shot_checker_cache")
+CRC_CHUNK_SIZE = 1024 * 1024
+
+
+def fileFingerprint(path):
+    """Cache key of a plain file: [size, mtime_ns]."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def zipMemberFingerprint(zip_info):
+    """Cache key of a zip member from the central directory, no decompression: [CRC32, size]."""
+    return [zip_info.CRC, zip_info.file_size]
+
+
+def contentCrc32(path, chunk_size=CRC_CHUNK_SIZE):
+    """CRC32 of a file's contents, read in chunks; comparable with a zip member's stored CRC."""
+    crc = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            crc = zlib.crc32(chunk, crc)
+
+    return crc
+
+
+class shotCache:
+    """
+    Persistent cache of parsed shot files for one project.
+
+    Each parsed frame is stored as Parquet (pickle without pyarrow) next to a
+    JSON manifest mapping the shot file entry (path, or ``zip::member``) to its
+    fingerprint and data file. Zip listings are cached too, keyed on the archive's
+    size and mtime, so unchanged archives are not reopened by findShotFiles, and so
+    are the content CRC32s of plain files, so duplicates are not re-hashed.
+    """
+
+    def __init__(self, project_path, cache_dir=None):
+        if cache_dir is None:
+            project_id = hashlib.sha1(os.path.abspath(project_path).encode()).hexdigest()[:16]
+            cache_dir = os.path.join(DEFAULT_CACHE_ROOT, project_id)
+
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.manifest = self._loadManifest()
+        self.hits = 0
+        self.misses = 0
+
+    def _loadManifest(self):
+        empty = {"version": CACHE_VERSION, "files": {}, "zips": {}, "crcs": {}}
+
+        if not os.path.exists(self.manifest_path):
+            return empty
+
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable cache manifest {self.manifest_path}: {e}")
+            return empty
+
+        return manifest if manifest.get("version") == CACHE_VERSION else empty
+
+    def get(self, sf, key):
+        """Cached frame of ``sf`` if its fingerprint still matches ``key``, else None."""
+        entry = self.manifest["files"].get(sf)
+
+        if entry is None or entry["key"] != list(key):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        data_path = os.path.join(self.cache_dir, entry["data"])
+        try:
+            df = pd.read_parquet(data_path) if data_path.endswith(".parquet") else pd.read_pickle(data_path)
+        except Exception as e:
+            print(f"Warning: Could not load cached frame for {sf}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        return df
+
+    def put(self, sf, key, df):
+        name = hashlib.sha1(sf.encode()).hexdigest()
+        data = None
+
+        if pyarrow is not None:
+            try:
+                df.to_parquet(os.path.join(self.cache_dir, name + ".parquet"), index=False)
+                data = name + ".parquet"
+            except Exception:
+                # Mixed-type object columns Arrow cannot type; pickle those
+                data = None
+
+        if data is None:
+            df.to_pickle(os.path.join(self.cache_dir, name + ".pkl"))
+            data = name + ".pkl"
+
+        with self._lock:
+            self.manifest["files"][sf] = {"key": list(key), "data": data}
+
+    def zipMembers(self, zip_path, key):
+        """Cached {member: [size, CRC32]} of an archive if its fingerprint still matches ``key``, else None."""
+        entry = self.manifest["zips"].get(zip_path)
+        if entry is None or entry["key"] != list(key):
+            return None
+        return entry["members"]
+
+    def putZipMembers(self, zip_path, key, members):
+        with self._lock:
+            self.manifest["zips"][zip_path] = {"key": list(key), "members": dict(members)}
+
+    def contentCrc(self, path, key):
+        """Cached CRC32 of a plain file if its fingerprint still matches ``key``, else None."""
+        entry = self.manifest["crcs"].get(path)
+        if entry is None or entry["key"] != list(key):
+            return None
+        return entry["crc"]
+
+    def putContentCrc(self, path, key, crc):
+        with self._lock:
+            self.manifest["crcs"][path] = {"key": list(key), "crc": crc}
+
+    def pruneContentCrcs(self, keep):
+        """Drop the CRC32s of files no longer in ``keep``."""
+        keep = set(keep)
+
+        with self._lock:
+            self.manifest["crcs"] = {path: entry for path, entry in self.manifest["crcs"].items() if path in keep}
+
+    def prune(self, keep):
+        """Drop entries (and data files) for shot files no longer in ``keep``."""
+        keep = set(keep)
+
+        with self._lock:
+            stale = [sf for sf in self.manifest["files"] if sf not in keep]
+            for sf in stale:
+                entry = self.manifest["files"].pop(sf)
+                try:
+                    os.remove(os.path.join(self.cache_dir, entry["data"]))
+                except OSError:
+                    pass
+
+        return stale
+
+    def save(self):
+        tmp_path = self.manifest_path + ".tmp"
+
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f)
+            os.replace(tmp_path, self.manifest_path)
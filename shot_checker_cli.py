@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from WS_shot_checker import projectData
+from shot_report import jsonDefault, issuesTable
+from shot_metrics import formatMetrics
+
+
+def runProject(root, out_dir, output="json", export=False, compression=None, sheet_format="csv",
+               use_cache=True, workers=None, rules=None, out_of_core=False):
+    """
+    Find, compile, validate and optionally export one project, writing the results
+    to ``out_dir``. With ``out_of_core`` the master is a partitioned dataset in
+    ``out_dir/dataset`` rather than memory. Runs in a worker process; returns a summary dict.
+    """
+    summary = {"project": root, "out_dir": out_dir, "status": "ok", "timings": {}}
+    timings = summary["timings"]
+    project = None
+    os.makedirs(out_dir, exist_ok=True)
+
+    try:
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Project folder not found: {root}")
+
+        project = projectData(root, use_cache=use_cache)
+
+        t0 = time.perf_counter()
+        project.findShotFiles(workers=workers)
+        timings["find"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        if out_of_core:
+            project.compileDataset(os.path.join(out_dir, "dataset"), workers=workers)
+            n_rows = len(project.dataset)
+        else:
+            project.compileMaster(workers=workers)
+            n_rows = len(project.master)
+        timings["compile"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        if not n_rows:
+            results = dict()
+        elif out_of_core:
+            results = project.runDatasetValidation(rules, workers=workers)
+        else:
+            results = project.runValidation(rules)
+        timings["validate"] = time.perf_counter() - t0
+
+        if export and n_rows:
+            t0 = time.perf_counter()
+            export_sheets = project.exportDatasetSheets if out_of_core else project.exportReorgSheets
+            export_sheets(os.path.join(out_dir, "sheets"), compression=compression,
+                          file_format=sheet_format, workers=workers)
+            timings["export"] = time.perf_counter() - t0
+
+        summary.update({"files": len(project.files), "duplicates": len(project.duplicateFiles),
+                        "rows": n_rows,
+                        "issues": {name: len(issues) for name, issues in results.items()}})
+
+        name = os.path.basename(os.path.normpath(root))
+        if output == "parquet":
+            issuesTable(name, results).to_parquet(os.path.join(out_dir, "issues.parquet"), index=False)
+        else:
+            with open(os.path.join(out_dir, "issues.json"), 'w') as f:
+                json.dump(results, f, default=jsonDefault, indent=1)
+
+    except Exception as e:
+        summary["status"] = "error"
+        summary["error"] = f"{type(e).__name__}: {e}"
+        summary["traceback"] = traceback.format_exc()
+
+    summary["timings"]["total"] = sum(timings.values())
+    # Per-phase breakdown: wall time, throughput and peak memory, see shot_metrics
+    summary["metrics"] = project.metrics.toDict() if project is not None else dict()
+
+    with open(os.path.join(out_dir, "summary.json"), 'w') as f:
+        json.dump(summary, f, default=jsonDefault, indent=1)
+
+    return summary
+
+
+def _outDirs(roots, out_root):
+    """One output directory per project, named after the project folder (numbered on clashes)."""
+    dirs, used = [], set()
+    for root in roots:
+        base = os.path.basename(os.path.normpath(root)) or "project"
+        name, n = base, 1
+        while name in used:
+            n += 1
+            name = f"{base}_{n}"
+        used.add(name)
+        dirs.append(os.path.join(out_root, name))
+
+    return dirs
+
+
+def runProjects(roots, out_root, jobs=None, show_metrics=False, **kwargs):
+    """
+    Run ``runProject`` for every root across a process pool; returns the summaries
+    in order. ``show_metrics`` prints each project's per-phase metrics.
+    """
+    out_dirs = _outDirs(roots, out_root)
+    summaries = [None] * len(roots)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(runProject, root, out_dir, **kwargs): n
+                   for n, (root, out_dir) in enumerate(zip(roots, out_dirs))}
+
+        for future in as_completed(futures):
+            n = futures[future]
+            summaries[n] = future.result()
+            s = summaries[n]
+            if s["status"] == "ok":
+                print(f"{roots[n]}: {s['files']} files, {s['rows']} rows, "
+                      f"{sum(s['issues'].values())} issues in {s['timings']['total']:.1f}s")
+            else:
+                print(f"{roots[n]}: FAILED {s['error']}")
+            if show_metrics and s["metrics"]:
+                print(formatMetrics(s["metrics"]))
+
+    os.makedirs(out_root, exist_ok=True)
+    with open(os.path.join(out_root, "summary.json"), 'w') as f:
+        json.dump(summaries, f, default=jsonDefault, indent=1)
+
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the shot checks over many project folders")
+    parser.add_argument("roots", nargs="+", help="Project root folders")
+    parser.add_argument("-o", "--out", required=True, help="Output folder (one subfolder per project)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Projects processed in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="I/O threads per project")
+    parser.add_argument("--output", choices=["json", "parquet"], default="json", help="Issue output format")
+    parser.add_argument("--rules", nargs="+", default=None, help="Only run these validation rules")
+    parser.add_argument("--export", action="store_true", help="Export the reorganized sheets")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], default=None)
+    parser.add_argument("--sheet-format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--no-cache", action="store_true", help="Parse every file, ignoring the cache")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Print per-phase wall time, throughput and peak memory of each project")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="Keep master as a partitioned Parquet dataset on disk instead of in memory")
+    args = parser.parse_args(argv)
+
+    summaries = runProjects(args.roots, args.out, jobs=args.jobs, show_metrics=args.metrics,
+                            output=args.output, export=args.export,
+                            compression=args.compression, sheet_format=args.sheet_format,
+                            use_cache=not args.no_cache, workers=args.workers, rules=args.rules,
+                            out_of_core=args.out_of_core)
+
+    return 0 if all(s["status"] == "ok" for s in summaries) else 1
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import os
+import json
+import hashlib
+import itertools
+import threading
+import urllib.parse
+import numpy as np
+import pandas as pd
+
+from shot_schema import applyCategoricals
+
+
+DATASET_VERSION = 2
+EMPTY_PARTITION = "_"
+ROW_COLUMN = "_ROW"
+
+
+def _partName(value):
+    value = "" if pd.isna(value) else str(value)
+    return urllib.parse.quote(value, safe="@.-_ ") if value else EMPTY_PARTITION
+
+
+def _partValue(name):
+    return "" if name == EMPTY_PARTITION else urllib.parse.unquote(name)
+
+
+class shotDataset:
+    """
+    Out-of-core shot master on disk.
+
+    Every shot file is split by (FILE_DATE, OPER) and written as one Parquet file
+    per partition under ``<root>/<FILE_DATE>/<OPER>/``. A JSON manifest maps each
+    shot file entry to its fingerprint and parts, so changed files replace their
+    parts and unchanged ones are never rewritten. Partitions are read one at a
+    time (or column-pruned), so nothing needs the whole master in memory.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.manifest = self._loadManifest()
+
+    def _loadManifest(self):
+        empty = {"version": DATASET_VERSION, "files": {}}
+
+        if not os.path.exists(self.manifest_path):
+            return empty
+
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable dataset manifest {self.manifest_path}: {e}")
+            return empty
+
+        return manifest if manifest.get("version") == DATASET_VERSION else empty
+
+    def __len__(self):
+        return sum(entry["rows"] for entry in self.manifest["files"].values())
+
+    def has(self, sf, key):
+        entry = self.manifest["files"].get(sf)
+        return entry is not None and entry["key"] == list(key)
+
+    def write(self, sf, key, df):
+        """Replace the parts of shot file ``sf`` with ``df`` split by FILE_DATE and OPER."""
+        self.remove(sf)
+
+        name = hashlib.sha1(sf.encode()).hexdigest()[:16] + ".parquet"
+        parts = []
+
+        # Row within the file, so a file split across operators reads back in recorded order
+        df = df.assign(**{ROW_COLUMN: np.arange(len(df), dtype=np.int64)})
+
+        for (date, oper), part in df.groupby(["FILE_DATE", "OPER"], sort=False, observed=True, dropna=False):
+            rel_dir = os.path.join(_partName(date), _partName(oper))
+            os.makedirs(os.path.join(self.root, rel_dir), exist_ok=True)
+            part.to_parquet(os.path.join(self.root, rel_dir, name), index=False)
+            parts.append(os.path.join(rel_dir, name))
+
+        with self._lock:
+            self.manifest["files"][sf] = {"key": list(key), "parts": parts, "rows": len(df)}
+
+    def remove(self, sf):
+        with self._lock:
+            entry = self.manifest["files"].pop(sf, None)
+
+        for part in (entry["parts"] if entry else []):
+            try:
+                os.remove(os.path.join(self.root, part))
+            except OSError:
+                pass
+
+    def prune(self, keep):
+        """Remove the parts of shot files no longer in ``keep``."""
+        keep = set(keep)
+        stale = [sf for sf in self.manifest["files"] if sf not in keep]
+        for sf in stale:
+            self.remove(sf)
+
+        return stale
+
+    def save(self):
+        tmp_path = self.manifest_path + ".tmp"
+
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+
+    def _parts(self, key):
+        """{key(FILE_DATE, OPER): [part paths]}, parts in shot file order."""
+        found = dict()
+
+        for sf in sorted(self.manifest["files"]):
+            for part in self.manifest["files"][sf]["parts"]:
+                date, oper = part.split(os.sep)[:2]
+                found.setdefault(key(_partValue(date), _partValue(oper)), []).append(part)
+
+        return found
+
+    def partitions(self):
+        """{(FILE_DATE, OPER): [part paths]}"""
+        return self._parts(lambda date, oper: (date, oper))
+
+    def byDate(self):
+        """{FILE_DATE: [part paths]}; every shot file lies within one FILE_DATE."""
+        return self._parts(lambda date, oper: date)
+
+    def byOperator(self):
+        """{OPER: [part paths]}"""
+        return self._parts(lambda date, oper: oper)
+
+    def readParts(self, parts, columns=None):
+        """
+        Concatenate ``parts`` (only ``columns`` if given). Parts of one shot file
+        must be adjacent, as the partition listings return them; its rows are put
+        back in recorded order.
+        """
+        read_columns = None if columns is None else list(columns) + [ROW_COLUMN]
+        frames = []
+
+        for name, group in itertools.groupby(parts, key=os.path.basename):
+            file_frames = [pd.read_parquet(os.path.join(self.root, part), columns=read_columns) for part in group]
+            df = file_frames[0] if len(file_frames) == 1 else \
+                pd.concat(file_frames, ignore_index=True).sort_values(ROW_COLUMN, kind="stable")
+            frames.append(df.drop(columns=[ROW_COLUMN]))
+
+        if not frames:
+            return pd.DataFrame(columns=columns)
+
+        return applyCategoricals(pd.concat(frames, ignore_index=True))
+
+    def allParts(self):
+        """Every part path, in shot file order."""
+        return self._parts(lambda date, oper: None).get(None, [])
+
+    def read(self, columns=None):
+        """The whole dataset in shot file order, best with ``columns`` pruned to what is needed."""
+        return self.readParts(self.allParts(), columns)
@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+import pandas as pd
+
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+try:
+    import psutil
+except ImportError:  # /proc/self/statm on Linux, no memory figures elsewhere
+    psutil = None
+
+
+MEMORY_SAMPLE_INTERVAL = 0.05   # s between RSS samples while a phase runs
+
+
+def currentRss():
+    """Resident memory of this process in bytes, or None where it cannot be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class phaseRecord:
+    name: str
+    wall: float = 0.0           # s; for concurrent sub-steps the summed time of all threads
+    calls: int = 0
+    files: int = 0
+    rows: int = 0
+    bytes: int = 0
+    start_rss: int = None
+    peak_rss: int = None
+    concurrent: bool = False    # recorded with add() from worker threads rather than timed by phase()
+
+    def rates(self):
+        per_s = (lambda n: n / self.wall if self.wall > 0 else None)
+        return {"files_per_s": per_s(self.files), "rows_per_s": per_s(self.rows),
+                "mb_per_s": per_s(self.bytes / 2**20)}
+
+
+class phaseMetrics:
+    """
+    Wall time, files / rows / bytes processed and peak memory of each phase of
+    the checker (find, compile, validate, export, ...).
+
+    Phases are timed with ``phase(name)``; sub-steps use dotted names
+    ("compile.concat"). Sub-steps that run on worker threads are summed with
+    ``add``, so their time is thread time and can exceed the parent's wall time.
+    Each phase keeps only its most recent run: starting it clears its sub-steps.
+    """
+
+    def __init__(self):
+        self.records = dict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a phase; yields its record so files / rows / bytes can be filled in."""
+        with self._lock:
+            for key in [key for key in self.records if key == name or key.startswith(name + ".")]:
+                del self.records[key]
+            record = self.records[name] = phaseRecord(name)
+
+        record.start_rss = record.peak_rss = currentRss()
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(MEMORY_SAMPLE_INTERVAL):
+                rss = currentRss()
+                if rss is not None:
+                    record.peak_rss = max(record.peak_rss or 0, rss)
+
+        sampler = threading.Thread(target=sample, daemon=True) if record.start_rss is not None else None
+        if sampler:
+            sampler.start()
+
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall += time.perf_counter() - t0
+            record.calls += 1
+            stop.set()
+            if sampler:
+                sampler.join()
+                rss = currentRss()
+                record.peak_rss = max(record.peak_rss or 0, rss or 0)
+
+    def add(self, name, seconds, files=0, rows=0, bytes=0, concurrent=True):
+        """Accumulate a sub-step, by default one measured on a worker thread."""
+        with self._lock:
+            record = self.records.setdefault(name, phaseRecord(name, concurrent=concurrent))
+            record.wall += seconds
+            record.calls += 1
+            record.files += files
+            record.rows += rows
+            record.bytes += bytes
+
+    @contextmanager
+    def timed(self, name, files=0, rows=0, bytes=0):
+        """
+        ``add`` the time of a block, e.g. one file's parse on a worker thread.
+        Yields a {"files", "rows", "bytes"} dict the block can update.
+        """
+        counts = {"files": files, "rows": rows, "bytes": bytes}
+        t0 = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            self.add(name, time.perf_counter() - t0, **counts)
+
+    def reset(self):
+        with self._lock:
+            self.records = dict()
+
+    def toDict(self):
+        """{phase: record fields and rates}, JSON ready."""
+        with self._lock:
+            return {name: dict(asdict(record), **record.rates()) for name, record in self.records.items()}
+
+    def table(self):
+        return metricsTable(self.toDict())
+
+    def summary(self, name=None):
+        """Readable lines for the log: every phase, or ``name`` and its sub-steps."""
+        metrics = self.toDict()
+        if name is not None:
+            metrics = {key: value for key, value in metrics.items() if key == name or key.startswith(name + ".")}
+
+        return formatMetrics(metrics)
+
+
+def metricsTable(metrics):
+    """DataFrame of ``phaseMetrics.toDict()`` output, one row per phase."""
+    table = pd.DataFrame.from_dict(metrics, orient="index")
+    if table.empty:
+        return table
+
+    peak, start = (pd.to_numeric(table[col], errors="coerce") for col in ("peak_rss", "start_rss"))
+    table["peak_rss_mb"] = peak / 2**20
+    table["rss_growth_mb"] = (peak - start) / 2**20
+    table.index.name = "phase"
+
+    return table[["wall", "calls", "files", "rows", "bytes", "files_per_s", "rows_per_s", "mb_per_s",
+                  "peak_rss_mb", "rss_growth_mb", "concurrent"]]
+
+
+def formatMetrics(metrics):
+    lines = []
+
+    for name, m in metrics.items():
+        indent = "  " * name.count(".")
+        parts = [f"{m['wall']:.2f}s" + (" (thread time)" if m["concurrent"] else "")]
+        if m["files"]:
+            parts.append(f"{m['files']} files" + (f" ({m['files_per_s']:.0f}/s)" if m["files_per_s"] else ""))
+        if m["rows"]:
+            parts.append(f"{m['rows']} rows" + (f" ({m['rows_per_s']:.0f}/s)" if m["rows_per_s"] else ""))
+        if m["bytes"]:
+            parts.append(f"{m['bytes'] / 2**20:.1f} MiB" + (f" ({m['mb_per_s']:.1f} MiB/s)" if m["mb_per_s"] else ""))
+        if m["peak_rss"] is not None and not m["concurrent"]:
+            parts.append(f"peak {m['peak_rss'] / 2**20:.0f} MiB (+{(m['peak_rss'] - m['start_rss']) / 2**20:.0f})")
+        lines.append(f"{indent}{name}: " + ", ".join(parts))
+
+    return "\n".join(lines)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from shot_validation import registerRule
+
+
+QUALITY_WINDOW = 25             # shots in the rolling windows
+MIN_SNR = 10.0                  # rolling median SNR below this is a poor signal
+MIN_NSAT = 5                    # rolling median satellite count below this is a poor GPS fix
+H380_DROP_RATIO = 0.5           # H380 below this fraction of the preceding rolling median is a drop
+RECEIVER_SNR_MARGIN = 6.0       # receivers this far below their day's median SNR are weak
+
+QUALITY_GROUPS = {"file": "SOURCE_FILE", "operator": "OPER", "day": "FILE_DATE"}
+
+
+def rollingQuality(master, by="SOURCE_FILE", window=QUALITY_WINDOW, columns=("SNR", "H380", "NSAT")):
+    """
+    Rolling medians of ``columns`` over the last ``window`` shots of each ``by``
+    group (in row order, i.e. recorded order within files), aligned with master.
+    With H380, H380_PRIOR is the median of the window before each shot.
+    """
+    keys = master[by]
+    rolled = dict()
+
+    for col in columns:
+        values = master[col].astype(np.float64)
+        rolling = values.groupby(keys, sort=False, observed=True).rolling(window, min_periods=1).median()
+        rolled[col] = rolling.reset_index(level=0, drop=True).reindex(master.index)
+
+    rolled = pd.DataFrame(rolled, index=master.index)
+    if "H380" in rolled:
+        rolled["H380_PRIOR"] = rolled["H380"].groupby(keys, sort=False, observed=True).shift()
+
+    return rolled
+
+
+def qualityStatistics(master, by="SOURCE_FILE", window=QUALITY_WINDOW):
+    """
+    SNR, H380 and NSAT statistics and threshold exceedances per ``by`` group
+    (SOURCE_FILE, OPER or FILE_DATE), from one grouped aggregation.
+    """
+    rolled = rollingQuality(master, by, window)
+    frame = pd.DataFrame({"key": master[by], "SNR": master["SNR"], "H380": master["H380"], "NSAT": master["NSAT"],
+                          "rolling_SNR": rolled["SNR"], "rolling_NSAT": rolled["NSAT"],
+                          "snr_low": master["SNR"] < MIN_SNR, "nsat_low": master["NSAT"] < MIN_NSAT,
+                          "h380_drop": master["H380"] < H380_DROP_RATIO * rolled["H380_PRIOR"]})
+
+    stats = frame.groupby("key", sort=False, observed=True).agg(
+        shots=("SNR", "size"),
+        snr_mean=("SNR", "mean"), snr_min=("SNR", "min"), snr_worst_rolling=("rolling_SNR", "min"),
+        h380_median=("H380", "median"), h380_min=("H380", "min"), h380_drops=("h380_drop", "sum"),
+        nsat_mean=("NSAT", "mean"), nsat_min=("NSAT", "min"), nsat_worst_rolling=("rolling_NSAT", "min"),
+        snr_low=("snr_low", "sum"), nsat_low=("nsat_low", "sum"))
+
+    stats["snr_low_fraction"] = stats["snr_low"] / stats["shots"]
+    stats["nsat_low_fraction"] = stats["nsat_low"] / stats["shots"]
+    stats.index.name = by
+
+    return stats
+
+
+def _fileIssues(master, flagged, rolled, worst_name):
+    """One issue per file with flagged shots: how many, the first one's COUNT and the lowest rolling value."""
+    per_file = pd.DataFrame({"flagged": flagged, "first_count": master["COUNT"].where(flagged),
+                             "worst": rolled}).groupby(master["SOURCE_FILE"], sort=False, observed=True).agg(
+        flagged=("flagged", "sum"), first_count=("first_count", "first"), worst=("worst", "min"))
+    per_file = per_file[per_file["flagged"] > 0]
+
+    return [{"file": file, "shots": int(row["flagged"]), "first_count": int(row["first_count"]),
+             worst_name: float(row["worst"])} for file, row in per_file.iterrows()]
+
+
+@registerRule("low_snr", by="SOURCE_FILE", category="quality", columns=["SOURCE_FILE", "COUNT", "SNR"])
+def lowSnr(master, groups):
+    """Files where the rolling median SNR falls below MIN_SNR."""
+    rolled = rollingQuality(master, columns=["SNR"])["SNR"]
+    return _fileIssues(master, rolled < MIN_SNR, rolled, "worst_rolling_snr")
+
+
+@registerRule("poor_gps", by="SOURCE_FILE", category="quality", columns=["SOURCE_FILE", "COUNT", "NSAT"])
+def poorGps(master, groups):
+    """Files where the rolling median satellite count falls below MIN_NSAT."""
+    rolled = rollingQuality(master, columns=["NSAT"])["NSAT"]
+    return _fileIssues(master, rolled < MIN_NSAT, rolled, "worst_rolling_nsat")
+
+
+@registerRule("signal_drops", by="SOURCE_FILE", category="quality", columns=["SOURCE_FILE", "COUNT", "H380"])
+def signalDrops(master, groups):
+    """Files with shots whose H380 falls below H380_DROP_RATIO of the rolling median before them."""
+    rolled = rollingQuality(master, columns=["H380"])
+    return _fileIssues(master, master["H380"] < H380_DROP_RATIO * rolled["H380_PRIOR"], rolled["H380"],
+                       "lowest_rolling_h380")
+
+
+@registerRule("weak_receivers", by="FILE_DATE", category="quality", columns=["FILE_DATE", "RIN", "SNR"])
+def weakReceivers(master, groups):
+    """Receivers (RIN) whose median SNR is RECEIVER_SNR_MARGIN below the median of their day."""
+    receivers = master.groupby(["FILE_DATE", "RIN"], sort=False, observed=True)["SNR"].agg(["median", "size"])
+    day = master.groupby("FILE_DATE", sort=False, observed=True)["SNR"].median()
+    receivers["day_median"] = day.reindex(receivers.index.get_level_values(0)).to_numpy()
+
+    flagged = receivers[receivers["median"] < receivers["day_median"] - RECEIVER_SNR_MARGIN]
+
+    return [{"file_date": date, "receiver": rin, "median_snr": float(row["median"]),
+             "day_median_snr": float(row["day_median"]), "shots": int(row["size"])}
+            for (date, rin), row in flagged.iterrows()]
@@ -0,0 +1,276 @@
+import re
+import json
+import datetime
+import numpy as np
+import pandas as pd
+
+try:
+    import xlsxwriter
+except ImportError:  # genReport needs it; everything else works without
+    xlsxwriter = None
+
+from shot_validation import VALIDATION_RULES, shortOperator
+
+
+EXCEL_MAX_ROWS = 1048576        # rows per worksheet, header included
+REPORT_CHUNK_ROWS = 50000       # master rows converted and written at a time
+SHEET_DROP_COLUMNS = ["SOURCE_FILE", "DATETIME", "FILE_DATE"]  # as reorganizeSheets
+# xlsxwriter keeps a temp file open per constant-memory worksheet until close(),
+# so more per-(FILE_DATE, OPER) sheets than this would run out of file handles
+MAX_OPERATOR_SHEETS = 200
+
+
+def jsonDefault(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (np.ndarray, pd.Categorical)):
+        return np.asarray(value).tolist()
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return str(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return str(value)
+
+
+def issuesTable(project_name, results):
+    """Flatten validation results to one row per issue; the issue itself is kept as JSON."""
+    rows = []
+    for name, issues in results.items():
+        category = VALIDATION_RULES[name].category if name in VALIDATION_RULES else ""
+        for issue in issues:
+            rows.append({"project": project_name, "rule": name, "category": category,
+                         "file": str(issue.get("file", "")),
+                         "issue": json.dumps(issue, default=jsonDefault)})
+
+    return pd.DataFrame(rows, columns=["project", "rule", "category", "file", "issue"])
+
+
+def _rows(df):
+    """Rows of ``df`` as tuples of plain Python values; NaN / NaT / NA become blank cells."""
+    columns = []
+    for col in df.columns:
+        values = df[col].astype(object)
+        columns.append(values.where(df[col].notna(), None).tolist())
+
+    return zip(*columns)
+
+
+def sheetName(name, used):
+    """A valid, unused worksheet name: no []:*?/\\ and at most 31 characters."""
+    name = re.sub(r'[\[\]:*?/\\]', "_", str(name))[:31] or "Sheet"
+    base, n = name, 1
+    while name.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        name = base[:31 - len(suffix)] + suffix
+    used.add(name.lower())
+
+    return name
+
+
+class sheetWriter:
+    """
+    Appends frames to a constant-memory worksheet in row order, continuing on
+    "<name> (2)", ... once Excel's row limit is reached.
+    """
+
+    def __init__(self, book, name, columns, used, header_format=None):
+        self.book = book
+        self.name = name
+        self.columns = list(columns)
+        self.used = used
+        self.header_format = header_format
+        self.sheets = []
+        self.row = EXCEL_MAX_ROWS
+
+    def _newSheet(self):
+        sheet = self.book.add_worksheet(sheetName(self.name, self.used))
+        sheet.write_row(0, 0, self.columns, self.header_format)
+        sheet.freeze_panes(1, 0)
+        self.sheets.append(sheet)
+        self.row = 1
+
+    def _cellWriters(self, df):
+        """Typed xlsxwriter method per column, skipping write()'s per-cell type dispatch."""
+        writers = []
+        for col in self.columns:
+            dtype = df[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                dtype = dtype.categories.dtype
+            if pd.api.types.is_bool_dtype(dtype):
+                writers.append("write_boolean")
+            elif pd.api.types.is_numeric_dtype(dtype):
+                writers.append("write_number")
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                writers.append("write_datetime")
+            elif isinstance(dtype, pd.StringDtype) or (isinstance(dtype, np.dtype) and dtype.kind == "U"):
+                # Not is_string_dtype: that is true for object columns, which can mix types
+                writers.append("write_string")
+            else:
+                writers.append("write")
+
+        return writers
+
+    def append(self, df):
+        # Dataset chunks are read a date at a time and need not have every column
+        df = df.reindex(columns=self.columns)
+        names = self._cellWriters(df)
+        sheet, writers = None, None
+
+        for values in _rows(df):
+            if sheet is None or self.row >= EXCEL_MAX_ROWS:
+                if self.row >= EXCEL_MAX_ROWS:
+                    self._newSheet()
+                sheet = self.sheets[-1]
+                writers = [getattr(sheet, name) for name in names]
+
+            row = self.row
+            for col, (write, value) in enumerate(zip(writers, values)):
+                if value is not None:
+                    write(row, col, value)
+            self.row += 1
+
+    def writeRow(self, values):
+        if not self.sheets or self.row >= EXCEL_MAX_ROWS:
+            self._newSheet()
+        self.sheets[-1].write_row(self.row, 0, values)
+        self.row += 1
+
+
+def _chunkAggregates(chunk):
+    """Per (SOURCE_FILE, FILE_DATE, OPER) partial aggregates of one chunk; they combine by sum/min/max."""
+    return chunk.groupby(["SOURCE_FILE", "FILE_DATE", "OPER"], sort=False, observed=True).agg(
+        rows=("COUNT", "size"), first_count=("COUNT", "min"), last_count=("COUNT", "max"),
+        start=("DATETIME", "min"), end=("DATETIME", "max"))
+
+
+AGGREGATE_COMBINE = {"rows": "sum", "first_count": "min", "last_count": "max", "start": "min", "end": "max"}
+
+
+def writeReport(path, chunks, results, project_name="", info=None, include_master=True, include_sheets=True,
+                total_rows=None, sheet_count=None, progress_callback=None):
+    """
+    Stream master to an Excel workbook with xlsxwriter in constant-memory mode.
+
+    ``chunks`` yields master in row order a slice at a time. Each chunk is written
+    to the Master sheet, split across the per-(FILE_DATE, OPER) sheets and reduced
+    to partial aggregates, so the data is read once and only one chunk is ever
+    converted. The Summary, Files and Issues sheets are written from the combined
+    aggregates and ``results`` at the end.
+
+    Every worksheet holds a file handle until the workbook is closed, so with more
+    than MAX_OPERATOR_SHEETS (FILE_DATE, OPER) pairs the per-operator sheets are left
+    out and the Summary's sheet table is the index of them.
+
+    Args:
+        info: extra {label: value} lines for the top of the Summary sheet.
+        total_rows: number of master rows, for progress.
+        sheet_count: number of (FILE_DATE, OPER) pairs, if known up front. Without
+            it, a report that reaches MAX_OPERATOR_SHEETS raises ValueError.
+    """
+    if xlsxwriter is None:
+        raise ImportError("genReport needs xlsxwriter (pip install xlsxwriter)")
+
+    info = dict(info or {})
+    if include_sheets and sheet_count is not None and sheet_count > MAX_OPERATOR_SHEETS:
+        print(f"Warning: {sheet_count} operator/date sheets is more than {MAX_OPERATOR_SHEETS}, "
+              f"writing only the sheet index")
+        include_sheets = False
+        info["Operator/date sheets"] = f"{sheet_count}, listed under Sheets (more than {MAX_OPERATOR_SHEETS})"
+
+    book = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss",
+                                      "nan_inf_to_errors": True})
+    bold = book.add_format({"bold": True})
+    used = set()
+
+    # Worksheets appear in creation order; the summaries are filled in last
+    summary = book.add_worksheet(sheetName("Summary", used))
+    files_sheet = book.add_worksheet(sheetName("Files", used))
+    issues = sheetWriter(book, "Issues", ["rule", "category", "file", "issue"], used, bold)
+    issues._newSheet()
+
+    master_sheet = None
+    op_sheets = dict()
+    partials = []
+    done = 0
+
+    for chunk in chunks:
+        if include_master:
+            if master_sheet is None:
+                master_sheet = sheetWriter(book, "Master", chunk.columns, used, bold)
+            master_sheet.append(chunk)
+
+        if include_sheets:
+            for (date, oper), part in chunk.groupby(["FILE_DATE", "OPER"], sort=False, observed=True):
+                if (date, oper) not in op_sheets:
+                    if len(op_sheets) >= MAX_OPERATOR_SHEETS:
+                        raise ValueError(f"More than {MAX_OPERATOR_SHEETS} operator/date sheets; pass sheet_count "
+                                         f"or include_sheets=False")
+                    columns = [c for c in part.columns if c not in SHEET_DROP_COLUMNS]
+                    op_sheets[(date, oper)] = sheetWriter(book, f"{shortOperator(oper)} {date}", columns, used, bold)
+                op_sheets[(date, oper)].append(part)
+
+        partials.append(_chunkAggregates(chunk))
+
+        done += len(chunk)
+        if progress_callback and total_rows:
+            progress_callback(int(done / total_rows * 90), f"Writing report rows {done}/{total_rows}")
+
+    per_file = pd.concat(partials).groupby(level=[0, 1, 2], sort=False).agg(AGGREGATE_COMBINE)
+    per_sheet = per_file.assign(files=1).groupby(level=[1, 2], sort=False).agg(dict(AGGREGATE_COMBINE, files="sum"))
+
+    # Files
+    files_table = per_file.reset_index()
+    files_table["OPER"] = files_table["OPER"].map(shortOperator)
+    files_sheet.write_row(0, 0, list(files_table.columns), bold)
+    files_sheet.freeze_panes(1, 0)
+    for n, values in enumerate(_rows(files_table), 1):
+        files_sheet.write_row(n, 0, values)
+
+    # Issues
+    for name, rule_issues in results.items():
+        category = VALIDATION_RULES[name].category if name in VALIDATION_RULES else ""
+        for issue in rule_issues:
+            issues.writeRow([name, category, str(issue.get("file", "")), json.dumps(issue, default=jsonDefault)])
+
+    # Summary
+    row = 0
+    summary.write(row, 0, "Shot data report", bold)
+    lines = {"Project": project_name, "Generated": datetime.datetime.now().replace(microsecond=0),
+             "Rows": int(per_file["rows"].sum()), "Shot files": len(per_file.index.unique(level=0))}
+    lines.update(info)
+    for label, value in lines.items():
+        row += 1
+        summary.write(row, 0, label, bold)
+        summary.write(row, 1, value)
+
+    row += 2
+    summary.write(row, 0, "Validation", bold)
+    row += 1
+    summary.write_row(row, 0, ["rule", "category", "issues", "description"], bold)
+    for name, rule_issues in results.items():
+        row += 1
+        rule = VALIDATION_RULES.get(name)
+        summary.write_row(row, 0, [name, rule.category if rule else "", len(rule_issues),
+                                   rule.description if rule else ""])
+
+    row += 2
+    summary.write(row, 0, "Sheets", bold)
+    row += 1
+    sheet_table = per_sheet.reset_index()
+    sheet_table["OPER"] = sheet_table["OPER"].map(shortOperator)
+    summary.write_row(row, 0, list(sheet_table.columns), bold)
+    for values in _rows(sheet_table):
+        row += 1
+        summary.write_row(row, 0, values)
+
+    summary.set_column(0, 0, 22)
+    summary.set_column(1, 1, 20)
+
+    if progress_callback:
+        progress_callback(95, "Closing workbook")
+    book.close()
+    if progress_callback:
+        progress_callback(100, f"Report written: {path}")
+
+    return path
@@ -0,0 +1,104 @@
+import os
+import time
+import zipfile
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+ZIP_SEPARATOR = "::"
+
+
+def _listDir(path):
+    """(subdirectories, file paths) of one directory, in a single scandir pass."""
+    dirs, files = list(), list()
+
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    # Like os.walk, symlinked directories are not followed
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError as e:
+        print(f"Warning: Could not scan directory {path}: {e}")
+
+    return dirs, files
+
+
+def _listZip(zip_path, list_zip):
+    try:
+        return list_zip(zip_path)
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"Warning: Could not read zip file {zip_path}: {e}")
+        return []
+
+
+def _zipNames(zip_path):
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return zip_ref.namelist()
+
+
+def scanTree(root, match_file, match_member, list_zip=_zipNames, workers=None, progress_callback=None, record=None):
+    """
+    Yield matching files under ``root`` as they are found.
+
+    Directories are listed with os.scandir on a thread pool, one task per
+    directory, and zip central directories are read on the same pool, so slow
+    network shares are scanned concurrently and in a single pass. Progress is
+    reported against the work discovered so far (directories and zips queued),
+    not a pre-count.
+
+    Args:
+        match_file: ``match_file(name)`` is true for plain files to yield.
+        match_member: ``match_member(name)`` is true for zip members to yield,
+            as ``zip_path::member``.
+        list_zip: Returns the member names of an archive.
+        record: ``record(seconds, n_entries)`` is called after each directory
+            listing, for instrumentation.
+    """
+    list_dir = _listDir
+    if record is not None:
+        def list_dir(path):
+            t0 = time.perf_counter()
+            dirs, files = _listDir(path)
+            record(time.perf_counter() - t0, len(dirs) + len(files))
+            return dirs, files
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(list_dir, root): ("dir", root)}
+        discovered = 1
+        done = 0
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                kind, path = pending.pop(future)
+                done += 1
+
+                if kind == "zip":
+                    for member in future.result():
+                        if match_member(member):
+                            yield f"{path}{ZIP_SEPARATOR}{member}"
+                else:
+                    dirs, files = future.result()
+
+                    for d in dirs:
+                        pending[pool.submit(list_dir, d)] = ("dir", d)
+                    discovered += len(dirs)
+
+                    for f in files:
+                        name = os.path.basename(f)
+                        if name.endswith('.zip'):
+                            pending[pool.submit(_listZip, f, list_zip)] = ("zip", f)
+                            discovered += 1
+                        elif match_file(name):
+                            yield f
+
+                if progress_callback:
+                    progress_callback(int(done / discovered * 100),
+                                      f"Scanned {done}/{discovered} (discovered so far): {os.path.basename(path)}")
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+
+# Explicit dtypes for the shot file columns in projectData.use_cols
+SHOT_DTYPES = {"COUNT": "int64",
+               "EASTING": "float64",
+               "NORTHING": "float64",
+               "OPER": str,
+               "DATE": str,
+               "TIME": str,
+               "RIN": "int32",
+               "CN": str,
+               "H380": "float32",
+               "SNR": "float32",
+               "NSAT": "int16",
+               "GDATE": str,
+               "GTIME": str}
+
+# Nullable integers parse much slower, so they are only used for files with blank integer cells
+NULLABLE_DTYPES = {"int64": "Int64", "int32": "Int32", "int16": "Int16"}
+
+# Few distinct values over millions of rows; converted once, after the concat,
+# so every file shares one set of categories
+CATEGORICAL_COLUMNS = ["SOURCE_FILE", "FILE_DATE", "OPER", "RIN", "CN", "DATE", "GDATE"]
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def readShotCsv(source, use_cols):
+    """
+    Read only ``use_cols`` of a shot CSV with explicit dtypes.
+
+    Files with blank integer cells or missing columns are re-read with nullable
+    integers. Files that still do not parse are read with inferred dtypes, then
+    every column whose values allow it is converted to its schema dtype, so one
+    bad column does not untype the whole file.
+    """
+    dtypes = {col: SHOT_DTYPES[col] for col in use_cols if col in SHOT_DTYPES}
+    nullable = {col: NULLABLE_DTYPES.get(dtype, dtype) for col, dtype in dtypes.items()}
+
+    for usecols, dtype in [(list(use_cols), dtypes), (lambda col: col in use_cols, nullable)]:
+        try:
+            return pd.read_csv(source, usecols=usecols, dtype=dtype)
+        except (ValueError, TypeError) as e:
+            error = e
+            if hasattr(source, "seek"):
+                source.seek(0)
+
+    print(f"Warning: {getattr(source, 'name', source)} does not match the shot schema ({error}), "
+          f"inferring dtypes")
+    df = pd.read_csv(source, usecols=lambda col: col in use_cols)
+
+    for col, dtype in nullable.items():
+        if col in df.columns:
+            try:
+                df[col] = df[col].astype(dtype)
+            except (ValueError, TypeError):
+                pass
+
+    return df
+
+
+def parseDatetime(date, time):
+    """DATE + TIME with the fixed field format, falling back to per-value inference."""
+    joined = date.astype(str) + ' ' + time.astype(str)
+
+    try:
+        return pd.to_datetime(joined, format=DATETIME_FORMAT)
+    except (ValueError, TypeError):
+        return pd.to_datetime(joined, format="mixed")
+
+
+def applyCategoricals(df, columns=CATEGORICAL_COLUMNS):
+    for col in columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def _untypedDtype(dtype):
+    """The dtype read_csv would infer without a schema."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if dtype.kind in "iu" or str(dtype).startswith(("Int", "UInt")):
+        return np.dtype("int64")
+    if dtype.kind == "f" or str(dtype).startswith("Float"):
+        return np.dtype("float64")
+    if dtype.kind == "M":
+        return dtype
+    # object before pandas 3, the default string dtype after
+    return str
+
+
+def memoryReport(df, sample_rows=100_000):
+    """
+    Per-column memory of ``df`` against the same data read without a schema.
+
+    The untyped size of large frames is estimated from an evenly spaced sample of
+    ``sample_rows`` rows, so the report stays cheap on multi-million-row masters.
+    """
+    step = max(len(df) // sample_rows, 1)
+    sample = df.iloc[::step]
+    scale = len(df) / max(len(sample), 1)
+
+    rows = []
+    for col in df.columns:
+        typed = int(df[col].memory_usage(deep=True, index=False))
+        untyped = int(sample[col].astype(_untypedDtype(df[col].dtype)).memory_usage(deep=True, index=False) * scale)
+        rows.append({"column": col, "dtype": str(df[col].dtype), "bytes": typed, "untyped_bytes": untyped})
+
+    report = pd.DataFrame(rows).set_index("column")
+    report.loc["TOTAL"] = ["", report["bytes"].sum(), report["untyped_bytes"].sum()]
+    report["saving"] = report["untyped_bytes"] / report["bytes"].clip(lower=1)
+
+    return report
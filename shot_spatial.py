@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from shot_validation import registerRule, shortOperator
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # grid hash fallback below
+    cKDTree = None
+
+
+DUPLICATE_RADIUS = 1.0          # m; shots closer than this are near-duplicates
+SPACING_RADIUS = 50.0           # m; nearest neighbours further than this are not spacing
+SPACING_CV_LIMIT = 0.5          # std / median of the spacing above which a file is irregular
+JUMP_FACTOR = 10.0              # steps this many times an operator's median step are jumps
+MIN_JUMP_DISTANCE = 25.0        # m; ...but only if at least this long
+
+
+def _coordinates(master):
+    """(row positions, n x 2 EASTING/NORTHING array) of the rows with finite coordinates."""
+    xy = np.column_stack([master["EASTING"].to_numpy(dtype=np.float64, na_value=np.nan),
+                          master["NORTHING"].to_numpy(dtype=np.float64, na_value=np.nan)])
+    rows = np.flatnonzero(np.isfinite(xy).all(axis=1))
+
+    return rows, xy[rows]
+
+
+def _gridPairs(xy, radius):
+    """
+    Index pairs (i < j) of points within ``radius``, from a grid hash with
+    ``radius`` cells: only the 3 x 3 neighbourhood of each cell is compared.
+    """
+    cells = np.floor(xy / radius).astype(np.int64)
+    points = pd.DataFrame({"cx": cells[:, 0], "cy": cells[:, 1], "i": np.arange(len(xy))})
+
+    found = []
+    # Half the neighbourhood; the other half is the same pairs reversed
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        shifted = points.assign(cx=points["cx"] - dx, cy=points["cy"] - dy).rename(columns={"i": "j"})
+        pairs = points.merge(shifted, on=["cx", "cy"])[["i", "j"]].to_numpy()
+        if dx == 0 and dy == 0:
+            pairs = pairs[pairs[:, 0] < pairs[:, 1]]
+        found.append(pairs)
+
+    pairs = np.sort(np.concatenate(found), axis=1)
+    dist = np.hypot(*(xy[pairs[:, 0]] - xy[pairs[:, 1]]).T)
+
+    return pairs[dist <= radius]
+
+
+def nearestNeighbours(xy, radius, count=False):
+    """
+    Nearest other point of each point within ``radius`` (KD-tree, or a grid hash
+    without scipy). Pairs are never materialised with the KD-tree, so dense
+    repeat coverage stays O(n) in memory.
+
+    Returns:
+        (distance, index) arrays, NaN / -1 where no point is within ``radius``,
+        plus the number of other points within ``radius`` when ``count`` is set.
+    """
+    n = len(xy)
+    distance, index = np.full(n, np.nan), np.full(n, -1, dtype=np.int64)
+    n_within = np.zeros(n, dtype=np.int64)
+
+    if n < 2:
+        return (distance, index, n_within) if count else (distance, index)
+
+    if cKDTree is not None:
+        tree = cKDTree(xy)
+        dist, idx = tree.query(xy, k=2, distance_upper_bound=radius)
+        # With exact repeats the twin can come back ahead of the point itself
+        self_first = idx[:, 0] == np.arange(n)
+        dist = np.where(self_first, dist[:, 1], dist[:, 0])
+        idx = np.where(self_first, idx[:, 1], idx[:, 0])
+        found = np.isfinite(dist)
+        distance[found], index[found] = dist[found], idx[found]
+        if count:
+            n_within = tree.query_ball_point(xy, radius, return_length=True) - 1
+    else:
+        pairs = _gridPairs(xy, radius)
+        both = np.concatenate([pairs, pairs[:, ::-1]])
+        dist = np.hypot(*(xy[both[:, 0]] - xy[both[:, 1]]).T)
+        # Nearest partner of each point: sort by (point, distance) and keep the first
+        order = np.lexsort((dist, both[:, 0]))
+        both, dist = both[order], dist[order]
+        first = np.concatenate([[True], both[1:, 0] != both[:-1, 0]]) if len(both) else np.empty(0, bool)
+        distance[both[first, 0]], index[both[first, 0]] = dist[first], both[first, 1]
+        n_within = np.bincount(both[:, 0], minlength=n)
+
+    return (distance, index, n_within) if count else (distance, index)
+
+
+def spacingStatistics(master, radius=SPACING_RADIUS):
+    """
+    Per-file statistics of the distance from each shot to its nearest neighbour
+    in the same file. One spatial index per file, so O(n log n) overall.
+    """
+    rows, xy = _coordinates(master)
+    files = master["SOURCE_FILE"].to_numpy()[rows]
+    codes, names = pd.factorize(files)
+
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+
+    nearest = np.full(len(rows), np.nan)
+    for idx in np.split(order, bounds):
+        if len(idx):
+            nearest[idx] = nearestNeighbours(xy[idx], radius)[0]
+
+    spacing = pd.Series(nearest).groupby(pd.Categorical.from_codes(codes, names), observed=True)
+    stats = spacing.agg(["count", "min", "median", "mean", "std", "max"])
+    stats["p05"] = spacing.quantile(0.05)
+    stats["p95"] = spacing.quantile(0.95)
+    stats["cv"] = stats["std"] / stats["median"]
+    stats.index.name = "SOURCE_FILE"
+
+    return stats
+
+
+@registerRule("near_duplicates", by=(), category="spatial",
+              columns=["SOURCE_FILE", "COUNT", "EASTING", "NORTHING"])
+def nearDuplicates(master, groups):
+    """Shots with another shot, in any file, within DUPLICATE_RADIUS."""
+    rows, xy = _coordinates(master)
+    distance, index, n_within = nearestNeighbours(xy, DUPLICATE_RADIUS, count=True)
+    flagged = np.flatnonzero(index >= 0)
+
+    files = master["SOURCE_FILE"].to_numpy()
+    counts = master["COUNT"].to_numpy()
+
+    return [{"file": files[rows[i]], "count": counts[rows[i]], "other_file": files[rows[j]],
+             "other_count": counts[rows[j]], "distance": float(d), "n_within": int(k)}
+            for i, j, d, k in zip(flagged.tolist(), index[flagged].tolist(), distance[flagged].tolist(),
+                                  n_within[flagged].tolist())]
+
+
+@registerRule("track_jumps", by="OPER", category="spatial",
+              columns=["SOURCE_FILE", "OPER", "COUNT", "DATETIME", "EASTING", "NORTHING"])
+def trackJumps(master, groups):
+    """Steps along each operator's time-ordered track far longer than that operator's usual step."""
+    rows, xy = _coordinates(master)
+    opers = master["OPER"].to_numpy()[rows]
+    codes, names = pd.factorize(opers)
+    times = master["DATETIME"].to_numpy()[rows]
+
+    # One sort for every operator's track at once
+    order = np.lexsort((times, codes))
+    codes, xy, rows = codes[order], xy[order], rows[order]
+
+    step = np.hypot(*np.diff(xy, axis=0).T)
+    same_track = codes[1:] == codes[:-1]
+    step = np.where(same_track, step, np.nan)
+
+    usual = pd.Series(step).groupby(codes[1:]).transform("median").to_numpy()
+    jumps = np.flatnonzero(same_track & (step > np.maximum(JUMP_FACTOR * usual, MIN_JUMP_DISTANCE)))
+
+    files = master["SOURCE_FILE"].to_numpy()
+    counts = master["COUNT"].to_numpy()
+    return [{"file": files[rows[n + 1]], "operator": shortOperator(names[codes[n + 1]]),
+             "count": counts[rows[n + 1]], "previous_count": counts[rows[n]],
+             "distance": float(step[n]), "usual_step": float(usual[n])} for n in jumps.tolist()]
+
+
+@registerRule("spacing", by="SOURCE_FILE", category="spatial")
+def irregularSpacing(master, groups):
+    """Files whose nearest-shot spacing varies by more than SPACING_CV_LIMIT of its median."""
+    stats = spacingStatistics(master)
+    flagged = stats[stats["cv"] > SPACING_CV_LIMIT]
+
+    return [{"file": file, "median_spacing": float(row["median"]), "p05": float(row["p05"]),
+             "p95": float(row["p95"]), "cv": float(row["cv"])} for file, row in flagged.iterrows()]
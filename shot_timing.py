@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from shot_validation import registerRule, shortOperator
+from shot_schema import parseDatetime
+
+
+DRIFT_LIMIT = 2.0               # s; median GPS - logger offset allowed per file and operator
+DRIFT_SPREAD_LIMIT = 1.0        # s; change of that offset allowed within a file
+
+
+def gpsDrift(master):
+    """GPS (GDATE/GTIME) minus logger (DATETIME) time of every shot, in seconds."""
+    gps = parseDatetime(master["GDATE"], master["GTIME"])
+    return (gps - master["DATETIME"]).dt.total_seconds()
+
+
+def _fileOrder(groups):
+    """
+    Codes, names and an order of the rows grouped by SOURCE_FILE, each file's
+    rows in recorded order, so every file can be diffed in one pass. Built from
+    the row positions the shared groupby caches, so the SOURCE_FILE rules share
+    one grouping pass instead of each sorting master.
+    """
+    indices = groups.indices
+    names = list(indices)
+    order = np.concatenate(list(indices.values())) if indices else np.empty(0, dtype=np.intp)
+    codes = np.repeat(np.arange(len(names)), [len(rows) for rows in indices.values()])
+    same_file = codes[1:] == codes[:-1]
+
+    return codes, names, order, same_file
+
+
+def _perFile(codes, mask, n_files, weights=None):
+    """Count (or sum ``weights``) of the flagged steps of each file."""
+    return np.bincount(codes[1:][mask], weights=None if weights is None else weights[mask], minlength=n_files)
+
+
+@registerRule("clock_drift", by=("SOURCE_FILE", "OPER"), category="timing")
+def clockDrift(master, groups):
+    """Files / operators whose GPS time is offset from, or drifts against, the logger clock."""
+    # Aggregate over the shared (SOURCE_FILE, OPER) grouping by its group numbers
+    keys = groups.size().index
+    drift = pd.Series(gpsDrift(master).to_numpy()).groupby(groups.ngroup().to_numpy(), sort=False)
+    stats = drift.agg(["median", "min", "max"])
+    stats["spread"] = stats["max"] - stats["min"]
+
+    flagged = stats[(stats["median"].abs() > DRIFT_LIMIT) | (stats["spread"] > DRIFT_SPREAD_LIMIT)]
+
+    return [{"file": keys[code][0], "operator": shortOperator(keys[code][1]), "median_drift": float(row["median"]),
+             "min_drift": float(row["min"]), "max_drift": float(row["max"]), "spread": float(row["spread"])}
+            for code, row in flagged.iterrows()]
+
+
+@registerRule("count_sequence", by="SOURCE_FILE", category="timing")
+def countSequence(master, groups):
+    """Gaps, duplicates and resets in each file's COUNT sequence."""
+    codes, names, order, same_file = _fileOrder(groups)
+    count = master["COUNT"].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+
+    step = np.diff(count)
+    gaps = same_file & (step > 1)
+    resets = same_file & (step < 0)
+
+    # Duplicates anywhere in the file, not only back to back; hashed rather than sorted
+    dup = pd.DataFrame({"file": codes, "count": count}).duplicated().to_numpy() & ~np.isnan(count)
+    duplicates = np.bincount(codes[dup], minlength=len(names))
+
+    n_gaps = _perFile(codes, gaps, len(names))
+    missing = _perFile(codes, gaps, len(names), step - 1)
+    n_resets = _perFile(codes, resets, len(names))
+
+    gap_at = pd.Series(count[1:][gaps]).groupby(codes[1:][gaps]).agg(list)
+    reset_at = pd.Series(count[1:][resets]).groupby(codes[1:][resets]).agg(list)
+
+    issues = []
+    for code in np.flatnonzero(n_gaps + duplicates + n_resets).tolist():
+        issues.append({"file": names[code], "gaps": int(n_gaps[code]), "missing_counts": int(missing[code]),
+                       "duplicates": int(duplicates[code]), "resets": int(n_resets[code]),
+                       "gap_ends": [int(c) for c in gap_at.get(code, [])],
+                       "reset_to": [int(c) for c in reset_at.get(code, [])]})
+
+    return issues
+
+
+@registerRule("timestamp_order", by="SOURCE_FILE", category="timing")
+def timestampOrder(master, groups):
+    """Shots logged earlier than the shot recorded before them in the same file."""
+    codes, names, order, same_file = _fileOrder(groups)
+    times = master["DATETIME"].to_numpy()[order]
+
+    backwards = same_file & (times[1:] < times[:-1])
+    n_back = _perFile(codes, backwards, len(names))
+
+    counts = master["COUNT"].to_numpy()[order]
+    first = pd.Series(counts[1:][backwards]).groupby(codes[1:][backwards]).first()
+
+    return [{"file": names[code], "out_of_order": int(n_back[code]), "first_count": first[code]}
+            for code in np.flatnonzero(n_back).tolist()]
@@ -0,0 +1,170 @@
+import time
+import numpy as np
+import pandas as pd
+
+from dataclasses import dataclass
+
+
+@dataclass
+class validationRule:
+    name: str
+    by: tuple           # group keys; rules sharing keys share one groupby
+    func: object        # func(master, groups) -> list of issue dicts
+    category: str = "consistency"
+    description: str = ""
+    columns: tuple = None  # columns the rule reads (None: all), for column-pruned dataset reads
+
+
+# name -> validationRule, run in registration order
+VALIDATION_RULES = dict()
+
+# Group column -> (issue field naming the group, transform from column value to field value)
+ISSUE_FIELDS = {"SOURCE_FILE": ("file", None),
+                "FILE_DATE": ("file_date", None),
+                "OPER": ("operator", lambda oper: shortOperator(oper))}
+
+
+def registerRule(name, by, category="consistency", columns=None):
+    """
+    Register ``func(master, groups)`` as a validation rule.
+
+    ``groups`` is ``master.groupby(by)`` (sort=False, so groups come in order of
+    appearance) and is built once for every rule with the same ``by``. Rules
+    should aggregate over it rather than loop over masks of ``master``. Rules
+    over the whole master use ``by=()`` and get ``groups=None``.
+    """
+    by = (by,) if isinstance(by, str) else tuple(by)
+
+    def register(func):
+        VALIDATION_RULES[name] = validationRule(name, by, func, category, (func.__doc__ or "").strip(),
+                                                None if columns is None else tuple(columns))
+        return func
+
+    return register
+
+
+def runRules(master, names=None, timings=None):
+    """
+    Run the registered rules (or just ``names``) over ``master``. Each rule's
+    time, including building its groupby when it is the first to use it, is
+    stored in the ``timings`` dict if given.
+
+    Returns:
+        dict of rule name -> list of issue dicts (empty when the rule passes).
+    """
+    rules = [VALIDATION_RULES[n] for n in (names if names is not None else VALIDATION_RULES)]
+    groupbys = dict()
+    results = dict()
+
+    for rule in rules:
+        t0 = time.perf_counter()
+        if not rule.by:
+            groupbys[rule.by] = None
+        elif rule.by not in groupbys:
+            keys = list(rule.by) if len(rule.by) > 1 else rule.by[0]
+            groupbys[rule.by] = master.groupby(keys, sort=False, observed=True, dropna=False)
+
+        results[rule.name] = rule.func(master, groupbys[rule.by])
+        if timings is not None:
+            timings[rule.name] = timings.get(rule.name, 0.0) + time.perf_counter() - t0
+
+    return results
+
+
+def _issueKey(rule, issue):
+    return tuple(issue[ISSUE_FIELDS[col][0]] for col in rule.by)
+
+
+def _touchedKeys(rule, rows):
+    """Group keys of ``rows`` under ``rule.by``, as they appear in the rule's issues."""
+    keys = rows[list(rule.by)].drop_duplicates()
+    columns = [keys[col].map(ISSUE_FIELDS[col][1]) if ISSUE_FIELDS[col][1] else keys[col] for col in rule.by]
+
+    return set(zip(*[col.tolist() for col in columns]))
+
+
+def updateRules(master, results, changed_rows, names=None):
+    """
+    Bring ``results`` up to date after rows were added to or removed from ``master``.
+
+    Only the groups touched by ``changed_rows`` (the new rows plus the removed
+    ones) are re-run; their previous issues are replaced and every other issue
+    is kept. Rules over the whole master (``by=()``) are re-run in full.
+
+    Returns:
+        dict of rule name -> updated list of issues.
+    """
+    updated = dict()
+
+    for name in (names if names is not None else VALIDATION_RULES):
+        rule = VALIDATION_RULES[name]
+
+        if not rule.by or name not in results:
+            updated[name] = runRules(master, [name])[name]
+            continue
+
+        cols = list(rule.by)
+        if len(cols) == 1:
+            in_touched = master[cols[0]].isin(changed_rows[cols[0]].unique())
+        else:
+            touched = pd.MultiIndex.from_frame(changed_rows[cols].drop_duplicates())
+            in_touched = pd.MultiIndex.from_frame(master[cols]).isin(touched)
+
+        subset = master[np.asarray(in_touched)]
+        groups = subset.groupby(cols if len(cols) > 1 else cols[0], sort=False, observed=True, dropna=False)
+
+        touched_keys = _touchedKeys(rule, changed_rows)
+        kept = [issue for issue in results[name] if _issueKey(rule, issue) not in touched_keys]
+        updated[name] = kept + rule.func(subset, groups)
+
+    return updated
+
+
+def shortOperator(oper):
+    # Operator IDs are emails; keep the user part
+    return oper[:oper.find("@")]
+
+
+@registerRule("date_consistency", by="FILE_DATE")
+def dateConsistency(master, groups):
+    """Files whose data spans several dates, including the date in the file name."""
+    n_dates = groups["DATE"].nunique(dropna=False)
+    multi = n_dates.index[n_dates > 1]
+
+    if not len(multi):
+        return []
+
+    # One small array of dates per file date, so the membership test is per group, not per row
+    dates = groups["DATE"].unique()
+    first_file = groups["SOURCE_FILE"].first()
+
+    return [{'file': first_file[dt], 'file_date': dt, 'data_dates': list(dates[dt])}
+            for dt in multi if dt in set(dates[dt])]
+
+
+@registerRule("operator", by="SOURCE_FILE")
+def operatorConsistency(master, groups):
+    """Files recorded by more than one operator."""
+    n_opers = groups["OPER"].nunique(dropna=False)
+    flagged = n_opers.index[n_opers > 1]
+
+    if not len(flagged):
+        return []
+
+    opers = groups["OPER"].unique()
+
+    return [{"file": file, "operators": [shortOperator(oper) for oper in opers[file]]} for file in flagged]
+
+
+@registerRule("rin", by="SOURCE_FILE")
+def rinConsistency(master, groups):
+    """Files with more than one receiver (RIN)."""
+    n_rins = groups["RIN"].nunique(dropna=False)
+    flagged = n_rins.index[n_rins > 1]
+
+    if not len(flagged):
+        return []
+
+    rins = groups["RIN"].unique()
+
+    return [{"file": file, "RINs": rins[file]} for file in flagged]
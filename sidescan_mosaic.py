@@ -0,0 +1,207 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from jsf_reader import iterSidescanBlocks, sidescanPingTimes
+
+
+SOUND_SPEED = 1500.0    # m/s
+
+PORT = -1
+STARBOARD = 1
+
+
+def slantToGroundRange(n_samples, sample_interval, altitude, starting_depth=0, sound_speed=SOUND_SPEED):
+    """
+    Ground range of every sample in a block of pings.
+
+    Args:
+        n_samples (int): Samples per ping (columns of the block).
+        sample_interval (array): Per-ping sample interval in seconds.
+        altitude (array): Per-ping altitude above the seabed in metres.
+        starting_depth (array): Per-ping window offset, in samples.
+        sound_speed (float): Sound speed in m/s.
+
+    Returns:
+        (pings x samples) float array of ground ranges in metres, NaN inside the
+        water column (slant range shorter than the altitude).
+    """
+    sample_interval = np.asarray(sample_interval, dtype=np.float64)[:, None]
+    altitude = np.asarray(altitude, dtype=np.float64)[:, None]
+    starting_depth = np.broadcast_to(np.asarray(starting_depth, dtype=np.float64), sample_interval.shape[:1])[:, None]
+
+    slant = (np.arange(n_samples) + starting_depth) * sample_interval * (sound_speed / 2.0)
+    ground_sq = slant ** 2 - altitude ** 2
+
+    with np.errstate(invalid='ignore'):
+        return np.where(ground_sq > 0, np.sqrt(ground_sq), np.nan)
+
+
+def interpolateNav(ping_times, nav_times, nav_x, nav_y, nav_heading):
+    """
+    Interpolate position and heading to ping times.
+
+    ``nav_heading`` is in degrees clockwise from north; the returned heading is in
+    radians. Heading is unwrapped before interpolation so pings crossing north
+    don't swing through 180 degrees.
+    """
+    x = np.interp(ping_times, nav_times, nav_x)
+    y = np.interp(ping_times, nav_times, nav_y)
+    heading = np.interp(ping_times, nav_times, np.unwrap(np.radians(nav_heading)))
+
+    return x, y, heading
+
+
+class sidescanMosaic:
+    """
+    Binned side-scan mosaic accumulated in square tiles.
+
+    Each tile keeps a sum and a count grid so pings can be added block by block in
+    any order. Only ``max_tiles`` tiles are kept in memory; the least recently used
+    ones are added into ``.npz`` files under ``tile_dir``, so survey-sized mosaics
+    never need every ping (or every tile) in memory.
+    """
+
+    def __init__(self, tile_dir, resolution=0.25, tile_size=1024, max_tiles=64, sound_speed=SOUND_SPEED):
+        self.tile_dir = tile_dir
+        self.resolution = resolution
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.sound_speed = sound_speed
+
+        self.tiles = OrderedDict()
+
+        os.makedirs(self.tile_dir, exist_ok=True)
+
+    def addPings(self, samples, altitude, sample_interval, x, y, heading, side, starting_depth=0):
+        """
+        Add a block of pings.
+
+        Args:
+            samples: (pings x samples) amplitudes, NaN for missing samples.
+            altitude: Per-ping altitude in metres.
+            sample_interval: Per-ping sample interval in seconds.
+            x, y: Per-ping projected position (e.g. UTM easting/northing) in metres.
+            heading: Per-ping heading in radians, clockwise from north.
+            side: PORT or STARBOARD, scalar or per ping.
+            starting_depth: Per-ping window offset, in samples.
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        n_pings, n_samples = samples.shape
+
+        ground = slantToGroundRange(n_samples, sample_interval, altitude, starting_depth, self.sound_speed)
+
+        side = np.broadcast_to(np.asarray(side, dtype=np.float64), (n_pings,))[:, None]
+        heading = np.asarray(heading, dtype=np.float64)[:, None]
+
+        # Starboard points along (cos h, -sin h) in (east, north)
+        across = side * ground
+        east = np.asarray(x, dtype=np.float64)[:, None] + across * np.cos(heading)
+        north = np.asarray(y, dtype=np.float64)[:, None] - across * np.sin(heading)
+
+        valid = np.isfinite(ground) & np.isfinite(samples)
+
+        self._accumulate(east[valid], north[valid], samples[valid])
+
+    def addJsfFile(self, file_path, subsystem, nav_times, nav_x, nav_y, nav_heading,
+                   altitude=None, block_size=1024):
+        """
+        Mosaic every side-scan ping of one subsystem in a JSF file.
+
+        Nav is interpolated to each ping's CPU time. Channel 0 is port and channel 1
+        starboard. ``altitude`` optionally maps ping blocks to altitudes in metres
+        (e.g. from bottom_tracking) when the header altitude is unusable.
+        """
+        for headers, samples in iterSidescanBlocks(file_path, subsystem, block_size=block_size):
+            x, y, heading = interpolateNav(sidescanPingTimes(headers), nav_times, nav_x, nav_y, nav_heading)
+            side = np.where(headers["channel_num"] == 0, PORT, STARBOARD)
+            ping_altitude = headers["altitude"] / 1000.0 if altitude is None else altitude(headers, samples)
+
+            self.addPings(samples, ping_altitude, headers["sample_interval"] * 1e-9, x, y, heading, side,
+                          starting_depth=headers["starting_depth"])
+
+    def _accumulate(self, east, north, values):
+        if not len(values):
+            return
+
+        col = np.floor(east / self.resolution).astype(np.int64)
+        row = np.floor(north / self.resolution).astype(np.int64)
+
+        tile_col, local_col = np.divmod(col, self.tile_size)
+        tile_row, local_row = np.divmod(row, self.tile_size)
+
+        # Number the tiles touched by this block compactly so they can be found with a
+        # bincount instead of sorting every sample
+        col0, row0 = tile_col.min(), tile_row.min()
+        n_rows = int(tile_row.max() - row0) + 1
+        tile_id = (tile_col - col0) * n_rows + (tile_row - row0)
+
+        local = local_row * self.tile_size + local_col
+        n_cells = self.tile_size * self.tile_size
+
+        for tid in np.flatnonzero(np.bincount(tile_id)):
+            key = (int(col0 + tid // n_rows), int(row0 + tid % n_rows))
+            sel = tile_id == tid
+
+            tile_sum, tile_count = self._tile(key)
+            tile_sum += np.bincount(local[sel], weights=values[sel], minlength=n_cells).reshape(tile_sum.shape)
+            tile_count += np.bincount(local[sel], minlength=n_cells).reshape(tile_count.shape).astype(np.uint32)
+
+    def _tilePath(self, key):
+        return os.path.join(self.tile_dir, f"tile_{key[0]}_{key[1]}.npz")
+
+    def _tile(self, key):
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+        else:
+            if len(self.tiles) >= self.max_tiles:
+                self._flushTile(*self.tiles.popitem(last=False))
+
+            shape = (self.tile_size, self.tile_size)
+            self.tiles[key] = (np.zeros(shape, dtype=np.float64), np.zeros(shape, dtype=np.uint32))
+
+        return self.tiles[key]
+
+    def _flushTile(self, key, tile):
+        tile_sum, tile_count = tile
+        path = self._tilePath(key)
+
+        if os.path.exists(path):
+            with np.load(path) as stored:
+                tile_sum = tile_sum + stored["sum"]
+                tile_count = tile_count + stored["count"]
+
+        np.savez(path, sum=tile_sum, count=tile_count)
+
+    def flush(self):
+        """Write every in-memory tile to disk."""
+        while self.tiles:
+            self._flushTile(*self.tiles.popitem(last=False))
+
+    def tileKeys(self):
+        keys = set(self.tiles)
+        for name in os.listdir(self.tile_dir):
+            if name.startswith("tile_") and name.endswith(".npz"):
+                col, row = name[5:-4].split("_")
+                keys.add((int(col), int(row)))
+        return sorted(keys)
+
+    def readTile(self, key):
+        """
+        Mean amplitude grid of one tile (NaN where no samples landed).
+
+        Row 0 is the southern edge; the tile's south-west corner is at
+        ``(key[0], key[1]) * tile_size * resolution``.
+        """
+        self.flush()
+
+        with np.load(self._tilePath(key)) as stored:
+            tile_sum, tile_count = stored["sum"], stored["count"]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(tile_count > 0, tile_sum / tile_count, np.nan).astype(np.float32)
+
+    def tileOrigin(self, key):
+        extent = self.tile_size * self.resolution
+        return key[0] * extent, key[1] * extent
@@ -0,0 +1,323 @@
+import io
+import ctypes
+import struct
+import numpy as np
+
+from compressed_io import detectCompression, innerName, openCompressed, splitArchivePath
+from jsf_reader import (JSF_HEADER, JSF_START_MARKER, SIDESCAN_HEADER_DTYPE, indexJsfStream, jsfFile,
+                        readJsfMessage, readSidescanBlock, sidescanPingTimes, unknownMsg)
+from record_splitter import recordFile
+
+try:
+    import pyxtf
+except ImportError:  # XTF support is optional
+    pyxtf = None
+
+
+XTF_FILE_FORMAT = 0x7B
+XTF_MAGIC = 0xFACE
+XTF_FILE_HEADER_SIZE = 1024
+XTF_PACKET_START = struct.Struct('<HBBHHHL')   # magic, header type, subchannel, chans to follow, reserved x2, bytes this record
+XTF_SONAR = 0
+XTF_NAV_LATLON = 3      # file header NavUnits: 0 is projected metres, 3 is lat/long degrees
+
+XTF_INDEX_DTYPE = np.dtype([("offset", "<u8"),
+                            ("headerType", "u1"),
+                            ("subChannel", "u1"),
+                            ("length", "<u4")])
+
+RAW_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u8")])
+
+# (name, detect(head, path), reader class), tried in order
+SONAR_READERS = []
+
+
+def registerReader(name, detect):
+    """Register a reader class for files where ``detect(head, path)`` is true."""
+    def register(cls):
+        cls.format = name
+        SONAR_READERS.append((name, detect, cls))
+        return cls
+    return register
+
+
+def open_sonar(path, **kwargs):
+    """
+    Open a JSF, XTF or raw HFC/LFC/SRP file through a common lazy reader.
+
+    The format is detected from the magic bytes of the (decompressed) stream, so
+    gzip/zstd/zip containers work too. Every reader offers:
+
+    - ``index``: structured array with one row per message/packet/record
+    - ``len()`` and iteration, decoding one item at a time
+    - ``pings()``: columnar ping arrays ("time", "ping_num", "channel", "headers")
+    - ``nav()``: columnar nav arrays ("time", "heading" and either projected
+      "x"/"y" in metres or geographic "lon"/"lat" in degrees)
+    """
+    with openCompressed(path) as f:
+        head = f.read(XTF_FILE_HEADER_SIZE + XTF_PACKET_START.size)
+
+    for name, detect, cls in SONAR_READERS:
+        if detect(head, path):
+            return cls(path, **kwargs)
+
+    raise ValueError(f"Unrecognised sonar format: {path}")
+
+
+class sonarReader:
+    """Base class for the readers returned by ``open_sonar``."""
+
+    format = None
+
+    def __init__(self, path):
+        self.path = path
+        self._stream = None
+        self.index = self.buildIndex()
+
+    def buildIndex(self):
+        raise NotImplementedError
+
+    def stream(self):
+        if self._stream is None:
+            self._stream = openCompressed(self.path)
+        return self._stream
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        for n in range(len(self.index)):
+            yield self[n]
+
+    def __getitem__(self, n):
+        raise NotImplementedError
+
+    def pings(self, **selection):
+        raise NotImplementedError(f"{self.format} files have no ping decoder")
+
+    def nav(self):
+        return {"time": np.empty(0), "x": np.empty(0), "y": np.empty(0), "heading": np.empty(0)}
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _ctypesDtype(cls):
+    """NumPy dtype matching a packed ctypes Structure, including inherited fields."""
+    names, formats, offsets = [], [], []
+
+    for base in reversed(cls.__mro__):
+        for name, ctype in base.__dict__.get("_fields_", []):
+            names.append(name)
+            formats.append(np.dtype(ctype))
+            offsets.append(getattr(cls, name).offset)
+
+    return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": ctypes.sizeof(cls)})
+
+
+def _isJsf(head, path):
+    return len(head) >= 16 and JSF_HEADER.unpack_from(head)[0] == JSF_START_MARKER
+
+
+def _isXtf(head, path):
+    if len(head) < XTF_FILE_HEADER_SIZE + XTF_PACKET_START.size or head[0] != XTF_FILE_FORMAT:
+        return False
+    return XTF_PACKET_START.unpack_from(head, XTF_FILE_HEADER_SIZE)[0] == XTF_MAGIC
+
+
+def _isRaw(head, path):
+    return innerName(path).upper().rsplit('.', 1)[-1] in ("HFC", "LFC", "SRP")
+
+
+def _parseNmeaPosition(sentence):
+    """(lat, lon) in decimal degrees from a GGA or RMC sentence, or None."""
+    parts = sentence.split(',')
+    if len(parts) < 7:
+        return None
+
+    kind = parts[0][-3:]
+    if kind == "GGA":
+        lat, lat_hemi, lon, lon_hemi = parts[2:6]
+    elif kind == "RMC":
+        lat, lat_hemi, lon, lon_hemi = parts[3:7]
+    else:
+        return None
+
+    try:
+        lat = int(float(lat) / 100) + (float(lat) % 100) / 60
+        lon = int(float(lon) / 100) + (float(lon) % 100) / 60
+    except ValueError:
+        return None
+
+    return (-lat if lat_hemi == "S" else lat), (-lon if lon_hemi == "W" else lon)
+
+
+@registerReader("jsf", _isJsf)
+class jsfReader(sonarReader):
+    """Lazy JSF reader; the index comes from a header-only pass (see indexJsfStream)."""
+
+    def buildIndex(self):
+        with openCompressed(self.path) as f:
+            return indexJsfStream(f)
+
+    def __getitem__(self, n):
+        header_bytes, data = readJsfMessage(self.stream(), int(self.index["offset"][n]))
+        return jsfFile.DECODE_SWITCH.get(int(self.index["msgType"][n]), unknownMsg)(header_bytes + data)
+
+    def pings(self, subsystem=None, channel=None, samples=False):
+        """Columnar arrays of the type 82 (side-scan) pings, optionally with the sample matrix."""
+        sel = self.index["msgType"] == 82
+        if subsystem is not None:
+            sel &= self.index["subsystem"] == subsystem
+        if channel is not None:
+            sel &= self.index["channel"] == channel
+        rows = self.index[sel]
+
+        if samples:
+            headers, sample_matrix = readSidescanBlock(self.stream(), rows)
+        else:
+            stream = self.stream()
+            headers = np.empty(len(rows), dtype=SIDESCAN_HEADER_DTYPE)
+            for n, offset in enumerate(rows["offset"].tolist()):
+                stream.seek(offset + 16)
+                headers[n] = np.frombuffer(stream.read(SIDESCAN_HEADER_DTYPE.itemsize), dtype=SIDESCAN_HEADER_DTYPE)[0]
+
+        result = {"time": sidescanPingTimes(headers), "ping_num": headers["ping_num"],
+                  "channel": headers["channel_num"], "headers": headers}
+        if samples:
+            result["samples"] = sample_matrix
+
+        return result
+
+    def nav(self):
+        """
+        Positions from NMEA (type 2002) GGA/RMC strings as "lon"/"lat" in degrees,
+        unprojected; heading is not carried by NMEA fixes.
+        """
+        stream = self.stream()
+        times, lons, lats = [], [], []
+
+        for offset in self.index["offset"][self.index["msgType"] == 2002].tolist():
+            _, data = readJsfMessage(stream, offset)
+            seconds, ms = struct.unpack_from('<ll', data)
+            position = _parseNmeaPosition(data[12:].decode('ascii', errors='ignore').strip("\r\n\x00"))
+            if position is not None:
+                times.append(seconds + ms / 1000.0)
+                lats.append(position[0])
+                lons.append(position[1])
+
+        return {"time": np.array(times), "lon": np.array(lons), "lat": np.array(lats),
+                "heading": np.full(len(times), np.nan)}
+
+
+@registerReader("xtf", _isXtf)
+class xtfReader(sonarReader):
+    """Lazy XTF reader; packets are indexed from their 14-byte start blocks only."""
+
+    def __init__(self, path):
+        if pyxtf is None:
+            raise ImportError("pyxtf is required to read XTF files")
+        super().__init__(path)
+
+    def buildIndex(self):
+        rows = []
+
+        with openCompressed(self.path) as f:
+            self.file_header = pyxtf.XTFFileHeader.create_from_buffer(f)
+            offset = XTF_FILE_HEADER_SIZE
+            f.seek(offset)
+
+            while True:
+                start = f.read(XTF_PACKET_START.size)
+                if len(start) < XTF_PACKET_START.size:
+                    break
+
+                magic, header_type, sub_channel, _, _, _, length = XTF_PACKET_START.unpack(start)
+                if magic != XTF_MAGIC or length < XTF_PACKET_START.size:
+                    print(f"Invalid XTF packet at offset {offset}")
+                    break
+
+                rows.append((offset, header_type, sub_channel, length))
+                offset += length
+                f.seek(length - XTF_PACKET_START.size, 1)
+
+        return np.array(rows, dtype=XTF_INDEX_DTYPE)
+
+    def __getitem__(self, n):
+        stream = self.stream()
+        stream.seek(int(self.index["offset"][n]))
+        packet = stream.read(int(self.index["length"][n]))
+
+        p_class = pyxtf.XTFPacketClasses.get(int(self.index["headerType"][n]), pyxtf.XTFUnknownPacket)
+        # pyxtf reads channel headers from the same buffer object, so it must be a stream
+        return p_class.create_from_buffer(io.BytesIO(packet), file_header=self.file_header)
+
+    def pings(self):
+        """Columnar arrays of the sonar ping headers (XTFPingHeader fields)."""
+        ping_dtype = _ctypesDtype(pyxtf.XTFPingHeader)
+        rows = self.index[self.index["headerType"] == XTF_SONAR]
+        stream = self.stream()
+
+        raw = bytearray()
+        for offset in rows["offset"].tolist():
+            stream.seek(offset)
+            raw += stream.read(ping_dtype.itemsize)
+        headers = np.frombuffer(bytes(raw), dtype=ping_dtype)
+
+        months = (headers["Year"].astype(np.int64) - 1970) * 12 + headers["Month"].astype(np.int64) - 1
+        days = months.astype("datetime64[M]").astype("datetime64[D]") + (headers["Day"].astype(np.int64) - 1)
+        time = (days.astype(np.int64) * 86400.0 + headers["Hour"] * 3600.0 + headers["Minute"] * 60.0 +
+                headers["Second"] + headers["HSeconds"] / 100.0)
+
+        return {"time": time, "ping_num": headers["PingNumber"], "channel": rows["subChannel"],
+                "headers": headers}
+
+    def nav(self):
+        """Sensor positions of the pings, as "lon"/"lat" or "x"/"y" following the file's NavUnits."""
+        pings = self.pings()
+        headers = pings["headers"]
+        x_name, y_name = ("lon", "lat") if self.file_header.NavUnits == XTF_NAV_LATLON else ("x", "y")
+        return {"time": pings["time"], x_name: headers["SensorXcoordinate"], y_name: headers["SensorYcoordinate"],
+                "heading": headers["SensorHeading"]}
+
+
+@registerReader("raw", _isRaw)
+class rawRecordReader(sonarReader):
+    """
+    ElectroBras HFC/LFC/SRP captures split on their leading delimiter.
+
+    The layout is still unknown, so items are the raw records (memoryviews) and
+    there are no ping or nav columns yet; see format_discovery and field_sweep.
+    Records are memory-mapped, so compressed captures must be decompressed first.
+    """
+
+    def __init__(self, path, delim=None):
+        archive, member = splitArchivePath(path)
+        if member is not None or detectCompression(archive) is not None:
+            raise ValueError(f"{path} is compressed; raw captures are memory-mapped, decompress it first")
+
+        self.delim = delim
+        super().__init__(path)
+
+    def buildIndex(self):
+        self.records = recordFile(self.path, self.delim)
+        index = np.empty(len(self.records), dtype=RAW_INDEX_DTYPE)
+        index["offset"] = self.records.starts
+        index["length"] = self.records.lengths()
+        return index
+
+    def __getitem__(self, n):
+        return self.records[n]
+
+    def close(self):
+        # Release the mapping too, or the capture stays locked on Windows
+        self.records.close()
+        super().close()
@@ -1,7 +1,16 @@
 #!/usr/bin/env python3
 
 # Test the decode functions with known values
-from eletrobras_decode import decode_8bit, decode_16bit, decode_32bit
+import random
+
+import numpy as np
+import pytest
+
+from record_splitter import recordFile
+from format_discovery import discover_format, offset_statistics
+from field_sweep import FIELD_TYPES, sweep_fields, sweep_file
+from eletrobras_decode import (decode_8bit, decode_16bit, decode_32bit, decode_words,
+                               ascii_text, ascii_mask, printable_mask)
 
 def test_8bit():
     print("Testing 8-bit decoding:")
@@ -73,8 +82,116 @@ def test_edge_cases():
     word, _ = decode_32bit(255, 255, 255, 255)
     print(f"  ✓ 32-bit signed conversion: 0xFFFFFFFF -> {word} (should be -1)")
 
+def test_bulk_matches_reference():
+    print("\nTesting bulk decoding against the per-byte reference:")
+
+    rng = random.Random(0)
+    raw = bytes(rng.randrange(256) for _ in range(4099))
+    views = decode_words(raw)
+
+    assert views[(1, False, "<", 0)].tolist() == [decode_8bit(b)[0] for b in raw]
+    assert ascii_text(raw) == "".join(decode_8bit(b)[1] for b in raw)
+
+    for offset in (0, 1):
+        ref = [decode_16bit(raw[n], raw[n + 1])[0] for n in range(offset, len(raw) - 1, 2)]
+        assert views[(2, True, "<", offset)].tolist() == ref
+
+    for offset in range(4):
+        ref = [decode_32bit(*raw[n:n + 4])[0] for n in range(offset, len(raw) - 3, 4)]
+        assert views[(4, True, "<", offset)].tolist() == ref
+
+    # Unsigned and big-endian variants are reinterpretations of the same words
+    assert ((views[(2, False, "<", 1)].astype(int) - views[(2, True, "<", 1)]) % 0x10000 == 0).all()
+    assert (views[(4, True, ">", 2)] == views[(4, True, "<", 2)].byteswap()).all()
+
+    assert ascii_mask(raw).tolist() == [b < 128 for b in raw]
+    assert printable_mask(b"A \t\x00\x7f~").tolist() == [True, True, True, False, False, True]
+    print(f"  ✓ {len(views)} views over {len(raw)} bytes match the reference decoders")
+
+def test_record_split(tmp_path):
+    print("\nTesting memory-mapped record splitting against bytes.split:")
+
+    rng = random.Random(1)
+    for delim in (b"SYNCWORD", b"\x00\x00"):
+        raw = b"".join(delim + bytes(rng.choice(b"\x00\x01ab") for _ in range(rng.randrange(20)))
+                       for _ in range(500))
+        path = tmp_path / "capture.HFC"
+        path.write_bytes(raw)
+
+        # A tiny chunk size forces delimiters to straddle chunk boundaries
+        records = recordFile(str(path), delim, chunk_size=61)
+        assert [bytes(rec) for rec in records] == raw.split(delim)
+        print(f"  ✓ {len(records)} records split on {delim!r}")
+
+def test_discover_format(tmp_path):
+    print("\nTesting format discovery on a fixed-period capture:")
+
+    rng = random.Random(2)
+    sync = b"\xa5\x5a\x01\x02\xf0\x0f\x33\xcc"
+    raw = b"".join(sync + n.to_bytes(4, "little") + f"TEMP={rng.randrange(100):03d}C;OK".encode()
+                   + bytes(rng.randrange(256) for _ in range(16)) for n in range(2000))
+    path = tmp_path / "capture.SRP"
+    path.write_bytes(raw)
+
+    report = discover_format(str(path))
+    assert report.delimiter == sync and report.record_length == report.period == 40
+    assert report.record_lengths == {40: 1999}
+    # Sync, counter (high bytes constant), "TEMP=0", digits, "C;OK", noise
+    assert [(f["start"], f["end"], f["kind"]) for f in report.fields] == [
+        (0, 7, "constant"), (8, 9, "variable"), (10, 17, "constant"), (18, 19, "text"), (20, 23, "constant"),
+        (24, 39, "variable")]
+    assert report.entropy[:8].max() == 0 and report.entropy[24:].min() > 7
+
+    # A capped histogram works through the offsets a few at a time with the same result
+    data = np.memmap(str(path), dtype=np.uint8, mode='r')
+    starts = np.arange(0, len(raw), 40)
+    for full, capped in zip(offset_statistics(data, starts, 40), offset_statistics(data, starts, 40, hist_bytes=7000)):
+        assert np.array_equal(full, capped)
+    print(f"  ✓ period {report.period}, {len(report.fields)} fields")
+
+def planted_records(n=3000, seed=0):
+    """Records with a LE uint32 counter at 4, a BE int32 random walk at 10, a LE float32 sine at 16 and a LE float64 time at 20."""
+    rng = np.random.default_rng(seed)
+    records = np.zeros((n, 36), dtype=np.uint8)
+    records[:, 0:4] = np.frombuffer(b"SYNC", dtype=np.uint8)
+    records[:, 28:36] = rng.integers(0, 256, (n, 8))
+    for start, values in ((4, np.arange(n, dtype="<u4")),
+                          (10, (np.cumsum(rng.normal(0, 50, n)) + 100000).astype(">i4")),
+                          (16, (np.sin(np.arange(n) / 50) * 20).astype("<f4")),
+                          (20, (1.7e9 + np.arange(n) * 0.1).astype("<f8"))):
+        records[:, start:start + values.itemsize] = values.view(np.uint8).reshape(n, -1)
+    return records
+
+def test_field_sweep(tmp_path):
+    print("\nTesting field sweep ranking on planted fields:")
+
+    planted = {(4, "int32", "little"), (10, "int32", "big"), (16, "float32", "little"), (20, "float64", "little")}
+    for seed in range(3):
+        table = sweep_fields(planted_records(seed=seed))
+
+        # Read the ranking the way a user would: best first, skipping candidates that overlap a better one
+        used, found = np.zeros(36, dtype=bool), set()
+        for row in table[table["score"] > 0.8].itertuples():
+            size = np.dtype(FIELD_TYPES[row.dtype]).itemsize
+            if not used[row.offset:row.offset + size].any():
+                used[row.offset:row.offset + size] = True
+                found.add((row.offset, row.dtype, row.byteorder))
+        assert found == planted, found
+
+    path = tmp_path / "capture.HFC"
+    path.write_bytes(b"".join(b"SYNC" + bytes(rec) for rec in planted_records()[:, 4:]))
+    best = sweep_file(str(path), delim=b"SYNC").iloc[0]
+    assert (best["offset"], best["dtype"]) in {(0, "int32"), (16, "float64")}
+
+    with pytest.raises(ValueError, match="not found"):
+        sweep_file(str(path), delim=b"NOPE")
+    with pytest.raises(ValueError, match="No records of 7 bytes"):
+        sweep_file(str(path), delim=b"SYNC", record_length=7)
+    print(f"  ✓ {len(planted)} planted fields found")
+
 if __name__ == "__main__":
     test_8bit()
     test_16bit()
     test_32bit()
     test_edge_cases()
+    test_bulk_matches_reference()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+
+# Check that compressed containers read the same as the plain file
+import gc
+import gzip
+import struct
+import weakref
+import zipfile
+
+import numpy as np
+
+from compressed_io import openCompressed, writeSeekableZstd
+from jsf_reader import (JSF_HEADER, JSF_START_MARKER, SIDESCAN_HEADER_DTYPE, indexJsfFile, iterSidescanBlocks,
+                        jsfFile, readJsfMessage, readSidescanBlock, sidescanPingTimes)
+from sidescan_mosaic import sidescanMosaic
+
+
+def make_message(msg_type, payload, subsystem=0, channel=0):
+    header = JSF_HEADER.pack(JSF_START_MARKER, 1, 0, msg_type, 0, subsystem, channel, 0, 0, len(payload))
+    return header + payload
+
+
+def make_jsf(path, n_messages=200):
+    with open(path, 'wb') as f:
+        for n in range(n_messages):
+            if n % 2:
+                payload = struct.pack('<llcccc', 1700000000 + n, n, b'1', b'0', b'0', b'0')
+                payload += f"$GPGGA,{n:06d}".encode()
+                f.write(make_message(2002, payload, subsystem=100))
+            else:
+                f.write(make_message(426, struct.pack('<ll', 1700000000 + n, n)))
+
+
+def test_compressed_containers(tmp_path):
+    plain = tmp_path / "line.jsf"
+    make_jsf(plain)
+    raw = plain.read_bytes()
+
+    with gzip.open(tmp_path / "line.jsf.gz", 'wb') as f:
+        f.write(raw)
+
+    writeSeekableZstd(plain, tmp_path / "line.jsf.zst", frame_size=1000)
+
+    with zipfile.ZipFile(tmp_path / "line.zip", 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr("line.jsf", raw)
+
+    reference = indexJsfFile(str(plain))
+    assert len(reference) == 200
+
+    for name in ("line.jsf.gz", "line.jsf.zst", "line.zip", "line.zip::line.jsf"):
+        path = str(tmp_path / name)
+
+        with openCompressed(path) as f:
+            assert f.read() == raw
+
+        assert (indexJsfFile(path) == reference).all()
+
+
+def test_seekable_zstd_random_access(tmp_path):
+    plain = tmp_path / "line.jsf"
+    make_jsf(plain)
+    writeSeekableZstd(plain, tmp_path / "line.jsf.zst", frame_size=512)
+
+    jsf = jsfFile(str(tmp_path / "line.jsf.zst"))
+    assert len(jsf.message) == len(jsf.offsets) == 200
+
+    # Read back to front so every access lands in a different frame
+    for n in range(199, -1, -25):
+        msg = jsf.readMessageAt(int(jsf.offsets[n]))
+        assert msg.msgType == jsf.message[n].msgType
+        assert msg.data == jsf.message[n].data
+
+    jsf.close()
+
+
+def test_demux_streams(tmp_path):
+    from jsf_demux import demuxJsf
+    import pytest
+
+    ping_header = bytes(240)
+    messages = []
+    for n in range(100):
+        messages.append(make_message(2002, f"$GPGGA,{n:06d}".encode(), subsystem=100))
+        if n >= 50:   # channel 1 only starts halfway through
+            messages.append(make_message(80, ping_header + struct.pack('<l', n), subsystem=20, channel=1))
+        messages.append(make_message(80, ping_header + struct.pack('<l', n), subsystem=20, channel=0))
+        # Sub-bottom pings share subsystem 0 with pitch/roll and system event messages
+        messages.append(make_message(80, ping_header + struct.pack('<h', n)))
+        messages.append(make_message(2020, struct.pack('<ll', n, n)))
+        messages.append(make_message(182, struct.pack('<l', n)))
+    (tmp_path / "line.jsf").write_bytes(b"".join(messages))
+
+    stats = demuxJsf(str(tmp_path / "line.jsf"), str(tmp_path / "out"), copy_types=[2002], replay=5)
+    assert set(stats) == {(0, 0), (20, 0), (20, 1)}
+    assert stats[(0, 0)]["messages"] == 100 * 3 + 100
+
+    port = indexJsfFile(stats[(20, 0)]["path"])
+    assert (port["msgType"] == 80).sum() == 100 and (port["msgType"] == 2002).sum() == 100
+
+    # The late stream gets only the last 5 NMEA messages before it started, then every later one
+    starboard = indexJsfFile(stats[(20, 1)]["path"])
+    nmea = starboard[starboard["msgType"] == 2002]
+    assert len(nmea) == 5 + 49
+    with open(stats[(20, 1)]["path"], 'rb') as f:
+        assert readJsfMessage(f, int(nmea["offset"][0]))[1] == b"$GPGGA,000046"
+
+    # Raw streams hold the samples of the sonar data messages only: no ping headers,
+    # and nothing from the other messages of subsystem 0
+    raw = demuxJsf(str(tmp_path / "line.jsf"), str(tmp_path / "raw"), mode="raw")
+    assert set(raw) == {(0, 0), (20, 0), (20, 1)}
+    assert (tmp_path / "raw" / "line_sub020_ch01.raw").read_bytes() == b"".join(
+        struct.pack('<l', n) for n in range(50, 100))
+    assert (tmp_path / "raw" / "line_sub000_ch00.raw").read_bytes() == b"".join(
+        struct.pack('<h', n) for n in range(100))
+    assert raw[(20, 1)]["messages"] == 50 and raw[(0, 0)]["messages"] == 100
+
+    with pytest.raises(ValueError):
+        demuxJsf(str(tmp_path / "line.jsf"), str(tmp_path / "raw"), mode="raw", copy_types=[2002])
+
+    print("✓ JSF demux")
+
+
+def make_sidescan_ping(channel, words, data_format=0, weighting_factor=0, sample_interval=10000,
+                       altitude_mm=0, ping_num=0, cpu_ms_today=0, subsystem=20):
+    header = np.zeros(1, dtype=SIDESCAN_HEADER_DTYPE)
+    header["subsystem"], header["channel_num"], header["ping_num"] = subsystem, channel, ping_num
+    header["samples_in_packet"] = len(words) // (2 if data_format == 1 else 1)
+    header["sample_interval"], header["weighting_factor"] = sample_interval, weighting_factor
+    header["data_format"], header["altitude"] = data_format, altitude_mm
+    header["cpu_year"], header["cpu_day"], header["cpu_ms_today"] = 2025, 1, cpu_ms_today
+
+    words = np.asarray(words, dtype="<i2" if data_format == 1 else "<u2")
+    return make_message(82, header.tobytes() + words.tobytes(), subsystem=subsystem, channel=channel)
+
+
+def test_sidescan_block_reads(tmp_path):
+    rng = np.random.default_rng(3)
+    messages, expected = [], []
+    for n in range(10):
+        channel = n % 2
+        if n < 6:   # envelope pings of varying length
+            words = rng.integers(0, 4000, 100 + n)
+            amplitude = words / 2.0
+            messages.append(make_sidescan_ping(channel, words, weighting_factor=1, ping_num=n, cpu_ms_today=n * 100))
+        else:       # real/imag pairs
+            words = rng.integers(-3000, 3000, 2 * 120)
+            amplitude = np.hypot(words[0::2], words[1::2])
+            messages.append(make_sidescan_ping(channel, words, data_format=1, ping_num=n, cpu_ms_today=n * 100))
+        expected.append(amplitude)
+    messages.insert(3, make_message(2002, b"$GPGGA", subsystem=100))
+    (tmp_path / "line.jsf").write_bytes(b"".join(messages))
+
+    blocks = list(iterSidescanBlocks(str(tmp_path / "line.jsf"), 20, block_size=4))
+    assert [len(h) for h, _ in blocks] == [4, 4, 2]
+    headers = np.concatenate([h for h, _ in blocks])
+    assert list(headers["ping_num"]) == list(range(10))
+    assert list(headers["channel_num"]) == [0, 1] * 5
+
+    # Block reads match reading each message on its own and the samples written
+    index = indexJsfFile(str(tmp_path / "line.jsf"))
+    rows = index[index["msgType"] == 82]
+    with open(tmp_path / "line.jsf", 'rb') as f:
+        for n, ((h, samples), row) in enumerate(zip((b for b in blocks for b in zip(*b)), rows)):
+            single_headers, single = readSidescanBlock(f, rows[n:n + 1])
+            assert single_headers[0] == h
+            width = len(expected[n])
+            np.testing.assert_allclose(samples[:width], single[0], rtol=1e-6)
+            np.testing.assert_allclose(samples[:width], expected[n], rtol=1e-6)
+            assert np.isnan(samples[width:]).all()
+
+    starboard = list(iterSidescanBlocks(str(tmp_path / "line.jsf"), 20, channel=1))
+    assert list(starboard[0][0]["ping_num"]) == [1, 3, 5, 7, 9]
+
+    times = sidescanPingTimes(headers)
+    start = np.datetime64("2025-01-01", "s").astype(np.int64)
+    np.testing.assert_allclose(times, start + np.arange(10) * 0.1)
+
+    print("✓ Side-scan block reads")
+
+
+def test_sidescan_mosaic_geometry(tmp_path):
+    # One port and one starboard ping, heading east, each with a single bright sample at
+    # slant range 7.5 m from an altitude of 4.5 m: 6 m ground range, north (port) and south
+    port, starboard = np.zeros(2000), np.zeros(2000)
+    port[1000], starboard[1000] = 2000, 1000
+    (tmp_path / "line.jsf").write_bytes(make_sidescan_ping(0, port, altitude_mm=4500)
+                                        + make_sidescan_ping(1, starboard, altitude_mm=4500))
+
+    start = float(np.datetime64("2025-01-01", "s").astype(np.int64))
+    mosaic = sidescanMosaic(str(tmp_path / "tiles"), resolution=0.25, tile_size=1024)
+    mosaic.addJsfFile(str(tmp_path / "line.jsf"), 20, nav_times=[start - 10, start + 10], nav_x=[1000.1, 1000.1],
+                      nav_y=[2000.1, 2000.1], nav_heading=[90, 90])
+
+    bright = dict()
+    for key in mosaic.tileKeys():
+        east, north = mosaic.tileOrigin(key)
+        tile = mosaic.readTile(key)
+        for row, col in np.argwhere(tile > 0):
+            bright[(east + col * 0.25, north + row * 0.25)] = tile[row, col]
+
+    assert sorted(bright) == [(1000.0, 1994.0), (1000.0, 2006.0)]
+    assert bright[(1000.0, 2006.0)] > bright[(1000.0, 1994.0)]    # port is north of an eastward line
+
+    print("✓ Side-scan mosaic geometry")
+
+
+def test_sidescan_altitude_per_channel():
+    from bottom_tracking import sidescanAltitude
+
+    headers = np.zeros(20, dtype=SIDESCAN_HEADER_DTYPE)
+    headers["channel_num"] = np.arange(20) % 2
+    headers["sample_interval"] = 10000
+    samples = np.ones((20, 1000), dtype=np.float32)
+    samples[0::2, 300:] = 100   # port bottom at sample 300
+    samples[1::2, 500:] = 100   # starboard bottom at sample 500
+
+    altitude = sidescanAltitude()
+    for start in (0, 10):   # block by block, so the trackers carry over
+        picked = altitude(headers[start:start + 10], samples[start:start + 10])
+        np.testing.assert_allclose(picked[0::2], 300 * 0.0075, atol=0.03)
+        np.testing.assert_allclose(picked[1::2], 500 * 0.0075, atol=0.03)
+
+    print("✓ Per-channel side-scan altitude")
+
+
+def test_open_sonar_dispatch(tmp_path):
+    import ctypes
+    import pytest
+    import pyxtf
+    from sonar_readers import open_sonar
+
+    # JSF, plain and gzipped, with an NMEA fix
+    payload = struct.pack('<llcccc', 1700000000, 500, b'1', b'0', b'0', b'0')
+    payload += b"$GPGGA,120000,4530.00,N,07315.00,W,1,08,0.9,10.0,M"
+    jsf = make_message(2002, payload, subsystem=100) + make_sidescan_ping(0, np.arange(10), ping_num=7)
+    (tmp_path / "line.jsf").write_bytes(jsf)
+    with gzip.open(tmp_path / "line.jsf.gz", 'wb') as f:
+        f.write(jsf)
+
+    for name in ("line.jsf", "line.jsf.gz"):
+        with open_sonar(str(tmp_path / name)) as reader:
+            assert reader.format == "jsf" and len(reader) == 2
+            assert list(reader.pings()["ping_num"]) == [7]
+            nav = reader.nav()
+            assert nav["time"][0] == 1700000000.5 and "x" not in nav
+            np.testing.assert_allclose([nav["lat"][0], nav["lon"][0]], [45.5, -73.25])
+
+    # Raw captures by extension, also behind a compression suffix, which is refused
+    (tmp_path / "capture.HFC").write_bytes(b"SYNCWORD" + b"abc" + b"SYNCWORD" + b"de")
+    with open_sonar(str(tmp_path / "capture.HFC")) as reader:
+        assert reader.format == "raw" and [bytes(rec) for rec in reader] == [b"", b"abc", b"de"]
+        mapping = weakref.ref(reader.records.data)
+    # The memory map is released on exit, so the capture can be replaced or deleted
+    gc.collect()
+    assert mapping() is None
+    (tmp_path / "capture.HFC").unlink()
+    (tmp_path / "capture.HFC").write_bytes(b"SYNCWORD" + b"xyz")
+    with open_sonar(str(tmp_path / "capture.HFC")) as reader:
+        assert [bytes(rec) for rec in reader] == [b"", b"xyz"]
+
+    with gzip.open(tmp_path / "capture.HFC.gz", 'wb') as f:
+        f.write(b"SYNCWORD" + b"abc")
+    with pytest.raises(ValueError, match="compressed"):
+        open_sonar(str(tmp_path / "capture.HFC.gz"))
+
+    # XTF: a file header in lat/long units and one ping header with no channels
+    header = pyxtf.XTFFileHeader()
+    header.FileFormat, header.NavUnits = 0x7B, 3
+    ping = pyxtf.XTFPingHeader()
+    ping.MagicNumber, ping.HeaderType, ping.NumBytesThisRecord = 0xFACE, 0, ctypes.sizeof(ping)
+    ping.Year, ping.Month, ping.Day, ping.PingNumber = 2025, 1, 2, 42
+    ping.SensorXcoordinate, ping.SensorYcoordinate = -73.25, 45.5
+    (tmp_path / "line.xtf").write_bytes(bytes(header) + bytes(ping))
+
+    with open_sonar(str(tmp_path / "line.xtf")) as reader:
+        assert reader.format == "xtf" and len(reader) == 1
+        assert list(reader.pings()["ping_num"]) == [42] and reader[0].PingNumber == 42
+        nav = reader.nav()
+        assert nav["time"][0] == np.datetime64("2025-01-02", "s").astype(np.int64)
+        np.testing.assert_allclose([nav["lat"][0], nav["lon"][0]], [45.5, -73.25])
+
+    print("✓ open_sonar dispatch")
@@ -0,0 +1,55 @@
+import os
+import zipfile
+import pandas as pd
+
+from shot_cache import shotCache, fileFingerprint, zipMemberFingerprint
+
+
+def test_cache_roundtrip_and_invalidation(tmp_path):
+    shot = tmp_path / "shots_2025-01-01.csv"
+    shot.write_text("COUNT,OPER\n1,bob@x.com\n2,bob@x.com\n")
+    df = pd.read_csv(shot)
+
+    cache = shotCache(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    key = fileFingerprint(str(shot))
+    assert cache.get(str(shot), key) is None
+
+    cache.put(str(shot), key, df)
+    cache.save()
+
+    # A fresh session sees the saved entry
+    cache = shotCache(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    assert cache.get(str(shot), key).equals(df)
+
+    shot.write_text("COUNT,OPER\n1,bob@x.com\n2,bob@x.com\n3,bob@x.com\n")
+    os.utime(shot, ns=(key[1] + 10**9, key[1] + 10**9))
+    assert cache.get(str(shot), fileFingerprint(str(shot))) is None
+
+    # Content CRC32s are kept while the fingerprint matches
+    key = fileFingerprint(str(shot))
+    cache.putContentCrc(str(shot), key, 1234)
+    cache.save()
+    cache = shotCache(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    assert cache.contentCrc(str(shot), key) == 1234
+    assert cache.contentCrc(str(shot), [key[0], key[1] + 1]) is None
+    cache.pruneContentCrcs([])
+    assert cache.contentCrc(str(shot), key) is None
+
+    assert cache.prune([]) == [str(shot)]
+    assert not [f for f in os.listdir(tmp_path / "cache") if f != "manifest.json"]
+
+    print("✓ Cache round trip and invalidation")
+
+
+def test_zip_member_fingerprint(tmp_path):
+    zip_path = tmp_path / "day.zip"
+    with zipfile.ZipFile(zip_path, "w") as z:
+        z.writestr("shots_a.csv", "COUNT\n1\n")
+        z.writestr("shots_b.csv", "COUNT\n2\n")
+
+    with zipfile.ZipFile(zip_path) as z:
+        keys = [zipMemberFingerprint(info) for info in z.infolist()]
+
+    assert keys[0] != keys[1]
+
+    print("✓ Zip member fingerprints")
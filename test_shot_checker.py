@@ -0,0 +1,583 @@
+import os
+import json
+import zipfile
+import numpy as np
+import pandas as pd
+
+from WS_shot_checker import projectData
+from shot_validation import VALIDATION_RULES, runRules
+from shot_schema import readShotCsv
+from shot_report import jsonDefault
+
+HEADER = "COUNT,EASTING,NORTHING,OPER,DATE,TIME,RIN,CN,H380,SNR,NSAT,GDATE,GTIME\n"
+
+
+def shot_rows(date, oper, rin, n, start=0):
+    return "".join(f"{start + i},{500000 + 5.0 * i},{4000000 + 5.0 * i},{oper},{date},10:{i // 60:02d}:{i % 60:02d},"
+                   f"{rin},C1,{0.5 + 0.01 * i:.3f},{30 + i % 5},{8 + i % 3},{date},10:{i // 60:02d}:{i % 60:02d}\n"
+                   for i in range(n))
+
+
+def make_project(root):
+    (root / "day1").mkdir(parents=True)
+    (root / "day1" / "shots_2025-01-01.csv").write_text(HEADER + shot_rows("2025-01-01", "bob@x.com", 1, 50))
+    # Second operator and receiver, and a row from the next day
+    (root / "day1" / "shots_2025-01-02.csv").write_text(
+        HEADER + shot_rows("2025-01-02", "bob@x.com", 1, 30) + shot_rows("2025-01-02", "amy@x.com", 2, 5, 30) +
+        shot_rows("2025-01-03", "amy@x.com", 2, 1, 35))
+    (root / "day1" / "circuit_shots_2025-01-01.csv").write_text(HEADER)
+
+    with zipfile.ZipFile(root / "field.zip", "w") as z:
+        z.writestr("x/shots_2025-01-04.csv", HEADER + shot_rows("2025-01-04", "carl@x.com", 3, 40))
+        z.writestr("x/notes.txt", "not a shot file")
+
+
+def reference_checks(master):
+    """The original per-value mask loops, for comparison."""
+    dates = []
+    for dt in master["FILE_DATE"].unique():
+        sub_df = master[master["FILE_DATE"] == dt]
+        sub_dates = sub_df["DATE"].unique()
+        if len(sub_dates) > 1 and dt in sub_dates:
+            dates.append({'file': sub_df['SOURCE_FILE'].iloc[0], 'file_date': dt,
+                          'data_dates': sub_df["DATE"].unique().tolist()})
+
+    opers, rins = [], []
+    for file in master["SOURCE_FILE"].unique():
+        filedf = master[master["SOURCE_FILE"] == file]
+        if len(filedf["OPER"].unique()) > 1:
+            opers.append({"file": file, "operators": [o[:o.find("@")] for o in filedf["OPER"].unique()]})
+        if len(filedf["RIN"].unique()) > 1:
+            rins.append({"file": file, "RINs": filedf["RIN"].unique()})
+
+    return dates, opers, rins
+
+
+def test_ingest_and_validate(tmp_path, monkeypatch):
+    make_project(tmp_path / "proj")
+
+    project = projectData(str(tmp_path / "proj"), cache_dir=str(tmp_path / "cache"))
+    project.findShotFiles()
+    assert len(project.files) == 3
+    assert any(sf.endswith("field.zip::x/shots_2025-01-04.csv") for sf in project.files)
+
+    project.compileMaster()
+    assert len(project.master) == 126
+    assert isinstance(project.master["OPER"].dtype, pd.CategoricalDtype)
+    assert project.master["COUNT"].dtype == np.int64 and project.master["H380"].dtype == np.float32
+
+    results = project.runValidation()
+    dates, opers, rins = reference_checks(project.master)
+
+    assert results["date_consistency"] == dates and len(dates) == 1
+    assert results["operator"] == opers == project.checkOperator()
+    assert [r["file"] for r in rins] == [r["file"] for r in project.checkRIN()]
+    assert all(np.array_equal(a["RINs"], b["RINs"]) for a, b in zip(rins, results["rin"]))
+
+    # A second session loads every file from the cache without opening the archive
+    opened = []
+    zip_file = zipfile.ZipFile
+    monkeypatch.setattr(zipfile, "ZipFile", lambda path, *args, **kwargs: opened.append(path) or
+                        zip_file(path, *args, **kwargs))
+    cached = projectData(str(tmp_path / "proj"), cache_dir=str(tmp_path / "cache"))
+    cached.findShotFiles()
+    cached.compileMaster()
+    assert cached.cache.hits == 3 and cached.cache.misses == 0 and opened == []
+    pd.testing.assert_frame_equal(cached.master, project.master)
+
+    print("✓ Ingestion and grouped validation match the reference checks")
+
+
+def test_schema_fallbacks(tmp_path, capsys):
+    use_cols = HEADER.strip().split(",")
+
+    # Blank integer cells and a missing column: nullable integers, other columns keep their dtypes
+    rows = shot_rows("2025-01-01", "bob@x.com", 1, 3).splitlines()
+    blank = tmp_path / "shots_blank.csv"
+    blank.write_text(HEADER.replace(",GTIME", "") + "\n".join(row.rsplit(",", 1)[0] for row in rows)
+                     .replace(",8,2025", ",,2025") + "\n")
+    df = readShotCsv(str(blank), use_cols)
+    assert "GTIME" not in df and df["NSAT"].dtype == "Int16" and df["COUNT"].dtype == "Int64"
+    assert df["NSAT"].isna().tolist() == [True, False, False] and df["H380"].dtype == np.float32
+    assert "does not match" not in capsys.readouterr().out
+
+    # A value that breaks the schema: inferred for that column only, also from a zip member stream
+    with zipfile.ZipFile(tmp_path / "bad.zip", "w") as z:
+        z.writestr("shots_2025-01-05.csv", HEADER + shot_rows("2025-01-05", "dan@x.com", "R5", 4))
+    with zipfile.ZipFile(tmp_path / "bad.zip") as z, z.open("shots_2025-01-05.csv") as source:
+        df = readShotCsv(source, use_cols)
+    assert "does not match the shot schema" in capsys.readouterr().out
+    assert df["RIN"].tolist() == ["R5"] * 4 and df["COUNT"].dtype == "Int64" and df["SNR"].dtype == np.float32
+
+    # ...and master still builds and validates around it
+    make_project(tmp_path / "proj")
+    (tmp_path / "bad.zip").rename(tmp_path / "proj" / "bad.zip")
+    project = projectData(str(tmp_path / "proj"), use_cache=False)
+    project.findShotFiles()
+    project.compileMaster()
+    assert len(project.master) == 130 and set(project.master["RIN"].cat.categories) == {1, 2, 3, "R5"}
+    assert [issue["file"] for issue in project.runValidation()["rin"]] == ["day1/shots_2025-01-02.csv"]
+
+    print("✓ Schema fallbacks")
+
+
+def test_rules_pass_on_clean_data():
+    master = pd.DataFrame({"SOURCE_FILE": ["a.csv"] * 3, "FILE_DATE": ["2025-01-01"] * 3,
+                           "DATE": ["2025-01-01"] * 3, "OPER": ["bob@x.com"] * 3, "RIN": [1, 1, 1]})
+
+    assert runRules(master, ["date_consistency", "operator", "rin"]) == \
+        {"date_consistency": [], "operator": [], "rin": []}
+
+    print("✓ Clean data passes")
+
+
+def test_spatial_rules(monkeypatch):
+    import shot_spatial
+
+    rng = np.random.default_rng(1)
+    n = 400
+    east = 1000.0 + 5.0 * np.arange(n) + rng.normal(0, 0.2, n)
+    north = np.where(np.arange(n) < n // 2, 0.0, 20.0)
+    east[300] += 500.0                              # GPS jump
+    east[10], north[10] = east[9] + 0.3, north[9]   # repeated shot
+    master = pd.DataFrame({"SOURCE_FILE": np.where(np.arange(n) < n // 2, "a.csv", "b.csv"),
+                           "OPER": "bob@x.com", "COUNT": np.arange(n),
+                           "DATETIME": pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(n), unit="s"),
+                           "EASTING": east, "NORTHING": north})
+
+    results = runRules(master, ["near_duplicates", "track_jumps"])
+    assert [(d["count"], d["other_count"]) for d in results["near_duplicates"]] == [(9, 10), (10, 9)]
+    assert sorted(j["count"] for j in results["track_jumps"]) == [300, 301]
+    assert results["track_jumps"][0]["operator"] == "bob"
+
+    stats = shot_spatial.spacingStatistics(master)
+    assert abs(stats.loc["a.csv", "median"] - 5.0) < 0.5
+
+    # The grid hash gives the same answers without scipy
+    monkeypatch.setattr(shot_spatial, "cKDTree", None)
+    assert runRules(master, ["near_duplicates", "track_jumps"]) == results
+    pd.testing.assert_frame_equal(shot_spatial.spacingStatistics(master), stats)
+
+    print("✓ Spatial rules")
+
+
+def test_timing_rules():
+    count = np.array([1, 2, 3, 6, 7, 7, 1, 2, 10, 11, 12, 13])
+    seconds = np.array([0, 1, 2, 3, 4, 5, 6, 7, 0, 2, 1, 3])
+    logger = pd.Timestamp("2025-01-01 10:00:00") + pd.to_timedelta(seconds, unit="s")
+    # b.csv's GPS clock runs 5 s ahead
+    gps = logger + pd.to_timedelta(np.where(np.arange(12) < 8, 0, 5), unit="s")
+    master = pd.DataFrame({"SOURCE_FILE": ["a.csv"] * 8 + ["b.csv"] * 4, "OPER": "bob@x.com", "COUNT": count,
+                           "DATETIME": logger, "GDATE": gps.strftime("%Y-%m-%d"), "GTIME": gps.strftime("%H:%M:%S")})
+
+    results = runRules(master, ["clock_drift", "count_sequence", "timestamp_order"])
+
+    assert [(d["file"], d["median_drift"]) for d in results["clock_drift"]] == [("b.csv", 5.0)]
+    assert results["count_sequence"] == [{"file": "a.csv", "gaps": 1, "missing_counts": 2, "duplicates": 3,
+                                          "resets": 1, "gap_ends": [6], "reset_to": [1]}]
+    assert results["timestamp_order"] == [{"file": "b.csv", "out_of_order": 1, "first_count": 12}]
+
+    print("✓ Timing rules")
+
+
+def test_quality_rules():
+    import shot_quality
+
+    n = 200
+    snr = np.full(n, 30.0)
+    snr[50:90] = 4.0                    # sustained poor signal in a.csv
+    snr[20] = 2.0                       # a single bad shot is not flagged
+    nsat = np.full(n, 9)
+    nsat[150:190] = 3                   # poor GPS in b.csv
+    h380 = np.full(n, 1.0)
+    h380[120] = 0.1                     # dropout in b.csv
+    rin = np.where(np.arange(n) < 100, 1, 2)
+    rin[100:130], snr[100:130] = 3, 15.0  # a weak receiver, above MIN_SNR
+    master = pd.DataFrame({"SOURCE_FILE": np.where(np.arange(n) < 100, "a.csv", "b.csv"),
+                           "FILE_DATE": "2025-01-01", "OPER": np.where(np.arange(n) < 100, "bob@x.com", "amy@x.com"),
+                           "COUNT": np.arange(n), "RIN": rin,
+                           "SNR": snr, "H380": h380, "NSAT": nsat})
+
+    results = runRules(master, ["low_snr", "poor_gps", "signal_drops", "weak_receivers"])
+
+    assert [(i["file"], i["first_count"]) for i in results["low_snr"]] == [("a.csv", 62)]
+    assert [(i["file"], i["worst_rolling_nsat"]) for i in results["poor_gps"]] == [("b.csv", 3.0)]
+    assert [(i["file"], i["shots"], i["first_count"]) for i in results["signal_drops"]] == [("b.csv", 1, 120)]
+    assert [(i["receiver"], i["median_snr"], i["shots"]) for i in results["weak_receivers"]] == [(3, 15.0, 30)]
+
+    # RINs that are not integers (inferred schema fallback) are reported as they are
+    master["RIN"] = master["RIN"].map(lambda r: f"R{r}")
+    issues = runRules(master, ["weak_receivers"])["weak_receivers"]
+    assert [(i["receiver"], i["shots"]) for i in issues] == [("R3", 30)]
+    assert json.loads(json.dumps(issues, default=jsonDefault))[0]["receiver"] == "R3"
+
+    stats = shot_quality.qualityStatistics(master, "OPER")
+    assert stats.loc["bob@x.com", "snr_low"] == 41 and stats.loc["amy@x.com", "nsat_min"] == 3
+    assert stats.loc["amy@x.com", "h380_drops"] == 1
+
+    print("✓ Quality rules")
+
+
+def test_reorganize_and_export(tmp_path):
+    make_project(tmp_path / "proj")
+    project = projectData(str(tmp_path / "proj"), use_cache=False)
+    project.findShotFiles()
+    project.compileMaster()
+    project.reorganizeSheets()
+
+    assert sorted(project.reorgedDFs) == ["shots_amy_2025-01-02.csv", "shots_bob_2025-01-01.csv",
+                                          "shots_bob_2025-01-02.csv", "shots_carl_2025-01-04.csv"]
+    assert len(project.reorgedDFs["shots_amy_2025-01-02.csv"]) == 6
+    assert "FILE_DATE" not in project.reorgedDFs["shots_amy_2025-01-02.csv"].columns
+
+    for compression, file_format, suffix in [(None, "csv", ".csv"), ("gzip", "csv", ".csv.gz"),
+                                             ("zstd", "parquet", ".parquet")]:
+        out = tmp_path / (file_format + str(compression))
+        out.mkdir()
+        project.exportReorgSheets(str(out), compression=compression, file_format=file_format)
+        assert sorted(p.name for p in out.iterdir()) == sorted(n[:-4] + suffix for n in project.reorgedDFs)
+
+    back = pd.read_csv(tmp_path / "csvgzip" / "shots_bob_2025-01-01.csv.gz")
+    assert len(back) == 50
+
+    print("✓ Reorganized sheets and exports")
+
+
+def test_content_dedup(tmp_path):
+    make_project(tmp_path / "proj")
+    proj = tmp_path / "proj"
+    # The same delivery copied into a second folder and into a zip, and a
+    # different file that happens to share a name
+    (proj / "copy").mkdir()
+    (proj / "copy" / "shots_2025-01-01.csv").write_bytes((proj / "day1" / "shots_2025-01-01.csv").read_bytes())
+    with zipfile.ZipFile(proj / "backup.zip", "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr("shots_2025-01-02.csv", (proj / "day1" / "shots_2025-01-02.csv").read_text())
+    (proj / "other").mkdir()
+    (proj / "other" / "shots_2025-01-04.csv").write_text(HEADER + shot_rows("2025-01-04", "dan@x.com", 4, 3))
+
+    project = projectData(str(proj), use_cache=False)
+    project.findShotFiles()
+
+    assert len(project.files) == 4
+    # The copy whose path sorts first is the original, whatever order the scan finds them in
+    assert [{k: project.sourceName(d[k]) for k in d} for d in project.duplicateFiles] == [
+        {"file": "day1/shots_2025-01-01.csv", "duplicate_of": "copy/shots_2025-01-01.csv"},
+        {"file": "day1/shots_2025-01-02.csv", "duplicate_of": "backup.zip::shots_2025-01-02.csv"}]
+
+    # The two shots_2025-01-04.csv files stay separate sources, so per-file rules don't merge them
+    project.compileMaster()
+    assert set(project.master["SOURCE_FILE"].cat.categories) == {project.sourceName(sf) for sf in project.files}
+    assert {"field.zip::x/shots_2025-01-04.csv", "other/shots_2025-01-04.csv"} <= set(project.master["SOURCE_FILE"])
+    results = project.runValidation()
+    per_file = [name for name in results if VALIDATION_RULES[name].by == ("SOURCE_FILE",)]
+    assert {"operator", "rin", "count_sequence"} <= set(per_file)
+    flagged = {issue["file"] for name in per_file for issue in results[name]}
+    assert flagged == {"backup.zip::shots_2025-01-02.csv"}, {name: results[name] for name in per_file}
+
+    # With the cache, CRC32s are kept under the file fingerprint: a rescan (every
+    # watch poll) hashes only the files that changed
+    cached = projectData(str(proj), cache_dir=str(tmp_path / "cache"))
+    cached.findShotFiles()
+    hashed = cached.metrics.toDict()["find.hashing"]["files"]
+    assert hashed >= 2
+
+    again = projectData(str(proj), cache_dir=str(tmp_path / "cache"))
+    again.findShotFiles()
+    assert "find.hashing" not in again.metrics.toDict()
+    assert again.files == cached.files and again.duplicateFiles == cached.duplicateFiles
+
+    copy = proj / "copy" / "shots_2025-01-01.csv"
+    os.utime(copy, ns=(10**18, 10**18))
+    again.findShotFiles()
+    assert again.metrics.toDict()["find.hashing"]["files"] == 1
+
+    print("✓ Content deduplication")
+
+
+def normalised(results):
+    # Which of several equidistant shots is reported as the partner depends on row order
+    ties = ("other_file", "other_count")
+    return {name: sorted(json.dumps({k: v for k, v in issue.items() if k not in ties}, default=str, sort_keys=True)
+                         for issue in issues) for name, issues in results.items()}
+
+
+def test_incremental_update(tmp_path):
+    make_project(tmp_path / "proj")
+    proj = tmp_path / "proj"
+    project = projectData(str(proj), cache_dir=str(tmp_path / "cache"))
+    project.findShotFiles()
+    project.compileMaster()
+    project.runValidation()
+
+    assert project.updateShotFiles() == ([], [])
+
+    # A new delivery with a second operator, an edited file and a deleted one
+    with zipfile.ZipFile(proj / "delivery2.zip", "w") as z:
+        z.writestr("shots_2025-01-05.csv", HEADER + shot_rows("2025-01-05", "dan@x.com", 5, 20) +
+                   shot_rows("2025-01-05", "eve@x.com", 5, 3, 20))
+    edited = proj / "day1" / "shots_2025-01-01.csv"
+    edited.write_text(edited.read_text() + shot_rows("2025-01-01", "bob@x.com", 9, 2, 50))
+    os.utime(edited, ns=(10**18, 10**18))
+    (proj / "day1" / "shots_2025-01-02.csv").unlink()
+
+    added, removed = project.updateShotFiles()
+    assert len(added) == 2 and len(removed) == 2
+
+    full = projectData(str(proj), use_cache=False)
+    full.findShotFiles()
+    full.compileMaster()
+    full.runValidation()
+
+    key = ["SOURCE_FILE", "COUNT", "RIN"]
+    pd.testing.assert_frame_equal(
+        project.master.astype(str).sort_values(key, ignore_index=True),
+        full.master.astype(str).sort_values(key, ignore_index=True))
+    assert normalised(project.validation) == normalised(full.validation)
+    assert [i["file"] for i in project.validation["rin"]] == ["day1/shots_2025-01-01.csv"]
+
+    print("✓ Incremental update matches a full rebuild")
+
+
+def test_failed_update_is_retried(tmp_path, monkeypatch):
+    make_project(tmp_path / "proj")
+    proj = tmp_path / "proj"
+    project = projectData(str(proj), use_cache=False)
+    project.findShotFiles()
+    project.compileMaster()
+    project.runValidation()
+    rows, keys = len(project.master), dict(project.fileKeys)
+
+    # A delivery with a TIME that does not parse fails the whole update and changes nothing
+    bad = proj / "day1" / "shots_2025-01-06.csv"
+    bad.write_text(HEADER + shot_rows("2025-01-06", "bob@x.com", 1, 10).replace("10:00:03", "xx:yy"))
+    try:
+        project.updateShotFiles()
+        assert False, "bad TIME should fail the update"
+    except ValueError:
+        pass
+    assert len(project.master) == rows and project.fileKeys == keys
+
+    # A changed file that cannot be read keeps its old rows and key
+    edited = proj / "day1" / "shots_2025-01-01.csv"
+    edited.write_text(edited.read_text() + shot_rows("2025-01-01", "bob@x.com", 1, 2, 50))
+    os.utime(edited, ns=(10**18, 10**18))
+    bad.unlink()
+    read = project.readShotFiles
+    monkeypatch.setattr(project, "readShotFiles",
+                        lambda files, *args, **kwargs: {sf: df for sf, df in read(files, *args, **kwargs).items()
+                                                        if "01-01" not in sf})
+    assert project.updateShotFiles() == ([], [])
+    assert len(project.master) == rows and project.fileKeys == keys
+
+    # Both are picked up once they can be read
+    monkeypatch.undo()
+    bad.write_text(HEADER + shot_rows("2025-01-06", "bob@x.com", 1, 10))
+    added, removed = project.updateShotFiles()
+    assert sorted(added) == sorted([str(edited), str(bad)]) and removed == [str(edited)]
+    assert len(project.master) == rows + 12
+
+    print("✓ Failed updates are retried")
+
+
+def test_out_of_core_dataset(tmp_path):
+    make_project(tmp_path / "proj")
+    project = projectData(str(tmp_path / "proj"), use_cache=False)
+    project.findShotFiles()
+    project.compileMaster()
+    project.runValidation()
+    project.exportReorgSheets(str(tmp_path / "memory"))
+
+    ooc = projectData(str(tmp_path / "proj"), use_cache=False)
+    ooc.findShotFiles()
+    ooc.compileDataset(str(tmp_path / "dataset"), workers=2)
+    assert ooc.master.empty and len(ooc.dataset) == len(project.master)
+    assert len(ooc.dataset.partitions()) == 4
+
+    results = ooc.runDatasetValidation(workers=2)
+    # A partition only knows its own RIN categories
+    plain = lambda res: normalised({name: [{k: (list(v) if k == "RINs" else v) for k, v in issue.items()}
+                                           for issue in issues] for name, issues in res.items()})
+    assert plain(results) == plain(project.validation)
+    assert ooc.operatorChecks == project.operatorChecks
+
+    ooc.exportDatasetSheets(str(tmp_path / "disk"), workers=2)
+    names = sorted(p.name for p in (tmp_path / "memory").iterdir())
+    assert names == sorted(p.name for p in (tmp_path / "disk").iterdir())
+    for name in names:
+        assert (tmp_path / "memory" / name).read_text() == (tmp_path / "disk" / name).read_text()
+
+    # Unchanged files are not rewritten on the next compile
+    again = projectData(str(tmp_path / "proj"), use_cache=False)
+    again.findShotFiles()
+    mtimes = {p: p.stat().st_mtime_ns for p in (tmp_path / "dataset").rglob("*.parquet")}
+    again.compileDataset(str(tmp_path / "dataset"))
+    assert mtimes == {p: p.stat().st_mtime_ns for p in (tmp_path / "dataset").rglob("*.parquet")}
+
+    print("✓ Out-of-core dataset matches the in-memory master")
+
+
+def read_xlsx(path):
+    """{sheet: rows of cell values} of a workbook, without an Excel reader library."""
+    import xml.etree.ElementTree as ET
+
+    ns = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+    sheets = dict()
+    with zipfile.ZipFile(path) as z:
+        shared = [si.findtext(".//m:t", "", ns) for si in
+                  ET.fromstring(z.read("xl/sharedStrings.xml")).findall("m:si", ns)] \
+            if "xl/sharedStrings.xml" in z.namelist() else []
+        names = ET.fromstring(z.read("xl/workbook.xml")).findall(".//m:sheet", ns)
+        for n, sheet in enumerate(names, 1):
+            rows = []
+            for row in ET.fromstring(z.read(f"xl/worksheets/sheet{n}.xml")).iter(f"{{{ns['m']}}}row"):
+                cells = []
+                for c in row.findall("m:c", ns):
+                    if c.get("t") == "inlineStr":
+                        cells.append(c.findtext(".//m:t", "", ns))
+                    elif c.get("t") == "s":
+                        cells.append(shared[int(c.findtext("m:v", "", ns))])
+                    else:
+                        cells.append(float(c.findtext("m:v", "nan", ns)))
+                rows.append(cells)
+            sheets[sheet.get("name")] = rows
+
+    return sheets
+
+
+def test_excel_report(tmp_path, monkeypatch):
+    import shot_report
+
+    make_project(tmp_path / "proj")
+    # A RIN outside the schema makes RIN a mixed int / str object column
+    (tmp_path / "proj" / "day1" / "shots_2025-01-05.csv").write_text(
+        HEADER + shot_rows("2025-01-05", "dan@x.com", "R5", 3))
+    project = projectData(str(tmp_path / "proj"), use_cache=False)
+    project.findShotFiles()
+    project.compileMaster()
+    project.runValidation()
+    project.reorganizeSheets()
+
+    # A tiny row limit and chunk size exercise sheet continuation and chunk boundaries
+    monkeypatch.setattr(shot_report, "EXCEL_MAX_ROWS", 100)
+    project.genReport(str(tmp_path / "report.xlsx"), chunk_rows=7)
+
+    sheets = read_xlsx(tmp_path / "report.xlsx")
+    assert list(sheets)[:4] == ["Summary", "Files", "Issues", "Master"] and "Master (2)" in sheets
+    assert sheets["Master"][0] == list(project.master.columns)
+    master = sheets["Master"][1:] + sheets["Master (2)"][1:]
+    count = list(project.master.columns).index("COUNT")
+    assert [row[count] for row in master] == project.master["COUNT"].tolist()
+    rin = list(project.master.columns).index("RIN")
+    assert [row[rin] for row in master] == [v if isinstance(v, str) else float(v) for v in project.master["RIN"]]
+    assert "R5" in [row[rin] for row in master]
+
+    amy = sheets["amy 2025-01-02"]
+    expected = project.reorgedDFs["shots_amy_2025-01-02.csv"]
+    assert amy[0] == list(expected.columns) and len(amy) == len(expected) + 1
+    assert sum(row[3] for row in sheets["Files"][1:]) == len(project.master)
+    assert sum(row[0] == "operator" for row in sheets["Issues"][1:]) == 1
+
+    print("✓ Excel report")
+
+
+def test_excel_report_many_dates(tmp_path):
+    import shot_report
+
+    # More operator/date sheets than xlsxwriter can keep temp files open for
+    proj = tmp_path / "proj"
+    proj.mkdir()
+    dates = pd.date_range("2024-01-01", periods=shot_report.MAX_OPERATOR_SHEETS + 10).strftime("%Y-%m-%d")
+    for date in dates:
+        (proj / f"shots_{date}.csv").write_text(HEADER + shot_rows(date, "bob@x.com", 1, 2))
+    project = projectData(str(proj), use_cache=False)
+    project.findShotFiles()
+    project.compileMaster()
+
+    project.genReport(str(tmp_path / "report.xlsx"))
+    sheets = read_xlsx(tmp_path / "report.xlsx")
+    assert list(sheets) == ["Summary", "Files", "Issues", "Master"]
+    assert len(sheets["Master"]) == 2 * len(dates) + 1
+    summary = {row[0]: row[1:] for row in sheets["Summary"] if row}
+    assert summary["Operator/date sheets"][0].startswith(str(len(dates)))
+    assert sheets["Summary"][-1][:2] == [dates[-1], "bob"]
+
+    # Without the count up front, writeReport stops before running out of file handles
+    try:
+        shot_report.writeReport(str(tmp_path / "unbounded.xlsx"), project.iterMasterChunks(), {})
+        assert False, "too many sheets should raise"
+    except ValueError:
+        pass
+
+    print("✓ Excel report with many dates")
+
+
+def test_excel_report_from_dataset(tmp_path):
+    make_project(tmp_path / "proj")
+    # A later date whose file has no GTIME column
+    (tmp_path / "proj" / "day1" / "shots_2025-01-09.csv").write_text(
+        "\n".join(line.rsplit(",", 1)[0] for line in (HEADER + shot_rows("2025-01-09", "bob@x.com", 1, 4)).splitlines()))
+    project = projectData(str(tmp_path / "proj"), use_cache=False)
+    project.findShotFiles()
+    project.compileDataset(str(tmp_path / "dataset"))
+
+    project.genReport(str(tmp_path / "report.xlsx"))
+    sheets = read_xlsx(tmp_path / "report.xlsx")
+    header = sheets["Master"][0]
+    assert "GTIME" in header and len(sheets["Master"]) == len(project.dataset) + 1
+    date, gtime = header.index("DATE"), header.index("GTIME")
+    rows = [row for row in sheets["Master"][1:] if row[date] == "2025-01-09"]
+    # GTIME is the last column, so its blank cells shorten the row
+    assert len(rows) == 4 and all(len(row) == gtime for row in rows)
+
+    print("✓ Excel report from the dataset")
+
+
+def test_phase_metrics(tmp_path):
+    make_project(tmp_path / "proj")
+    project = projectData(str(tmp_path / "proj"), cache_dir=str(tmp_path / "cache"))
+    project.findShotFiles()
+    project.compileMaster()
+    project.runValidation()
+    project.exportReorgSheets(str(tmp_path / "sheets"))
+
+    metrics = project.metrics.toDict()
+    assert {"find", "find.walk", "find.zip_listing", "compile", "compile.read", "compile.read.parse",
+            "compile.concat", "compile.datetime", "validate", "validate.rin", "export"} <= set(metrics)
+    assert metrics["find"]["files"] == 3 and metrics["find"]["bytes"] > 0
+    assert metrics["compile"]["rows"] == metrics["compile.read"]["rows"] == 126
+    assert metrics["compile.read.parse"]["files"] == 3 and metrics["compile.read.parse"]["concurrent"]
+    assert metrics["compile"]["rows_per_s"] > 0 and metrics["export"]["files"] == 4
+    if metrics["compile"]["peak_rss"] is not None:
+        assert metrics["compile"]["peak_rss"] >= metrics["compile"]["start_rss"]
+
+    # A rerun replaces the phase: parses become cache loads
+    project.compileMaster()
+    metrics = project.metrics.toDict()
+    assert "compile.read.parse" not in metrics and metrics["compile.read.cache_load"]["files"] == 3
+
+    table = project.metricsReport("compile")
+    assert list(table.index) == ["compile", "compile.read", "compile.read.cache_load",
+                                 "compile.concat", "compile.datetime"]
+
+    print("✓ Phase metrics")
+
+
+def test_batch_cli(tmp_path):
+    from shot_checker_cli import main
+
+    make_project(tmp_path / "proj")
+    out = tmp_path / "out"
+
+    assert main([str(tmp_path / "proj"), str(tmp_path / "missing"), "-o", str(out), "-j", "2",
+                 "--no-cache", "--output", "parquet", "--export"]) == 1
+
+    summaries = json.loads((out / "summary.json").read_text())
+    assert [s["status"] for s in summaries] == ["ok", "error"]
+    assert summaries[0]["rows"] == 126 and set(summaries[0]["timings"]) >= {"find", "compile", "validate", "export"}
+    assert summaries[0]["metrics"]["compile"]["rows"] == 126
+
+    issues = pd.read_parquet(out / "proj" / "issues.parquet")
+    assert (issues["rule"] == "operator").sum() == 1
+    assert len(list((out / "proj" / "sheets").iterdir())) == 4
+
+    print("✓ Batch CLI")